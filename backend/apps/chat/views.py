@@ -5,17 +5,30 @@ Views for Chat API with RAG.
 import logging
 import json
 from rest_framework import status
+from rest_framework.exceptions import Throttled
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.utils import timezone
 from django.http import StreamingHttpResponse
 
 from core.llm.rag import RAGPipeline, RAGError
+from core.llm.rate_limit import RateLimitExceeded
+from core.llm.summarization import schedule_summary
 from apps.conversations.models import Conversation, Message
 
 logger = logging.getLogger(__name__)
 
+# Result keys stored in Message.metadata (per-stage timings, context and filter stats)
+MESSAGE_METADATA_KEYS = ('context', 'filters', 'route', 'timings')
+
+
+def _message_metadata(result):
+    """Subset of a RAG result (or final stream chunk) persisted with the reply."""
+    return {key: result[key] for key in MESSAGE_METADATA_KEYS if result.get(key)}
+
 
 class ChatView(APIView):
     """
@@ -55,6 +68,9 @@ class ChatView(APIView):
         
         # If streaming is requested, return SSE response
         if stream:
+            # Under ASGI stream from the async pipeline; WSGI would buffer an async iterator
+            if isinstance(request._request, ASGIRequest):
+                return self._astream_response(request, message_text, conversation_id)
             return self._stream_response(request, message_text, conversation_id)
         
         # Otherwise, return regular response
@@ -91,6 +107,7 @@ class ChatView(APIView):
                 
                 # Stream response
                 full_response = ""
+                stats = {}
                 for chunk in rag.query_stream(message_text, conversation):
                     if chunk.get('type') == 'content':
                         content = chunk.get('content', '')
@@ -98,20 +115,33 @@ class ChatView(APIView):
                         yield f"data: {json.dumps({'type': 'content', 'content': content})}\n\n"
                     elif chunk.get('type') == 'sources':
                         sources = chunk.get('sources', [])
-                        yield f"data: {json.dumps({'type': 'sources', 'sources': sources})}\n\n"
+                        yield f"data: {json.dumps({'type': 'sources', 'sources': sources, 'cached': chunk.get('cached', False), 'filters': chunk.get('filters', {})})}\n\n"
+                    elif chunk.get('type') == 'metadata':
+                        stats = chunk
+                    elif chunk.get('type') == 'error':
+                        # Generation failed or was shed by the rate limiter (with retry_after):
+                        # pass it on and don't save an empty reply
+                        yield f"data: {json.dumps(chunk)}\n\n"
+                        return
                 
-                # Save assistant message
+                # Save assistant message with the real model, token counts and stage timings
                 assistant_message = Message.objects.create(
                     conversation=conversation,
                     role=Message.Role.ASSISTANT,
                     content=full_response,
-                    model_used='gpt-4',
-                    tokens_input=0,
-                    tokens_output=0
+                    model_used=stats.get('model', 'unknown'),
+                    tokens_input=stats.get('tokens_input', 0),
+                    tokens_output=stats.get('tokens_output', 0),
+                    latency_ms=stats.get('latency_ms'),
+                    metadata=_message_metadata(stats)
                 )
+                conversation.update_costs()
                 
                 # Send completion
-                yield f"data: {json.dumps({'type': 'done', 'message_id': str(assistant_message.id)})}\n\n"
+                yield f"data: {json.dumps(self._done_event(assistant_message, stats))}\n\n"
+                
+                # Compact older turns in the background
+                schedule_summary(conversation)
                 
             except Exception as e:
                 logger.error(f"❌ Streaming error: {e}", exc_info=True)
@@ -125,6 +155,98 @@ class ChatView(APIView):
         response['X-Accel-Buffering'] = 'no'
         return response
     
+    def _astream_response(self, request, message_text, conversation_id):
+        """Stream response using Server-Sent Events from the async RAG pipeline."""
+        
+        async def event_stream():
+            try:
+                # Setup user and tenant
+                tenant, user, user_role = await sync_to_async(self._get_user_context)(request)
+                
+                # Get or create conversation
+                conversation = await sync_to_async(self._get_or_create_conversation)(
+                    tenant, user, user_role, conversation_id, message_text
+                )
+                
+                # Save user message
+                await Message.objects.acreate(
+                    conversation=conversation,
+                    role=Message.Role.USER,
+                    content=message_text
+                )
+                
+                # Send conversation ID first
+                yield f"data: {json.dumps({'type': 'conversation_id', 'conversation_id': str(conversation.id)})}\n\n"
+                
+                # Initialize RAG
+                rag = RAGPipeline(
+                    tenant_id=str(tenant.id),
+                    user_role=user_role
+                )
+                
+                # Stream response
+                full_response = ""
+                stats = {}
+                async for chunk in rag.aquery_stream(message_text, conversation):
+                    if chunk.get('type') == 'content':
+                        content = chunk.get('content', '')
+                        full_response += content
+                        yield f"data: {json.dumps({'type': 'content', 'content': content})}\n\n"
+                    elif chunk.get('type') == 'sources':
+                        sources = chunk.get('sources', [])
+                        yield f"data: {json.dumps({'type': 'sources', 'sources': sources, 'cached': chunk.get('cached', False), 'filters': chunk.get('filters', {})})}\n\n"
+                    elif chunk.get('type') == 'metadata':
+                        stats = chunk
+                    elif chunk.get('type') == 'error':
+                        # Generation failed or was shed by the rate limiter (with retry_after):
+                        # pass it on and don't save an empty reply
+                        yield f"data: {json.dumps(chunk)}\n\n"
+                        return
+                
+                # Save assistant message with the real model, token counts and stage timings
+                assistant_message = await Message.objects.acreate(
+                    conversation=conversation,
+                    role=Message.Role.ASSISTANT,
+                    content=full_response,
+                    model_used=stats.get('model', 'unknown'),
+                    tokens_input=stats.get('tokens_input', 0),
+                    tokens_output=stats.get('tokens_output', 0),
+                    latency_ms=stats.get('latency_ms'),
+                    metadata=_message_metadata(stats)
+                )
+                await sync_to_async(conversation.update_costs)()
+                
+                # Send completion
+                yield f"data: {json.dumps(self._done_event(assistant_message, stats))}\n\n"
+                
+                # Compact older turns in the background
+                await sync_to_async(schedule_summary)(conversation)
+                
+            except Exception as e:
+                logger.error(f"❌ Streaming error: {e}", exc_info=True)
+                yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+        
+        response = StreamingHttpResponse(
+            event_stream(),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    @staticmethod
+    def _done_event(assistant_message, stats):
+        """SSE completion event: message id, model, token counts and stage timings."""
+        return {
+            'type': 'done',
+            'message_id': str(assistant_message.id),
+            'model': assistant_message.model_used,
+            'latency_ms': stats.get('latency_ms'),
+            'tokens_input': assistant_message.tokens_input,
+            'tokens_output': assistant_message.tokens_output,
+            'timings': stats.get('timings', {})
+        }
+    
     def _regular_response(self, request, message_text, conversation_id):
         """Regular non-streaming response."""
     def _regular_response(self, request, message_text, conversation_id):
@@ -167,15 +289,19 @@ class ChatView(APIView):
                 role=Message.Role.ASSISTANT,
                 content=result['response'],
                 model_used=result.get('model', 'unknown'),
-                tokens_input=result.get('tokens_used', 0) // 2,  # Rough estimate
-                tokens_output=result.get('tokens_used', 0) // 2,
+                tokens_input=result.get('tokens_input', 0),
+                tokens_output=result.get('tokens_output', 0),
                 retrieved_documents=result.get('sources', []),
-                latency_ms=result.get('latency_ms')
+                latency_ms=result.get('latency_ms'),
+                metadata=_message_metadata(result)
             )
             
             # Update conversation costs
             conversation.update_costs()
             
+            # Compact older turns in the background
+            schedule_summary(conversation)
+            
             # Format sources for response
             sources = []
             for doc in result.get('sources', [])[:5]:  # Top 5 sources
@@ -197,9 +323,18 @@ class ChatView(APIView):
                 'model': result.get('model'),
                 'latency_ms': result.get('latency_ms'),
                 'cached': result.get('cached', False),
-                'tokens_used': result.get('tokens_used', 0)
+                'tokens_used': result.get('tokens_used', 0),
+                'tokens_input': result.get('tokens_input', 0),
+                'tokens_output': result.get('tokens_output', 0),
+                'context': result.get('context'),
+                'filters': result.get('filters'),
+                'timings': result.get('timings')
             }, status=status.HTTP_200_OK)
             
+        except RateLimitExceeded as e:
+            logger.warning(f"🚦 {e}")
+            raise Throttled(wait=e.retry_after, detail='The AI provider is at capacity, please retry shortly')
+        
         except RAGError as e:
             logger.error(f"RAG error: {e}")
             return Response(
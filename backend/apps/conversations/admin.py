@@ -19,14 +19,14 @@ class ConversationAdmin(admin.ModelAdmin):
                     'total_tokens', 'is_archived', 'created_at', 'updated_at')
     list_filter = ('is_archived', 'user_role', 'tenant', 'created_at')
     search_fields = ('title', 'user__username', 'user__email')
-    readonly_fields = ('id', 'total_tokens', 'total_cost_usd', 'created_at', 'updated_at')
+    readonly_fields = ('id', 'summary_through', 'total_tokens', 'total_cost_usd', 'created_at', 'updated_at')
     
     fieldsets = (
         ('Basic Information', {
             'fields': ('id', 'tenant', 'user', 'user_role', 'title')
         }),
         ('Summary', {
-            'fields': ('summary',)
+            'fields': ('summary', 'summary_through')
         }),
         ('Usage & Cost', {
             'fields': ('total_tokens', 'total_cost_usd')
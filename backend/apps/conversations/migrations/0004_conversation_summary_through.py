@@ -0,0 +1,23 @@
+# Generated manually on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("conversations", "0003_alter_conversation_user"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="summary_through",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Creation time of the last message folded into the summary",
+                null=True,
+                verbose_name="Summary Through",
+            ),
+        ),
+    ]
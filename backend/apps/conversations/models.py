@@ -55,6 +55,13 @@ class Conversation(models.Model):
         help_text=_('AI-generated summary of conversation')
     )
     
+    summary_through = models.DateTimeField(
+        _('Summary Through'),
+        null=True,
+        blank=True,
+        help_text=_('Creation time of the last message folded into the summary')
+    )
+    
     total_tokens = models.IntegerField(
         _('Total Tokens'),
         default=0,
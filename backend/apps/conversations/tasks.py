@@ -0,0 +1,25 @@
+"""
+Celery tasks for conversations.
+"""
+
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def summarize_conversation_task(conversation_id):
+    """
+    Fold older messages into the conversation's rolling summary.
+    
+    Args:
+        conversation_id: Conversation UUID
+    """
+    
+    from core.llm.summarization import summarize_conversation
+    
+    try:
+        summarize_conversation(conversation_id)
+    except Exception as e:
+        logger.error(f"Error summarizing conversation {conversation_id}: {e}", exc_info=True)
@@ -5,10 +5,11 @@ from .models import Document
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
     list_display = ('id', 'tenant', 'content_type', 'user_roles', 'times_retrieved', 
-                    'is_active', 'freshness_date', 'created_at')
+                    'passage_count', 'is_active', 'freshness_date', 'created_at')
     list_filter = ('is_active', 'content_type', 'tenant', 'freshness_date', 'created_at')
     search_fields = ('content', 'source_reference')
-    readonly_fields = ('id', 'times_retrieved', 'avg_relevance_score', 'created_at', 'updated_at')
+    readonly_fields = ('id', 'parent', 'passage_index', 'passage_count', 'times_retrieved', 'avg_relevance_score',
+                       'created_at', 'updated_at')
     
     fieldsets = (
         ('Basic Information', {
@@ -20,6 +21,9 @@ class DocumentAdmin(admin.ModelAdmin):
         ('Metadata', {
             'fields': ('metadata', 'source_url', 'source_reference', 'freshness_date')
         }),
+        ('Passages', {
+            'fields': ('parent', 'passage_index', 'passage_count')
+        }),
         ('Analytics', {
             'fields': ('times_retrieved', 'avg_relevance_score')
         }),
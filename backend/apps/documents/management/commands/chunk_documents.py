@@ -0,0 +1,51 @@
+"""
+Django management command to split long documents into passages
+Usage: python manage.py chunk_documents [--tenant slug]
+
+Documents are also (re-)chunked whenever they are saved; this command
+covers rows that existed before chunking was enabled or whose passage size
+settings changed. New passages are queued for embedding like any other
+saved document.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.documents.models import Document
+from apps.tenants.models import Tenant
+from core.llm.chunking import sync_passages
+from core.llm.embedding_queue import embedding_queue
+
+
+class Command(BaseCommand):
+    help = 'Splits long documents into passages for retrieval'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            type=str,
+            help='Filter by tenant slug',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DOCUMENT_CHUNKING_ENABLED:
+            raise CommandError('DOCUMENT_CHUNKING_ENABLED is off')
+
+        documents = Document.objects.filter(parent__isnull=True)
+        tenant_slug = options.get('tenant')
+        if tenant_slug:
+            tenant = Tenant.objects.filter(slug=tenant_slug).first()
+            if tenant is None:
+                raise CommandError(f'Tenant not found: {tenant_slug}')
+            documents = documents.filter(tenant=tenant)
+
+        chunked = passages = 0
+        for document in documents.iterator(chunk_size=200):
+            count = sync_passages(document)
+            if count:
+                chunked += 1
+                passages += count
+
+        embedding_queue.flush()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {chunked} documents split into {passages} passages'
+        ))
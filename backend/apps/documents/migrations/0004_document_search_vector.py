@@ -0,0 +1,71 @@
+# Generated manually on 2026-10-18
+# Stored, weighted Spanish + English tsvector for documents, maintained by a
+# trigger and indexed with GIN. The trigger and index are PostgreSQL only;
+# immutable_unaccent() is created by properties 0011.
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+FORWARD_SQL = """
+CREATE OR REPLACE FUNCTION documents_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('spanish', immutable_unaccent(coalesce(NEW.source_reference, ''))), 'A') ||
+        setweight(to_tsvector('english', immutable_unaccent(coalesce(NEW.source_reference, ''))), 'A') ||
+        setweight(to_tsvector('spanish', immutable_unaccent(coalesce(NEW.content, ''))), 'B') ||
+        setweight(to_tsvector('english', immutable_unaccent(coalesce(NEW.content, ''))), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS documents_search_vector_trigger ON documents;
+CREATE TRIGGER documents_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF content, source_reference, search_vector
+    ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_search_vector_update();
+
+-- Backfill existing rows through the trigger
+UPDATE documents SET search_vector = NULL;
+
+CREATE INDEX IF NOT EXISTS documents_search_vector_gin ON documents USING gin (search_vector);
+"""
+
+REVERSE_SQL = """
+DROP INDEX IF EXISTS documents_search_vector_gin;
+DROP TRIGGER IF EXISTS documents_search_vector_trigger ON documents;
+DROP FUNCTION IF EXISTS documents_search_vector_update();
+"""
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(FORWARD_SQL)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0003_embedding_hnsw_index"),
+        ("properties", "0011_search_vector_trigger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                blank=True,
+                help_text="Full-text search vector",
+                null=True,
+            ),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
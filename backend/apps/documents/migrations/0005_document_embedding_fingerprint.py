@@ -0,0 +1,59 @@
+# Generated manually on 2026-10-18
+# Fingerprint (SHA-256 of the embedded text) and model tag of each stored
+# embedding, so unchanged rows are not re-embedded. Existing embeddings are
+# stamped as produced by the configured model from the stored content.
+
+import hashlib
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def stamp_embeddings(apps, schema_editor):
+    Document = apps.get_model('documents', 'Document')
+    model_tag = f"{settings.OPENAI_EMBEDDING_MODEL}:{settings.EMBEDDING_DIMENSIONS}"
+
+    batch = []
+    rows = Document.objects.filter(embedding__isnull=False).only('id', 'content')
+    for doc in rows.iterator(chunk_size=2000):
+        doc.embedding_hash = hashlib.sha256((doc.content or '').encode('utf-8')).hexdigest()
+        doc.embedding_model = model_tag
+        batch.append(doc)
+        if len(batch) >= 2000:
+            Document.objects.bulk_update(batch, ['embedding_hash', 'embedding_model'])
+            batch = []
+    if batch:
+        Document.objects.bulk_update(batch, ['embedding_hash', 'embedding_model'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0004_document_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="embedding_hash",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="SHA-256 of the text the embedding was generated from",
+                max_length=64,
+                verbose_name="Embedding Hash",
+            ),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="embedding_model",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text='Embedding model and dimension ("model:dimensions") of the stored vector',
+                max_length=100,
+                verbose_name="Embedding Model",
+            ),
+        ),
+        migrations.RunPython(stamp_embeddings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated manually on 2026-10-18
+# Passage rows for long documents (see core/llm/chunking.py). Existing
+# documents are split with `python manage.py chunk_documents`.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0005_document_embedding_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="document",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Document this passage was split from",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="passages",
+                to="documents.document",
+                verbose_name="Parent Document",
+            ),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="passage_index",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Position of this passage in the parent document",
+                null=True,
+                verbose_name="Passage Index",
+            ),
+        ),
+        migrations.AddField(
+            model_name="document",
+            name="passage_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Number of passages this document is split into (0 = embedded whole)",
+                verbose_name="Passage Count",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="document",
+            constraint=models.UniqueConstraint(
+                fields=("parent", "passage_index"), name="unique_passage_per_document"
+            ),
+        ),
+    ]
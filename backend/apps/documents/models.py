@@ -3,13 +3,24 @@ Document model for RAG knowledge base.
 """
 
 import uuid
+from django.conf import settings
 from django.db import models
 # from django.contrib.postgres.fields import ArrayField
 ArrayField = lambda field, **kwargs: models.JSONField(**kwargs)
 from django.utils.translation import gettext_lazy as _
-# from pgvector.django import VectorField
-def VectorField(dimensions=None, **kwargs):
-    return models.JSONField(**kwargs)
+if 'postgresql' in settings.DATABASES['default']['ENGINE']:
+    # Maintained by a database trigger (migration 0004)
+    from django.contrib.postgres.search import SearchVectorField
+else:
+    # SQLite compat
+    def SearchVectorField(**kwargs):
+        return models.TextField(**kwargs)
+if settings.PGVECTOR_ENABLED:
+    from pgvector.django import VectorField
+else:
+    # SQLite compat
+    def VectorField(dimensions=None, **kwargs):
+        return models.JSONField(**kwargs)
 
 from apps.tenants.models import Tenant
 
@@ -75,13 +86,59 @@ class Document(models.Model):
         help_text=_('Document text content')
     )
     
+    # Passages of long documents (see core/llm/chunking.py)
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='passages',
+        verbose_name=_('Parent Document'),
+        help_text=_('Document this passage was split from')
+    )
+    
+    passage_index = models.PositiveIntegerField(
+        _('Passage Index'),
+        null=True,
+        blank=True,
+        help_text=_('Position of this passage in the parent document')
+    )
+    
+    passage_count = models.PositiveIntegerField(
+        _('Passage Count'),
+        default=0,
+        help_text=_('Number of passages this document is split into (0 = embedded whole)')
+    )
+    
     embedding = VectorField(
-        dimensions=1536,
+        dimensions=settings.EMBEDDING_DIMENSIONS,
         null=True,
         blank=True,
         help_text=_('Vector embedding for semantic search')
     )
     
+    embedding_hash = models.CharField(
+        _('Embedding Hash'),
+        max_length=64,
+        blank=True,
+        default='',
+        help_text=_('SHA-256 of the text the embedding was generated from')
+    )
+    
+    embedding_model = models.CharField(
+        _('Embedding Model'),
+        max_length=100,
+        blank=True,
+        default='',
+        help_text=_('Embedding model and dimension ("model:dimensions") of the stored vector')
+    )
+    
+    search_vector = SearchVectorField(
+        null=True,
+        blank=True,
+        help_text=_('Full-text search vector')
+    )
+    
     metadata = models.JSONField(
         _('Metadata'),
         default=dict,
@@ -164,23 +221,78 @@ class Document(models.Model):
             models.Index(fields=['freshness_date']),
             models.Index(fields=['-times_retrieved']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['parent', 'passage_index'],
+                name='unique_passage_per_document',
+            ),
+        ]
+    
+    # Fields whose change re-syncs the passages of a parent document
+    PASSAGE_SOURCE_FIELDS = (
+        'content', 'tenant', 'user_roles', 'content_type', 'freshness_date',
+        'source_url', 'source_reference', 'is_active', 'metadata',
+    )
     
     def __str__(self):
         return f"{self.get_content_type_display()} - {self.content[:50]}..."
     
+    def needs_embedding(self):
+        """Whether the embedding is missing or was generated from other content, model or dimension."""
+        if self.passage_count:
+            return False  # Only the passages are embedded
+        from core.llm.embeddings import embedding_is_current
+        return not embedding_is_current(self, self.content)
+    
+    def save(self, *args, **kwargs):
+        """Override save to split long content into passages, sync the vector index and drop cached answers and retrievals."""
+        super().save(*args, **kwargs)
+        
+        update_fields = kwargs.get('update_fields')
+        if self.parent_id is None and (update_fields is None or set(self.PASSAGE_SOURCE_FIELDS) & set(update_fields)):
+            from core.llm.chunking import sync_passages
+            sync_passages(self)
+        
+        if update_fields is None or {'embedding', 'user_roles', 'is_active'} & set(update_fields):
+            from core.llm.vector_index import sync_object
+            sync_object(self, 'document')
+        
+        from core.llm.semantic_cache import invalidate_sources
+        invalidate_sources('document', self.id, update_fields)
+        
+        from core.llm.retrieval_cache import bump_inventory_version
+        bump_inventory_version(self.tenant_id, update_fields)
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to drop the document (and its passages) from the vector index, answer and retrieval caches."""
+        if self.passage_count:
+            from core.llm.chunking import remove_passages
+            remove_passages(self.passages.all())
+        
+        from core.llm.vector_index import remove_object
+        remove_object(self, 'document')
+        
+        from core.llm.semantic_cache import invalidate_sources
+        invalidate_sources('document', self.id)
+        
+        result = super().delete(*args, **kwargs)
+        
+        from core.llm.retrieval_cache import bump_inventory_version
+        bump_inventory_version(self.tenant_id)
+        
+        return result
+    
     def increment_retrieved(self, relevance_score=None):
-        """Increment retrieval count and update average relevance."""
-        self.times_retrieved += 1
+        """Atomically increment retrieval count and update average relevance."""
+        from decimal import Decimal
+        from core.llm.retrieval_stats import apply_retrieval_stats
         
-        if relevance_score is not None:
-            if self.avg_relevance_score is None:
-                self.avg_relevance_score = relevance_score
-            else:
-                # Running average
-                total = self.avg_relevance_score * (self.times_retrieved - 1) + relevance_score
-                self.avg_relevance_score = total / self.times_retrieved
+        if relevance_score is None:
+            Document.objects.filter(id=self.id).update(times_retrieved=models.F('times_retrieved') + 1)
+        else:
+            apply_retrieval_stats(Document, {self.id: (1, Decimal(str(relevance_score)))})
         
-        self.save(update_fields=['times_retrieved', 'avg_relevance_score'])
+        self.refresh_from_db(fields=['times_retrieved', 'avg_relevance_score'])
     
     def is_fresh(self, max_days=90):
         """Check if document is still fresh."""
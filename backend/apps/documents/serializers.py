@@ -17,10 +17,10 @@ class DocumentSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'tenant', 'content', 'user_roles', 'content_type', 'content_type_display',
             'freshness_date', 'source_url', 'source_reference', 'is_active',
-            'times_retrieved', 'avg_relevance_score', 'is_fresh',
+            'times_retrieved', 'avg_relevance_score', 'is_fresh', 'passage_count',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'times_retrieved', 'avg_relevance_score', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'times_retrieved', 'avg_relevance_score', 'passage_count', 'created_at', 'updated_at']
     
     def get_is_fresh(self, obj):
         """Check if document is fresh."""
@@ -22,9 +22,10 @@ class DocumentViewSet(viewsets.ModelViewSet):
     search_fields = ['content', 'source_reference']
     
     def get_queryset(self):
-        """Filter documents by tenant."""
+        """Filter documents by tenant (passages are managed through their parent)."""
         return Document.objects.filter(
-            tenant=self.request.user.tenant
+            tenant=self.request.user.tenant,
+            parent__isnull=True
         ).order_by('-created_at')
     
     def perform_create(self, serializer):
@@ -19,8 +19,10 @@ def ingest_url_task(self, url, tenant_id, user_id):
         user_id: User UUID who initiated the task
     """
     
+    from django.conf import settings
     from core.scraping.scraper import scrape_url, ScraperError
     from core.llm.extraction import extract_property_data, ExtractionError
+    from core.llm.rate_limit import RateLimitExceeded
     from apps.properties.models import Property
     from apps.tenants.models import Tenant
     
@@ -35,7 +37,9 @@ def ingest_url_task(self, url, tenant_id, user_id):
         
         # Extract property data
         html_content = scraped_data.get('html', scraped_data.get('text', ''))
-        extracted_data = extract_property_data(html_content, url=url)
+        extracted_data = extract_property_data(
+            html_content, url=url, max_wait=settings.LLM_RATE_LIMIT_BATCH_MAX_WAIT
+        )
         
         # Get tenant
         tenant = Tenant.objects.get(id=tenant_id)
@@ -56,6 +60,11 @@ def ingest_url_task(self, url, tenant_id, user_id):
             'property_name': property_obj.property_name
         }
         
+    except RateLimitExceeded as e:
+        logger.warning(f"⚠️ {e}, retrying ingestion of {url}")
+        # Retry once the shared rate limit has room again
+        raise self.retry(exc=e, countdown=e.retry_after)
+    
     except (ScraperError, ExtractionError) as e:
         logger.error(f"Ingestion error: {e}")
         # Retry with exponential backoff
@@ -78,100 +87,65 @@ def generate_property_embedding_task(property_id):
         property_id: Property UUID
     """
     
-    from apps.properties.models import Property
-    from langchain_openai import OpenAIEmbeddings
-    from django.conf import settings
+    from core.llm.backfill import backfill_embeddings
     
     try:
-        property_obj = Property.objects.get(id=property_id)
-        
-        if not property_obj.content_for_search:
-            property_obj.content_for_search = property_obj.generate_search_content()
-        
-        # Generate embedding
-        embeddings = OpenAIEmbeddings(
-            model=settings.OPENAI_EMBEDDING_MODEL,
-            openai_api_key=settings.OPENAI_API_KEY
-        )
-        
-        embedding = embeddings.embed_query(property_obj.content_for_search)
-        property_obj.embedding = embedding
-        property_obj.save(update_fields=['embedding', 'content_for_search'])
+        stats = backfill_embeddings('property', ids=[property_id], force=True)
+        return {'status': 'success' if stats.rows or stats.unchanged else 'failed'}
     except Exception as e:
         logger.error(f"Error generating embedding for property {property_id}: {e}")
+        return {'status': 'failed', 'error': str(e)}
 
 
-@shared_task(bind=True, max_retries=3)
-def generate_embedding_async(self, property_id: str):
+@shared_task(bind=True, max_retries=5, acks_late=True)
+def embed_objects_task(self, kind: str, ids: list):
     """
-    Generate embedding for a property asynchronously (NEW version).
-    Uses the new embedding system from core.llm.embeddings
+    Embed a micro-batch of properties or documents in one provider call.
+    
+    Dispatched by core.llm.embedding_queue, which debounces post-save
+    embeddings. Rows whose embedding is already current are skipped; a failed
+    request is retried with backoff, and acks_late redelivers the batch if the
+    worker dies mid-way.
     
     Args:
-        property_id: UUID of the property
-        
-    Returns:
-        dict with success status and details
+        kind: 'property' or 'document'
+        ids: Primary keys to embed
     """
+    from core.llm.backfill import BackfillError, backfill_embeddings
+    
     try:
-        from apps.properties.models import Property
-        from core.llm.embeddings import generate_property_embedding
-        
-        logger.info(f"🔮 [ASYNC] Starting embedding generation for property: {property_id}")
-        
-        # Get property
-        property_obj = Property.objects.get(id=property_id)
-        
-        # Generate embedding
-        embedding = generate_property_embedding(property_obj)
-        
-        if embedding:
-            property_obj.embedding = embedding
-            property_obj.save(update_fields=['embedding'])
-            logger.info(f"✅ [ASYNC] Embedding generated successfully for: {property_obj.property_name} (dimension: {len(embedding)})")
-            return {
-                'success': True,
-                'property_id': str(property_id),
-                'property_name': property_obj.property_name,
-                'dimension': len(embedding)
-            }
-        else:
-            logger.warning(f"⚠️ [ASYNC] Failed to generate embedding for: {property_id}")
-            return {
-                'success': False,
-                'property_id': str(property_id),
-                'error': 'Embedding generation returned None'
-            }
-            
-    except Property.DoesNotExist:
-        logger.error(f"❌ [ASYNC] Property not found: {property_id}")
-        return {
-            'success': False,
-            'property_id': str(property_id),
-            'error': 'Property not found'
-        }
-        
-    except Exception as e:
-        logger.error(f"❌ [ASYNC] Error generating embedding for {property_id}: {e}", exc_info=True)
-        
-        # Retry with exponential backoff
-        if self.request.retries < self.max_retries:
-            logger.info(f"🔄 Retrying... (attempt {self.request.retries + 1}/{self.max_retries})")
-            raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
-        
-        return {
-            'success': False,
-            'property_id': str(property_id),
-            'error': str(e)
-        }
-        
-        logger.info(f"Generated embedding for property {property_id}")
-        
-        return {'status': 'success'}
-        
-    except Exception as e:
-        logger.error(f"Error generating embedding: {e}")
-        return {'status': 'failed', 'error': str(e)}
+        stats = backfill_embeddings(kind, ids=ids, force=True)
+    except BackfillError as e:
+        logger.warning(f"⚠️ Embedding batch of {len(ids)} {kind} rows failed: {e}")
+        # Rate limited: retry as soon as the shared limiter has room, not after a blind backoff
+        countdown = e.retry_after if e.retry_after is not None else 10 * (2 ** self.request.retries)
+        raise self.retry(exc=e, countdown=countdown)
+    
+    logger.info(f"🔮 Embedded {stats.rows}/{len(ids)} {kind} rows ({stats.unchanged} unchanged, {stats.tokens} tokens)")
+    return {
+        'kind': kind,
+        'embedded': stats.rows,
+        'unchanged': stats.unchanged,
+        'failed': stats.failed,
+        'tokens': stats.tokens
+    }
+
+
+@shared_task
+def generate_embedding_async(property_id: str):
+    """
+    Generate embedding for a property asynchronously.
+    
+    Kept for messages queued before the embedding queue existed; new code
+    calls `core.llm.embedding_queue.embedding_queue.add('property', id)`.
+    
+    Args:
+        property_id: UUID of the property
+    """
+    from core.llm.embedding_queue import embedding_queue
+    
+    embedding_queue.add('property', property_id)
+    return {'success': True, 'property_id': str(property_id), 'queued': True}
 
 
 @shared_task
@@ -183,32 +157,57 @@ def generate_document_embedding_task(document_id):
         document_id: Document UUID
     """
     
-    from apps.documents.models import Document
-    from langchain_openai import OpenAIEmbeddings
-    from django.conf import settings
+    from core.llm.backfill import backfill_embeddings
     
     try:
-        document = Document.objects.get(id=document_id)
-        
-        # Generate embedding
-        embeddings = OpenAIEmbeddings(
-            model=settings.OPENAI_EMBEDDING_MODEL,
-            openai_api_key=settings.OPENAI_API_KEY
-        )
-        
-        embedding = embeddings.embed_query(document.content)
-        document.embedding = embedding
-        document.save(update_fields=['embedding'])
+        stats = backfill_embeddings('document', ids=[document_id], force=True)
         
         logger.info(f"Generated embedding for document {document_id}")
         
-        return {'status': 'success'}
+        return {'status': 'success' if stats.rows or stats.unchanged else 'failed'}
         
     except Exception as e:
         logger.error(f"Error generating embedding: {e}")
         return {'status': 'failed', 'error': str(e)}
 
 
+@shared_task(bind=True, max_retries=5)
+def backfill_embeddings_task(self, kind: str = 'property', tenant_id: str = None,
+                             force: bool = False, restart: bool = False):
+    """
+    Embed every property or document that needs it (see core.llm.backfill).
+    
+    Progress is published as the task state (PROGRESS) and checkpointed, so a
+    retry after a failed embedding request resumes after the last written row.
+    
+    Args:
+        kind: 'property' or 'document'
+        tenant_id: Only this tenant (default: all)
+        force: Re-embed rows that already have an embedding
+        restart: Ignore an earlier checkpoint
+    """
+    from core.llm.backfill import BackfillError, backfill_embeddings
+    
+    def on_progress(stats):
+        self.update_state(state='PROGRESS', meta=stats.as_dict())
+    
+    try:
+        stats = backfill_embeddings(
+            kind,
+            tenant_id=tenant_id,
+            force=force,
+            restart=restart and not self.request.retries,
+            run_id=self.request.id,
+            on_progress=on_progress,
+        )
+    except BackfillError as e:
+        logger.warning(f"⚠️ {kind} embedding backfill interrupted, resuming from checkpoint: {e}")
+        countdown = e.retry_after if e.retry_after is not None else 30 * (2 ** self.request.retries)
+        raise self.retry(exc=e, countdown=countdown)
+    
+    return stats.as_dict()
+
+
 @shared_task(bind=True, max_retries=3)
 def process_google_sheet_task(
     self, 
@@ -228,10 +227,12 @@ def process_google_sheet_task(
         create_results_sheet: If True, writes to results spreadsheet
         results_sheet_id: Optional ID of pre-created results spreadsheet
     """
+    from django.conf import settings
     from apps.tenants.models import Tenant
     from apps.properties.models import Property
     from core.scraping.scraper import scrape_url
     from core.llm.extraction import extract_property_data
+    from core.llm.embedding_queue import embedding_queue
     from apps.ingestion.google_sheets import process_sheet_batch
     from apps.ingestion.email_notifications import send_batch_completion_email, send_error_notification
     
@@ -246,7 +247,10 @@ def process_google_sheet_task(
                 return False, {'error': 'Failed to scrape URL'}
             
             html_content = scraped_data.get('html', scraped_data.get('text', ''))
-            extracted_data = extract_property_data(html_content, url=url)
+            # Batch ingestion waits for rate limit capacity instead of failing rows
+            extracted_data = extract_property_data(
+                html_content, url=url, max_wait=settings.LLM_RATE_LIMIT_BATCH_MAX_WAIT
+            )
             
             # Set tenant
             extracted_data['tenant'] = Tenant.objects.first()
@@ -265,6 +269,9 @@ def process_google_sheet_task(
             # Create property
             property_obj = Property.objects.create(**extracted_data)
             
+            if property_obj.needs_embedding():
+                embedding_queue.add('property', property_obj.id)
+            
             return True, {'property_id': str(property_obj.id)}
             
         except Exception as e:
@@ -5,6 +5,7 @@ from .views import (
     IngestBatchView, 
     SavePropertyView, 
     GenerateEmbeddingsView,
+    RateLimitStatusView,
     SupportedWebsitesView,
     IngestionStatsView,
     ProcessGoogleSheetView,
@@ -23,6 +24,7 @@ urlpatterns = [
     path('cancel-batch/', CancelBatchView.as_view(), name='cancel-batch'),
     path('save/', SavePropertyView.as_view(), name='save-property'),
     path('generate-embeddings/', GenerateEmbeddingsView.as_view(), name='generate-embeddings'),
+    path('rate-limits/', RateLimitStatusView.as_view(), name='rate-limits'),
     path('google-sheet/', ProcessGoogleSheetView.as_view(), name='process-google-sheet'),
     path('create-sheet-template/', CreateGoogleSheetTemplateView.as_view(), name='create-sheet-template'),
     path('batch-export/sheets/', BatchExportToSheetsView.as_view(), name='batch-export-sheets'),
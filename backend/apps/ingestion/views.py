@@ -8,18 +8,21 @@ import uuid
 import threading
 from decimal import Decimal
 from datetime import datetime, date, timedelta
+from django.conf import settings
 from django.utils import timezone
 from rest_framework import status
+from rest_framework.exceptions import Throttled
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from apps.tenants.models import Tenant
 from apps.users.models import CustomUser
 
 from core.scraping.scraper import scrape_url, ScraperError
 from core.scraping.extractors import get_extractor, EXTRACTORS
 from core.llm.extraction import extract_property_data, ExtractionError
-from core.llm.embeddings import generate_property_embedding
+from core.llm.embedding_queue import embedding_queue
+from core.llm.rate_limit import RateLimitExceeded, rate_limiter
 from core.utils.website_detector import detect_source_website
 from apps.properties.models import Property, PropertyImage
 from apps.properties.serializers import PropertyDetailSerializer
@@ -433,6 +436,10 @@ class IngestURLView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        except RateLimitExceeded as e:
+            logger.warning(f"🚦 {e}")
+            raise Throttled(wait=e.retry_after, detail='The AI provider is at capacity, please retry shortly')
+        
         except ExtractionError as e:
             logger.error(f"❌ Extraction error: {e}", exc_info=True)
             return Response(
@@ -501,6 +508,10 @@ class IngestTextView(APIView):
                 'field_confidence': extracted_data.get('field_confidence', {}),
             }, status=status.HTTP_200_OK)
             
+        except RateLimitExceeded as e:
+            logger.warning(f"🚦 {e}")
+            raise Throttled(wait=e.retry_after, detail='The AI provider is at capacity, please retry shortly')
+        
         except ExtractionError as e:
             logger.error(f"Extraction error: {e}")
             return Response(
@@ -593,9 +604,12 @@ class IngestBatchView(APIView):
             for url in urls:
                 try:
                     scraped_data = scrape_url(url)
+                    # Runs inside the HTTP request, so only the interactive rate limit
+                    # wait applies; large batches should be sent with "async": true
                     extracted_data = extract_property_data(
                         scraped_data.get('html', ''), 
-                        url=url
+                        url=url,
+                        max_wait=settings.LLM_RATE_LIMIT_MAX_WAIT
                     )
                     if request.user.is_authenticated:
                         extracted_data['tenant'] = request.user.tenant
@@ -640,6 +654,8 @@ class IngestBatchView(APIView):
                         'status': 'failed',
                         'error': str(e)
                     }
+                    if isinstance(e, RateLimitExceeded):
+                        result['retry_after'] = e.retry_after
                     results.append(result)
                     
                     # Write error to Google Sheets if service is available
@@ -827,27 +843,10 @@ class SavePropertyView(APIView):
             logger.info(f"  - Name: {property_obj.property_name}")
             logger.info(f"  - Price: ${property_obj.price_usd}")
             
-            # Generate embeddings in background thread (non-blocking)
-            logger.info("🔮 Starting background embedding generation...")
-            import threading
-            
-            def generate_embedding_background():
-                """Generate embedding in background thread."""
-                try:
-                    from core.llm.embeddings import generate_property_embedding
-                    embedding = generate_property_embedding(property_obj)
-                    if embedding:
-                        property_obj.embedding = embedding
-                        property_obj.save(update_fields=['embedding'])
-                        logger.info(f"✅ [BACKGROUND] Embedding generated: {property_obj.property_name}")
-                    else:
-                        logger.warning(f"⚠️ [BACKGROUND] Embedding generation failed: {property_obj.id}")
-                except Exception as e:
-                    logger.error(f"❌ [BACKGROUND] Error generating embedding: {e}", exc_info=True)
-            
-            thread = threading.Thread(target=generate_embedding_background, daemon=True)
-            thread.start()
-            logger.info("✅ Background embedding thread started")
+            # Embed in the background, batched with other saves (non-blocking)
+            if property_obj.needs_embedding():
+                embedding_queue.add('property', property_obj.id)
+                logger.info("🔮 Property queued for embedding")
             
             # Return serialized property immediately without waiting for embedding
             serializer = PropertyDetailSerializer(property_obj)
@@ -869,94 +868,87 @@ class SavePropertyView(APIView):
 
 class GenerateEmbeddingsView(APIView):
     """
-    Admin endpoint to generate embeddings for all properties without embeddings.
+    Admin endpoint to backfill embeddings for properties (or documents)
+    without embeddings. The backfill runs as a Celery task (batched,
+    concurrent and resumable, see core/llm/backfill.py).
     
     POST /ingest/generate-embeddings
     {
-        "force": false  // Optional: regenerate even if embeddings exist
+        "force": false,         // Optional: also re-check embedded rows (only changed text is re-embedded)
+        "kind": "property",     // Optional: "property" or "document"
+        "tenant_id": "..."      // Optional: only this tenant
     }
+    
+    GET /ingest/generate-embeddings?kind=property&force=false&tenant_id=...
+        Coverage and the progress of the last backfill
     """
     
     authentication_classes = []
     permission_classes = [AllowAny]  # TODO: Add admin-only permission in production
     
+    def _coverage(self, kind):
+        from apps.documents.models import Document
+        
+        # Chunked documents are embedded through their passages
+        queryset = Property.objects.all() if kind == 'property' else Document.objects.filter(passage_count=0)
+        total = queryset.count()
+        with_embeddings = queryset.filter(embedding__isnull=False).count()
+        coverage = (with_embeddings / total * 100) if total > 0 else 0
+        return {
+            'total': total,
+            'with_embeddings': with_embeddings,
+            'coverage_percent': round(coverage, 1),
+        }
+    
+    def get(self, request):
+        """Embedding coverage and backfill progress."""
+        from core.llm.backfill import get_checkpoint
+        
+        kind = request.query_params.get('kind', 'property')
+        force = request.query_params.get('force', 'false').lower() == 'true'
+        tenant_id = request.query_params.get('tenant_id')
+        
+        return Response({
+            'kind': kind,
+            **self._coverage(kind),
+            'backfill': get_checkpoint(kind, tenant_id, force),
+        }, status=status.HTTP_200_OK)
+    
     def post(self, request):
-        """Generate embeddings for properties."""
+        """Queue an embedding backfill."""
         
         logger.info("=== GenerateEmbeddingsView POST request received ===")
         
-        force = request.data.get('force', False)
+        force = bool(request.data.get('force', False))
+        kind = request.data.get('kind', 'property')
+        tenant_id = request.data.get('tenant_id')
+        
+        if kind not in ('property', 'document'):
+            return Response(
+                {'error': 'kind must be "property" or "document"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         try:
-            from apps.properties.models import Property
+            from apps.ingestion.tasks import backfill_embeddings_task
             
-            # Get properties that need embeddings
-            if force:
-                properties = Property.objects.all()
-                message = f'Force mode: Processing ALL {properties.count()} properties'
-            else:
-                properties = Property.objects.filter(embedding__isnull=True)
-                message = f'Found {properties.count()} properties without embeddings'
-            
-            logger.info(message)
-            
-            if not properties.exists():
+            coverage = self._coverage(kind)
+            if not force and coverage['with_embeddings'] == coverage['total']:
                 return Response({
                     'status': 'success',
-                    'message': 'All properties already have embeddings!',
-                    'total_properties': Property.objects.count(),
-                    'with_embeddings': Property.objects.filter(embedding__isnull=False).count(),
-                    'processed': 0,
-                    'errors': 0
+                    'message': f'All {kind} rows already have embeddings!',
+                    **coverage,
                 }, status=status.HTTP_200_OK)
             
-            success_count = 0
-            error_count = 0
-            errors = []
-            
-            for property_obj in properties:
-                try:
-                    logger.info(f"Generating embedding for: {property_obj.property_name}")
-                    
-                    embedding = generate_property_embedding(property_obj)
-                    
-                    if embedding:
-                        property_obj.embedding = embedding
-                        property_obj.save(update_fields=['embedding'])
-                        success_count += 1
-                        logger.info(f"✓ Embedding generated for: {property_obj.property_name}")
-                    else:
-                        error_count += 1
-                        error_msg = f"Failed to generate embedding for property: {property_obj.id}"
-                        errors.append(error_msg)
-                        logger.warning(error_msg)
-                        
-                except Exception as e:
-                    error_count += 1
-                    error_msg = f"Error processing property {property_obj.id}: {str(e)}"
-                    errors.append(error_msg)
-                    logger.error(error_msg, exc_info=True)
-            
-            # Get final statistics
-            total_properties = Property.objects.count()
-            with_embeddings = Property.objects.filter(embedding__isnull=False).count()
-            coverage = (with_embeddings / total_properties * 100) if total_properties > 0 else 0
-            
-            logger.info(f"✅ Embedding generation complete!")
-            logger.info(f"   Success: {success_count}, Errors: {error_count}")
-            logger.info(f"   Coverage: {with_embeddings}/{total_properties} ({coverage:.1f}%)")
+            task = backfill_embeddings_task.delay(kind=kind, tenant_id=tenant_id, force=force)
+            logger.info(f"🔮 Queued {kind} embedding backfill (force={force}): {task.id}")
             
             return Response({
-                'status': 'success',
-                'message': 'Embedding generation complete',
-                'total_properties': total_properties,
-                'with_embeddings': with_embeddings,
-                'coverage_percent': round(coverage, 1),
-                'processed': success_count + error_count,
-                'success': success_count,
-                'errors': error_count,
-                'error_details': errors[:10] if errors else []  # Return first 10 errors
-            }, status=status.HTTP_200_OK)
+                'status': 'queued',
+                'message': f'Embedding backfill queued for {kind} rows',
+                'task_id': task.id,
+                **coverage,
+            }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
             logger.error(f"❌ Error in GenerateEmbeddingsView: {e}", exc_info=True)
@@ -966,6 +958,34 @@ class GenerateEmbeddingsView(APIView):
             )
 
 
+class RateLimitStatusView(APIView):
+    """
+    Headroom of the cluster-wide LLM rate limits (see core/llm/rate_limit.py).
+    
+    GET /ingest/rate-limits/
+    Returns: {
+        "enabled": true,
+        "models": {
+            "text-embedding-3-small": {
+                "rpm": 5000, "tpm": 1000000,
+                "requests_available": 4871.0, "tokens_available": 412000,
+                "requests_headroom": 0.974, "tokens_headroom": 0.412
+            },
+            ...
+        }
+    }
+    """
+    
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Current headroom per rate-limited model."""
+        return Response({
+            'enabled': settings.LLM_RATE_LIMIT_ENABLED,
+            'models': rate_limiter.headroom(),
+        }, status=status.HTTP_200_OK)
+
+
 class ProcessGoogleSheetView(APIView):
     """
     Endpoint to process properties from a Google Sheet.
@@ -1060,7 +1080,9 @@ class ProcessGoogleSheetView(APIView):
                     )
                 
                 html_content = scraped_data.get('html', scraped_data.get('text', ''))
-                extracted_data = extract_property_data(html_content, url=url)
+                extracted_data = extract_property_data(
+                    html_content, url=url, max_wait=settings.LLM_RATE_LIMIT_BATCH_MAX_WAIT
+                )
                 
                 # Set tenant
                 if request.user.is_authenticated:
@@ -1117,6 +1139,10 @@ class ProcessGoogleSheetView(APIView):
                     # Create new property
                     property_obj = Property.objects.create(**extracted_data)
                 
+                # Re-embed only when the card (or embedding model) changed
+                if property_obj.needs_embedding():
+                    embedding_queue.add('property', property_obj.id)
+                
                 # Send progress update: Complete for this property
                 if channel_layer:
                     async_to_sync(channel_layer.group_send)(
@@ -15,7 +15,9 @@ class PropertyAdmin(admin.ModelAdmin):
     list_filter = ('status', 'property_type', 'source_website', 'is_active', 'tenant', 'created_at')
     search_fields = ('property_name', 'location', 'description')
     readonly_fields = ('id', 'extraction_confidence', 'extracted_at', 
-                      'last_verified', 'created_at', 'updated_at')
+                      'last_verified', 'content_for_search', 'card_version',
+                      'times_retrieved', 'avg_relevance_score',
+                      'created_at', 'updated_at')
     
     fieldsets = (
         ('Basic Information', {
@@ -42,7 +44,7 @@ class PropertyAdmin(admin.ModelAdmin):
                       'extracted_at', 'last_verified', 'verified_by')
         }),
         ('Search & RAG', {
-            'fields': ('content_for_search',),
+            'fields': ('content_for_search', 'card_version', 'times_retrieved', 'avg_relevance_score'),
             'classes': ('collapse',)
         }),
         ('Status', {
@@ -54,6 +56,13 @@ class PropertyAdmin(admin.ModelAdmin):
     
     actions = ['mark_as_verified', 'mark_as_available', 'mark_as_sold']
     
+    @staticmethod
+    def _bump_inventory_versions(queryset):
+        """Queryset updates bypass save(), so invalidate cached retrievals here."""
+        from core.llm.retrieval_cache import bump_inventory_version
+        for tenant_id in queryset.order_by().values_list('tenant_id', flat=True).distinct():
+            bump_inventory_version(tenant_id)
+    
     def mark_as_verified(self, request, queryset):
         from django.utils import timezone
         queryset.update(last_verified=timezone.now(), verified_by=request.user)
@@ -62,11 +71,13 @@ class PropertyAdmin(admin.ModelAdmin):
     
     def mark_as_available(self, request, queryset):
         queryset.update(status='available')
+        self._bump_inventory_versions(queryset)
         self.message_user(request, f"{queryset.count()} properties marked as available.")
     mark_as_available.short_description = "Mark as available"
     
     def mark_as_sold(self, request, queryset):
         queryset.update(status='sold')
+        self._bump_inventory_versions(queryset)
         self.message_user(request, f"{queryset.count()} properties marked as sold.")
     mark_as_sold.short_description = "Mark as sold"
 
@@ -0,0 +1,50 @@
+"""
+Management command to (re)build the in-process vector indexes used by RAG.
+Run after bulk imports or `.update()` calls that bypass model saves; this also
+invalidates the tenants' cached retrievals.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.tenants.models import Tenant
+from apps.users.models import UserRole
+from core.llm.retrieval_cache import bump_inventory_version
+from core.llm.vector_index import build_index
+
+
+class Command(BaseCommand):
+    help = 'Build the memory-mapped vector index for each tenant and user role'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            type=str,
+            help='Filter by tenant slug',
+        )
+        parser.add_argument(
+            '--role',
+            type=str,
+            choices=[role for role, _ in UserRole.CHOICES],
+            help='Build only this user role',
+        )
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.all()
+        if options.get('tenant'):
+            tenants = tenants.filter(slug=options['tenant'])
+
+        roles = [options['role']] if options.get('role') else [role for role, _ in UserRole.CHOICES]
+
+        self.stdout.write(self.style.SUCCESS('Building vector indexes...'))
+
+        for tenant in tenants:
+            bump_inventory_version(tenant.id)
+            for role in roles:
+                start = time.time()
+                count = build_index(str(tenant.id), role)
+                elapsed_ms = int((time.time() - start) * 1000)
+                self.stdout.write(f'  ✓ {tenant.slug}/{role}: {count} vectors ({elapsed_ms}ms)')
+
+        self.stdout.write(self.style.SUCCESS('\n✅ Vector index build complete!'))
@@ -70,8 +70,10 @@ class Command(BaseCommand):
             
             if existing_doc:
                 # Update existing document
-                existing_doc.content = property_obj.content_for_search
+                existing_doc.content = property_obj.get_card()
                 existing_doc.embedding = property_obj.embedding
+                existing_doc.embedding_hash = property_obj.embedding_hash
+                existing_doc.embedding_model = property_obj.embedding_model
                 existing_doc.metadata = metadata
                 existing_doc.user_roles = property_obj.user_roles
                 existing_doc.updated_at = timezone.now()
@@ -81,12 +83,14 @@ class Command(BaseCommand):
                 # Create new document
                 Document.objects.create(
                     tenant=property_obj.tenant,
-                    content=property_obj.content_for_search,
+                    content=property_obj.get_card(),
                     content_type='property',
                     source_url=property_obj.source_url or '',
                     source_reference=f"Property: {property_obj.property_name}",
                     metadata=metadata,
                     embedding=property_obj.embedding,
+                    embedding_hash=property_obj.embedding_hash,
+                    embedding_model=property_obj.embedding_model,
                     user_roles=property_obj.user_roles,
                     is_active=True,
                     freshness_date=property_obj.updated_at,
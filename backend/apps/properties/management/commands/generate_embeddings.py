@@ -1,13 +1,22 @@
 #!/usr/bin/env python
 """
 Management command to generate embeddings for all properties and documents.
+
+Runs the batch backfill engine (core/llm/backfill.py): rows are embedded in
+token-sized batches with several requests in flight and written back with
+bulk_update. Progress is checkpointed in the default cache, so re-running
+after a crash or Ctrl-C resumes where the last run stopped (use --restart to
+start over). Checkpoints need Redis (REDIS_URL): without it the default cache
+is a DummyCache and every run starts from the first row.
+
+Without --force only rows with no embedding, or one from another embedding
+model/dimension, are embedded; --force also re-checks the rest and re-embeds
+those whose text no longer matches the stored fingerprint.
 """
 
-from django.core.management.base import BaseCommand
-from django.conf import settings
-from apps.properties.models import Property
-from apps.documents.models import Document
-from langchain_openai import OpenAIEmbeddings
+from django.core.management.base import BaseCommand, CommandError
+from apps.tenants.models import Tenant
+from core.llm.backfill import BackfillError, EmbeddingBackfill, checkpoints_persist
 from tqdm import tqdm
 import logging
 
@@ -15,102 +24,112 @@ logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
-    help = 'Generate embeddings for properties and documents'
+    help = (
+        'Generate embeddings for properties and documents. Resumes from the last checkpoint, '
+        'which is kept in the default cache (requires Redis; without REDIS_URL runs start over)'
+    )
+
+    # Kinds this command embeds when neither --properties nor --documents is given
+    kinds = ('property', 'document')
 
     def add_arguments(self, parser):
+        if len(self.kinds) > 1:
+            parser.add_argument(
+                '--properties',
+                action='store_true',
+                help='Generate embeddings for properties only',
+            )
+            parser.add_argument(
+                '--documents',
+                action='store_true',
+                help='Generate embeddings for documents only',
+            )
         parser.add_argument(
-            '--properties',
+            '--tenant',
+            type=str,
+            help='Filter by tenant slug',
+        )
+        parser.add_argument(
+            '--force',
             action='store_true',
-            help='Generate embeddings for properties only',
+            help='Re-check rows that already have an embedding and re-embed those whose text changed',
         )
         parser.add_argument(
-            '--documents',
+            '--restart',
             action='store_true',
-            help='Generate embeddings for documents only',
+            help='Ignore the checkpoint of an interrupted run and start from the first row '
+                 '(checkpoints are only kept when the default cache is Redis)',
         )
         parser.add_argument(
-            '--tenant',
-            type=str,
-            help='Filter by tenant slug',
+            '--concurrency',
+            type=int,
+            help='Embedding requests in flight (default: EMBEDDING_BACKFILL_CONCURRENCY)',
         )
-
-    def handle(self, *args, **options):
-        
-        # Initialize embeddings
-        embeddings = OpenAIEmbeddings(
-            model=settings.OPENAI_EMBEDDING_MODEL,
-            openai_api_key=settings.OPENAI_API_KEY
+        parser.add_argument(
+            '--batch-tokens',
+            type=int,
+            help='Max tokens per embedding request (default: EMBEDDING_BATCH_MAX_TOKENS)',
         )
-        
-        # Determine what to process
+
+    def _selected_kinds(self, options):
+        if len(self.kinds) == 1:
+            return self.kinds
         do_properties = options.get('properties') or not options.get('documents')
         do_documents = options.get('documents') or not options.get('properties')
+        return tuple(kind for kind, selected in (('property', do_properties), ('document', do_documents)) if selected)
+
+    def _backfill(self, kind, tenant_id, options):
+        backfill = EmbeddingBackfill(
+            kind,
+            tenant_id=tenant_id,
+            force=options.get('force', False),
+            restart=options.get('restart', False),
+            batch_tokens=options.get('batch_tokens'),
+            concurrency=options.get('concurrency'),
+        )
+
+        with tqdm(desc=f"{kind.title()} rows", unit='row') as progress:
+            def on_progress(stats):
+                progress.update(stats.rows - progress.n)
+                progress.set_postfix(tokens_s=f'{stats.tokens_per_second:.0f}', failed=stats.failed)
+
+            try:
+                stats = backfill.run(on_progress=on_progress)
+            except BackfillError as e:
+                if checkpoints_persist():
+                    raise CommandError(f'{e} - run the command again to resume from the last checkpoint')
+                raise CommandError(f'{e} - checkpoints are not persisted without Redis; the next run starts over')
+
+        if stats.resumed_from:
+            self.stdout.write(f'   🔄 Resumed after {stats.resumed_from}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Embedded {stats.rows} {kind} rows ({stats.tokens} tokens) in {stats.elapsed_seconds:.1f}s: '
+            f'{stats.rows_per_second:.1f} rows/s, {stats.tokens_per_second:.0f} tokens/s'
+        ))
+        if stats.failed:
+            self.stdout.write(self.style.WARNING(f'   ❌ Failed: {stats.failed}'))
+        if stats.unchanged:
+            self.stdout.write(f'   ✓ Unchanged: {stats.unchanged}')
+        if stats.skipped:
+            self.stdout.write(self.style.WARNING(f'   ⚠️  Skipped (no content): {stats.skipped}'))
+
+    def handle(self, *args, **options):
+        tenant_id = None
         tenant_slug = options.get('tenant')
-        
-        # Process properties
-        if do_properties:
-            self.stdout.write(self.style.SUCCESS('Generating property embeddings...'))
-            
-            properties = Property.objects.filter(embedding__isnull=True)
-            
-            if tenant_slug:
-                properties = properties.filter(tenant__slug=tenant_slug)
-            
-            total = properties.count()
-            
-            if total == 0:
-                self.stdout.write(self.style.WARNING('No properties need embeddings'))
-            else:
-                for prop in tqdm(properties, desc="Properties", total=total):
-                    try:
-                        # Generate search content
-                        if not prop.content_for_search:
-                            prop.content_for_search = prop.generate_search_content()
-                        
-                        # Generate embedding
-                        embedding = embeddings.embed_query(prop.content_for_search)
-                        prop.embedding = embedding
-                        prop.save(update_fields=['embedding', 'content_for_search'])
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing property {prop.id}: {e}")
-                        self.stdout.write(
-                            self.style.ERROR(f"Failed: {prop.property_name} - {e}")
-                        )
-                
-                self.stdout.write(
-                    self.style.SUCCESS(f'✓ Generated embeddings for {total} properties')
-                )
-        
-        # Process documents
-        if do_documents:
-            self.stdout.write(self.style.SUCCESS('Generating document embeddings...'))
-            
-            documents = Document.objects.filter(embedding__isnull=True)
-            
-            if tenant_slug:
-                documents = documents.filter(tenant__slug=tenant_slug)
-            
-            total = documents.count()
-            
-            if total == 0:
-                self.stdout.write(self.style.WARNING('No documents need embeddings'))
-            else:
-                for doc in tqdm(documents, desc="Documents", total=total):
-                    try:
-                        # Generate embedding
-                        embedding = embeddings.embed_query(doc.content)
-                        doc.embedding = embedding
-                        doc.save(update_fields=['embedding'])
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing document {doc.id}: {e}")
-                        self.stdout.write(
-                            self.style.ERROR(f"Failed: {doc.get_content_type_display()} - {e}")
-                        )
-                
-                self.stdout.write(
-                    self.style.SUCCESS(f'✓ Generated embeddings for {total} documents')
-                )
-        
+        if tenant_slug:
+            tenant = Tenant.objects.filter(slug=tenant_slug).first()
+            if tenant is None:
+                raise CommandError(f'Tenant not found: {tenant_slug}')
+            tenant_id = str(tenant.id)
+
+        if not checkpoints_persist():
+            self.stdout.write(self.style.WARNING(
+                '⚠️  The default cache is not Redis: progress is not checkpointed and an '
+                'interrupted run starts over. Set REDIS_URL to make runs resumable.'
+            ))
+
+        for kind in self._selected_kinds(options):
+            self.stdout.write(self.style.SUCCESS(f'Generating {kind} embeddings...'))
+            self._backfill(kind, tenant_id, options)
+
         self.stdout.write(self.style.SUCCESS('\n✅ Embedding generation complete!'))
@@ -0,0 +1,55 @@
+# Generated manually on 2026-10-18
+# Native pgvector storage for Property.embedding with a partial HNSW index.
+# PostgreSQL only: SQLite keeps the JSON shim and uses the in-process vector index.
+
+from django.conf import settings
+from django.db import migrations
+
+
+def create_vector_index(apps, schema_editor):
+    """Ensure embedding is vector(EMBEDDING_DIMENSIONS) and build the HNSW index."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    dimensions = int(settings.EMBEDDING_DIMENSIONS)
+    
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT udt_name FROM information_schema.columns "
+            "WHERE table_name = 'properties' AND column_name = 'embedding'"
+        )
+        row = cursor.fetchone()
+        if row and row[0] != 'vector':
+            # Column was created by the JSON shim; JSON arrays are valid vector literals
+            cursor.execute(
+                f"ALTER TABLE properties ALTER COLUMN embedding TYPE vector({dimensions}) "
+                f"USING embedding::text::vector({dimensions})"
+            )
+        
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS properties_embedding_hnsw "
+            "ON properties USING hnsw (embedding vector_cosine_ops) "
+            "WITH (m = 16, ef_construction = 64) "
+            "WHERE is_active AND embedding IS NOT NULL"
+        )
+
+
+def drop_vector_index(apps, schema_editor):
+    """Drop the HNSW index (the column type is left as is)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS properties_embedding_hnsw")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("properties", "0008_allow_null_all_fields"),
+        ("documents", "0001_enable_pgvector"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_vector_index, drop_vector_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated manually on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("properties", "0009_embedding_hnsw_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="property",
+            name="times_retrieved",
+            field=models.IntegerField(
+                default=0,
+                help_text="How many times this property was retrieved in RAG",
+                verbose_name="Times Retrieved",
+            ),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="avg_relevance_score",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=3,
+                help_text="Average relevance score when retrieved",
+                max_digits=4,
+                null=True,
+                verbose_name="Average Relevance Score",
+            ),
+        ),
+    ]
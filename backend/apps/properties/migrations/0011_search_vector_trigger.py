@@ -0,0 +1,69 @@
+# Generated manually on 2026-10-18
+# Keep properties.search_vector as a weighted Spanish + English tsvector
+# (unaccented) maintained by a trigger, so saves, bulk_update() and
+# queryset.update() all keep it current. PostgreSQL only.
+
+from django.db import migrations
+
+
+FORWARD_SQL = """
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS $$
+    SELECT public.unaccent('public.unaccent', $1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+CREATE OR REPLACE FUNCTION properties_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('spanish', immutable_unaccent(coalesce(NEW.property_name, ''))), 'A') ||
+        setweight(to_tsvector('english', immutable_unaccent(coalesce(NEW.property_name, ''))), 'A') ||
+        setweight(to_tsvector('spanish', immutable_unaccent(coalesce(NEW.location, ''))), 'B') ||
+        setweight(to_tsvector('english', immutable_unaccent(coalesce(NEW.location, ''))), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.property_type, '')), 'B') ||
+        setweight(to_tsvector('spanish', immutable_unaccent(coalesce(NEW.description, ''))), 'C') ||
+        setweight(to_tsvector('english', immutable_unaccent(coalesce(NEW.description, ''))), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS properties_search_vector_trigger ON properties;
+CREATE TRIGGER properties_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF property_name, location, property_type, description, search_vector
+    ON properties
+    FOR EACH ROW EXECUTE FUNCTION properties_search_vector_update();
+
+-- Backfill existing rows through the trigger
+UPDATE properties SET search_vector = NULL;
+
+CREATE INDEX IF NOT EXISTS properties_search_vector_gin ON properties USING gin (search_vector);
+"""
+
+REVERSE_SQL = """
+DROP INDEX IF EXISTS properties_search_vector_gin;
+DROP TRIGGER IF EXISTS properties_search_vector_trigger ON properties;
+DROP FUNCTION IF EXISTS properties_search_vector_update();
+"""
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(FORWARD_SQL)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("properties", "0010_property_retrieval_stats"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,22 @@
+# Generated manually on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("properties", "0011_search_vector_trigger"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="property",
+            name="card_version",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                help_text="Rendering version of content_for_search (0 = never rendered)",
+                verbose_name="Card Version",
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated manually on 2026-10-18
+# Fingerprint (SHA-256 of the embedded text) and model tag of each stored
+# embedding, so unchanged rows are not re-embedded. Existing embeddings are
+# stamped as produced by the configured model from the stored card.
+
+import hashlib
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def stamp_embeddings(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    model_tag = f"{settings.OPENAI_EMBEDDING_MODEL}:{settings.EMBEDDING_DIMENSIONS}"
+
+    batch = []
+    rows = Property.objects.filter(embedding__isnull=False).only('id', 'content_for_search')
+    for prop in rows.iterator(chunk_size=2000):
+        prop.embedding_hash = hashlib.sha256((prop.content_for_search or '').encode('utf-8')).hexdigest()
+        prop.embedding_model = model_tag
+        batch.append(prop)
+        if len(batch) >= 2000:
+            Property.objects.bulk_update(batch, ['embedding_hash', 'embedding_model'])
+            batch = []
+    if batch:
+        Property.objects.bulk_update(batch, ['embedding_hash', 'embedding_model'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("properties", "0012_property_card_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="property",
+            name="embedding_hash",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="SHA-256 of the text the embedding was generated from",
+                max_length=64,
+                verbose_name="Embedding Hash",
+            ),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="embedding_model",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text='Embedding model and dimension ("model:dimensions") of the stored vector',
+                max_length=100,
+                verbose_name="Embedding Model",
+            ),
+        ),
+        migrations.RunPython(stamp_embeddings, migrations.RunPython.noop),
+    ]
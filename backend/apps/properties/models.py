@@ -3,19 +3,27 @@ Property model for real estate listings.
 """
 
 import uuid
+from django.conf import settings
 from decimal import Decimal
 from django.db import models
 # from django.contrib.postgres.fields import ArrayField # SQLite compat
 ArrayField = lambda field, **kwargs: models.JSONField(**kwargs)
-# from django.contrib.postgres.search import SearchVectorField
-def SearchVectorField(**kwargs):
-    return models.TextField(**kwargs)
+if 'postgresql' in settings.DATABASES['default']['ENGINE']:
+    # Maintained by a database trigger (migration 0011)
+    from django.contrib.postgres.search import SearchVectorField
+else:
+    # SQLite compat
+    def SearchVectorField(**kwargs):
+        return models.TextField(**kwargs)
 
 from django.utils.translation import gettext_lazy as _
 
-# from pgvector.django import VectorField # SQLite compat
-def VectorField(dimensions=None, **kwargs):
-    return models.JSONField(**kwargs)
+if settings.PGVECTOR_ENABLED:
+    from pgvector.django import VectorField
+else:
+    # SQLite compat
+    def VectorField(dimensions=None, **kwargs):
+        return models.JSONField(**kwargs)
 
 from apps.tenants.models import Tenant
 
@@ -358,20 +366,58 @@ class Property(models.Model):
         help_text=_('Is this property listing active?')
     )
     
+    # Retrieval tracking (updated in batches by core.llm.retrieval_stats)
+    times_retrieved = models.IntegerField(
+        _('Times Retrieved'),
+        default=0,
+        help_text=_('How many times this property was retrieved in RAG')
+    )
+    
+    avg_relevance_score = models.DecimalField(
+        _('Average Relevance Score'),
+        max_digits=4,
+        decimal_places=3,
+        null=True,
+        blank=True,
+        help_text=_('Average relevance score when retrieved')
+    )
+    
     # For RAG - Vector search
     embedding = VectorField(
-        dimensions=1536,
+        dimensions=settings.EMBEDDING_DIMENSIONS,
         null=True,
         blank=True,
         help_text=_('Vector embedding for semantic search')
     )
     
+    embedding_hash = models.CharField(
+        _('Embedding Hash'),
+        max_length=64,
+        blank=True,
+        default='',
+        help_text=_('SHA-256 of the text the embedding was generated from')
+    )
+    
+    embedding_model = models.CharField(
+        _('Embedding Model'),
+        max_length=100,
+        blank=True,
+        default='',
+        help_text=_('Embedding model and dimension ("model:dimensions") of the stored vector')
+    )
+    
     content_for_search = models.TextField(
         _('Search Content'),
         blank=True,
         help_text=_('Optimized text for semantic search')
     )
     
+    card_version = models.PositiveSmallIntegerField(
+        _('Card Version'),
+        default=0,
+        help_text=_('Rendering version of content_for_search (0 = never rendered)')
+    )
+    
     search_vector = SearchVectorField(
         null=True,
         blank=True,
@@ -422,8 +468,17 @@ class Property(models.Model):
         """Check if property has GPS coordinates."""
         return self.latitude is not None and self.longitude is not None
     
+    # Property card: the one text rendering of a listing, stored in
+    # content_for_search and shared by retrieval, embeddings and the list API.
+    # Bump CARD_VERSION whenever the format below changes.
+    CARD_VERSION = 1
+    CARD_SOURCE_FIELDS = (
+        'property_name', 'property_type', 'location', 'price_usd', 'bedrooms',
+        'bathrooms', 'square_meters', 'lot_size_m2', 'amenities', 'description',
+    )
+    
     def generate_search_content(self):
-        """Generate optimized content for semantic search."""
+        """Render the property card used for retrieval and embeddings."""
         parts = []
         
         if self.property_name:
@@ -436,16 +491,19 @@ class Property(models.Model):
             parts.append(f"Location: {self.location}")
         
         if self.price_usd:
-            parts.append(f"Price: ${self.price_usd:,.0f} USD")
+            parts.append(f"Price: ${self.price_usd:,.2f} USD")
         
         if self.bedrooms:
-            parts.append(f"{self.bedrooms} bedrooms")
+            parts.append(f"Bedrooms: {self.bedrooms}")
         
         if self.bathrooms:
-            parts.append(f"{self.bathrooms} bathrooms")
+            parts.append(f"Bathrooms: {self.bathrooms}")
         
         if self.square_meters:
-            parts.append(f"{self.square_meters} m²")
+            parts.append(f"Area: {self.square_meters} m²")
+        
+        if self.lot_size_m2:
+            parts.append(f"Lot size: {self.lot_size_m2} m²")
         
         if self.amenities:
             parts.append(f"Amenities: {', '.join(self.amenities)}")
@@ -455,12 +513,68 @@ class Property(models.Model):
         
         return "\n".join(parts) if parts else "Property listing"
     
+    def get_card(self):
+        """
+        Get the stored property card, re-rendering it only if it is stale.
+        
+        Cards from an older CARD_VERSION are rendered once and written back
+        with a plain UPDATE (no save() side effects).
+        """
+        if self.card_version != self.CARD_VERSION or not self.content_for_search:
+            self.content_for_search = self.generate_search_content()
+            self.card_version = self.CARD_VERSION
+            if self.pk:
+                Property.objects.filter(pk=self.pk).update(
+                    content_for_search=self.content_for_search,
+                    card_version=self.card_version
+                )
+        return self.content_for_search
+    
+    def needs_embedding(self):
+        """Whether the embedding is missing or was generated from another card, model or dimension."""
+        from core.llm.embeddings import embedding_is_current
+        return not embedding_is_current(self, self.get_card())
+    
     def save(self, *args, **kwargs):
-        """Override save to generate search content."""
-        if not self.content_for_search:
+        """Override save to refresh the property card, sync the vector index and drop cached answers and retrievals."""
+        update_fields = kwargs.get('update_fields')
+        
+        if (update_fields is None
+                or self.card_version != self.CARD_VERSION
+                or set(self.CARD_SOURCE_FIELDS) & set(update_fields)):
             self.content_for_search = self.generate_search_content()
+            self.card_version = self.CARD_VERSION
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = list(
+                    set(update_fields) | {'content_for_search', 'card_version'}
+                )
         
         super().save(*args, **kwargs)
+        
+        if update_fields is None or {'embedding', 'user_roles', 'is_active'} & set(update_fields):
+            from core.llm.vector_index import sync_object
+            sync_object(self, 'property')
+        
+        from core.llm.semantic_cache import invalidate_sources
+        invalidate_sources('property', self.id, update_fields)
+        
+        from core.llm.retrieval_cache import bump_inventory_version
+        bump_inventory_version(self.tenant_id, update_fields)
+    
+    def delete(self, *args, **kwargs):
+        """Override delete to drop the property from the vector index, answer and retrieval caches."""
+        from core.llm.vector_index import remove_object
+        remove_object(self, 'property')
+        
+        from core.llm.semantic_cache import invalidate_sources
+        invalidate_sources('property', self.id)
+        
+        result = super().delete(*args, **kwargs)
+        
+        from core.llm.retrieval_cache import bump_inventory_version
+        bump_inventory_version(self.tenant_id)
+        
+        return result
 
 
 class PropertyImage(models.Model):
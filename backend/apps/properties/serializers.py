@@ -23,6 +23,7 @@ class PropertyListSerializer(serializers.ModelSerializer):
     source_website_display = serializers.CharField(source='get_source_website_display', read_only=True)
     primary_image = serializers.SerializerMethodField()
     has_embedding = serializers.SerializerMethodField()
+    card = serializers.CharField(source='get_card', read_only=True)
     
     class Meta:
         model = Property
@@ -32,7 +33,7 @@ class PropertyListSerializer(serializers.ModelSerializer):
             'location', 'latitude', 'longitude', 'status', 'status_display', 
             'source_website', 'source_website_display', 'source_url', 
             'listing_id', 'listing_status', 'primary_image', 'description',
-            'has_embedding', 'created_at'
+            'has_embedding', 'card', 'created_at'
         ]
     
     def get_primary_image(self, obj):
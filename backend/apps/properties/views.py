@@ -9,6 +9,7 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 
+from core.utils.full_text import FullTextSearchFilter
 from .models import Property
 from .serializers import (
     PropertyListSerializer,
@@ -25,8 +26,9 @@ class PropertyViewSet(viewsets.ModelViewSet):
     """
     
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'property_type', 'location', 'source_website']
+    # Used only as the non-PostgreSQL fallback; PostgreSQL searches search_vector
     search_fields = ['property_name', 'description', 'location']
     ordering_fields = ['created_at', 'price_usd', 'property_name', 'source_website']
     ordering = ['-created_at']
@@ -15,6 +15,10 @@ django_asgi_app = get_asgi_application()
 
 # Import WebSocket routing after Django is initialized
 from apps.ingestion.routing import websocket_urlpatterns
+from core.llm.clients import warm_clients
+
+# Build shared LLM clients before the first request
+warm_clients()
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
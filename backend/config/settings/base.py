@@ -123,6 +123,9 @@ if 'postgresql' in DATABASES['default']['ENGINE']:
         'options': '-c search_path=public',
     }
 
+# pgvector columns and HNSW indexes are only available on PostgreSQL
+PGVECTOR_ENABLED = env.bool('PGVECTOR_ENABLED', default='postgresql' in DATABASES['default']['ENGINE'])
+
 # Custom user model
 AUTH_USER_MODEL = 'users.CustomUser'
 
@@ -264,14 +267,86 @@ ANTHROPIC_API_KEY = env('ANTHROPIC_API_KEY', default='')
 ANTHROPIC_MODEL = env('ANTHROPIC_MODEL', default='claude-3-5-sonnet-20240620')
 ANTHROPIC_MAX_TOKENS = env.int('ANTHROPIC_MAX_TOKENS', default=4000)
 
+# Shared LLM clients (see core/llm/clients.py)
+LLM_HTTP_MAX_CONNECTIONS = env.int('LLM_HTTP_MAX_CONNECTIONS', default=20)
+LLM_HTTP_MAX_KEEPALIVE = env.int('LLM_HTTP_MAX_KEEPALIVE', default=10)
+LLM_HTTP_KEEPALIVE_SECONDS = env.float('LLM_HTTP_KEEPALIVE_SECONDS', default=60.0)
+LLM_REQUEST_TIMEOUT = env.float('LLM_REQUEST_TIMEOUT', default=60.0)
+LLM_MAX_RETRIES = env.int('LLM_MAX_RETRIES', default=2)
+LLM_WARMUP_ENABLED = env.bool('LLM_WARMUP_ENABLED', default=True)  # Build clients and connect at worker start
+LLM_CLIENT_OPTIONS = env.json('LLM_CLIENT_OPTIONS', default={})  # Per-model overrides: {"gpt-4o": {"temperature": 0.1}}
+
+# Cluster-wide provider rate limits (see core/llm/rate_limit.py); set to your organization's limits
+LLM_RATE_LIMIT_ENABLED = env.bool('LLM_RATE_LIMIT_ENABLED', default=True)
+LLM_RATE_LIMITS = env.json('LLM_RATE_LIMITS', default={  # {model: {"rpm": ..., "tpm": ...}}; unlisted models are not limited
+    'gpt-4o-mini': {'rpm': 5000, 'tpm': 2000000},
+    'gpt-4o': {'rpm': 5000, 'tpm': 450000},
+    'text-embedding-3-small': {'rpm': 5000, 'tpm': 1000000},
+    'text-embedding-3-large': {'rpm': 5000, 'tpm': 1000000},
+})
+LLM_RATE_LIMIT_MAX_WAIT = env.float('LLM_RATE_LIMIT_MAX_WAIT', default=2.0)  # Seconds chat/extraction wait for capacity before shedding
+LLM_RATE_LIMIT_BATCH_MAX_WAIT = env.float('LLM_RATE_LIMIT_BATCH_MAX_WAIT', default=60.0)  # ...and backfills/batch ingestion
+
 # RAG Configuration
 LLM_CACHE_ENABLED = env.bool('LLM_CACHE_ENABLED', default=True)
 LLM_CACHE_TTL_HOURS = env.int('LLM_CACHE_TTL_HOURS', default=24)
 SEMANTIC_CACHE_THRESHOLD = env.float('SEMANTIC_CACHE_THRESHOLD', default=0.95)
+SEMANTIC_CACHE_MAX_ENTRIES = env.int('SEMANTIC_CACHE_MAX_ENTRIES', default=500)  # Per tenant and role, LRU-evicted
 VECTOR_SEARCH_TOP_K = env.int('VECTOR_SEARCH_TOP_K', default=5)
 HYBRID_SEARCH_ALPHA = env.float('HYBRID_SEARCH_ALPHA', default=0.5)
+RRF_K = env.int('RRF_K', default=60)  # Reciprocal-rank fusion constant
+EMBEDDING_CACHE_LOCAL_SIZE = env.int('EMBEDDING_CACHE_LOCAL_SIZE', default=2048)  # In-process LRU entries per worker (0 disables)
+EMBEDDING_CACHE_TTL_SECONDS = env.int('EMBEDDING_CACHE_TTL_SECONDS', default=86400 * 7)
+EMBEDDING_CACHE_DTYPE = env('EMBEDDING_CACHE_DTYPE', default='float32')  # 'float32' or 'float16' (half the Redis memory)
+RETRIEVAL_CACHE_ENABLED = env.bool('RETRIEVAL_CACHE_ENABLED', default=True)  # Ranked hits per inventory version
+RETRIEVAL_CACHE_TTL_SECONDS = env.int('RETRIEVAL_CACHE_TTL_SECONDS', default=3600)
+QUERY_FILTERS_ENABLED = env.bool('QUERY_FILTERS_ENABLED', default=True)  # Parse price/bedrooms/type/location into SQL pre-filters
+
+# Query routing (see core/llm/router.py)
+ROUTER_ENABLED = env.bool('ROUTER_ENABLED', default=True)
+ROUTER_COMPLEX_THRESHOLD = env.float('ROUTER_COMPLEX_THRESHOLD', default=0.45)  # Min similarity for the strong model
+ROUTER_MARGIN = env.float('ROUTER_MARGIN', default=0.03)  # ...and how far it must beat the simple centroid
+ROUTER_TEMPLATES_ENABLED = env.bool('ROUTER_TEMPLATES_ENABLED', default=True)
+ROUTER_TEMPLATE_THRESHOLD = env.float('ROUTER_TEMPLATE_THRESHOLD', default=0.55)  # Min similarity for a templated answer
 EMBEDDING_DIMENSIONS = env.int('EMBEDDING_DIMENSIONS', default=1536)
 
+# Embedding backfills (see core/llm/backfill.py)
+EMBEDDING_BATCH_SIZE = env.int('EMBEDDING_BATCH_SIZE', default=512)  # Max inputs per embeddings request (API limit 2048)
+EMBEDDING_BATCH_MAX_TOKENS = env.int('EMBEDDING_BATCH_MAX_TOKENS', default=100000)  # Max tokens per request (API limit 300k)
+EMBEDDING_MAX_INPUT_TOKENS = env.int('EMBEDDING_MAX_INPUT_TOKENS', default=8191)  # Longer texts are truncated
+EMBEDDING_BACKFILL_CONCURRENCY = env.int('EMBEDDING_BACKFILL_CONCURRENCY', default=4)  # Requests in flight
+EMBEDDING_BACKFILL_CHUNK_SIZE = env.int('EMBEDDING_BACKFILL_CHUNK_SIZE', default=2000)  # Rows fetched per DB round trip
+
+# Post-save embeddings, debounced per process (see core/llm/embedding_queue.py)
+EMBEDDING_QUEUE_WINDOW_MS = env.int('EMBEDDING_QUEUE_WINDOW_MS', default=200)  # Wait this long to batch saves together
+EMBEDDING_QUEUE_MAX_ITEMS = env.int('EMBEDDING_QUEUE_MAX_ITEMS', default=64)  # ...or until this many ids are pending
+
+# Long documents are retrieved as passages (see core/llm/chunking.py)
+DOCUMENT_CHUNKING_ENABLED = env.bool('DOCUMENT_CHUNKING_ENABLED', default=True)
+DOCUMENT_PASSAGE_TOKENS = env.int('DOCUMENT_PASSAGE_TOKENS', default=400)  # Max tokens per passage
+DOCUMENT_PASSAGE_OVERLAP_TOKENS = env.int('DOCUMENT_PASSAGE_OVERLAP_TOKENS', default=50)  # Trailing sentences repeated in the next passage
+
+# Vector search backend: 'auto' (pgvector when available, else in-process index), 'pgvector', 'index'
+# or 'scan' (exact per-query scan; used instead of 'index' when VECTOR_INDEX_ENABLED is off)
+VECTOR_SEARCH_BACKEND = env('VECTOR_SEARCH_BACKEND', default='auto')
+PGVECTOR_HNSW_EF_SEARCH = env.int('PGVECTOR_HNSW_EF_SEARCH', default=40)
+PGVECTOR_IVFFLAT_PROBES = env.int('PGVECTOR_IVFFLAT_PROBES', default=10)
+# Set to 'relaxed_order' or 'strict_order' on pgvector >= 0.8 to keep filtered HNSW scans from under-returning
+PGVECTOR_ITERATIVE_SCAN = env('PGVECTOR_ITERATIVE_SCAN', default='')
+
+# Retrieval statistics (times_retrieved / avg_relevance_score), buffered per worker
+RETRIEVAL_STATS_ENABLED = env.bool('RETRIEVAL_STATS_ENABLED', default=True)
+RETRIEVAL_STATS_FLUSH_SECONDS = env.float('RETRIEVAL_STATS_FLUSH_SECONDS', default=10.0)
+RETRIEVAL_STATS_MAX_PENDING = env.int('RETRIEVAL_STATS_MAX_PENDING', default=500)
+
+# In-process vector index (memory-mapped, shared by all workers on a host).
+# When disabled, saves and backfills stop updating it and searches fall back to the 'scan' backend.
+VECTOR_INDEX_ENABLED = env.bool('VECTOR_INDEX_ENABLED', default=True)
+VECTOR_INDEX_DIR = env('VECTOR_INDEX_DIR', default=os.path.join(BASE_DIR, 'vector_index'))
+# Compact codes for two-stage search: 'none' (exact scan), 'int8' (4x smaller) or 'binary' (32x smaller)
+VECTOR_INDEX_QUANTIZATION = env('VECTOR_INDEX_QUANTIZATION', default='none')
+VECTOR_INDEX_RERANK_FACTOR = env.int('VECTOR_INDEX_RERANK_FACTOR', default=10)  # candidate pool = k * factor
+
 # Scraping Configuration
 SCRAPING_TIMEOUT_SECONDS = env.int('SCRAPING_TIMEOUT_SECONDS', default=30)
 SCRAPING_USER_AGENTS = [
@@ -308,7 +383,13 @@ ENABLE_ASYNC_EMBEDDINGS = env.bool('ENABLE_ASYNC_EMBEDDINGS', default=True)
 
 # Chat Configuration
 MAX_CONVERSATION_HISTORY = env.int('MAX_CONVERSATION_HISTORY', default=10)
+CONVERSATION_SUMMARY_ENABLED = env.bool('CONVERSATION_SUMMARY_ENABLED', default=True)
+CONVERSATION_SUMMARY_TRIGGER_TOKENS = env.int('CONVERSATION_SUMMARY_TRIGGER_TOKENS', default=1500)  # Unsummarized tokens before folding
+CONVERSATION_SUMMARY_KEEP_MESSAGES = env.int('CONVERSATION_SUMMARY_KEEP_MESSAGES', default=4)  # Newest messages always sent raw
+CONVERSATION_SUMMARY_MAX_WORDS = env.int('CONVERSATION_SUMMARY_MAX_WORDS', default=250)
 MAX_CONTEXT_TOKENS = env.int('MAX_CONTEXT_TOKENS', default=25000)
+CONTEXT_HISTORY_RESERVE_TOKENS = env.int('CONTEXT_HISTORY_RESERVE_TOKENS', default=2000)  # Part of MAX_CONTEXT_TOKENS kept for conversation
+CONTEXT_MAX_TOKENS_PER_SOURCE = env.int('CONTEXT_MAX_TOKENS_PER_SOURCE', default=1500)  # Longer sources are cut at a sentence boundary
 STREAMING_ENABLED = env.bool('STREAMING_ENABLED', default=True)
 
 # Currency and Unit Conversion
@@ -42,3 +42,4 @@ DATABASES = {
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
+PGVECTOR_ENABLED = False
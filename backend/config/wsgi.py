@@ -9,3 +9,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
 
 application = get_wsgi_application()
+
+# Build shared LLM clients before the first request
+from core.llm.clients import warm_clients  # noqa: E402
+warm_clients()
@@ -0,0 +1,439 @@
+"""
+Bulk, resumable embedding backfill for properties and documents.
+
+Every backfill path (the generate_embeddings commands, the admin endpoint and
+the Celery tasks) runs through `EmbeddingBackfill`:
+
+    1. Rows are streamed in primary-key order with `.iterator()`, so memory
+       stays flat on large tenants.
+    2. Texts are packed into provider requests of at most
+       EMBEDDING_BATCH_MAX_TOKENS tokens / EMBEDDING_BATCH_SIZE inputs (one
+       over-long text is cut to EMBEDDING_MAX_INPUT_TOKENS).
+    3. Up to EMBEDDING_BACKFILL_CONCURRENCY requests are in flight at once
+       (`batch_generate_embeddings` on a thread pool); the database work
+       stays on the calling thread. Each request waits its turn in the
+       cluster-wide rate limiter (core/llm/rate_limit.py) for up to
+       LLM_RATE_LIMIT_BATCH_MAX_WAIT, so runs go at the provider ceiling
+       instead of into 429s.
+    4. Each finished batch is written back with one `bulk_update`, together
+       with the fingerprint of the embedded text and the model tag (see
+       `embedding_fingerprint` / `embedding_model_tag`).
+    5. The highest primary key below which every batch has been written is
+       checkpointed in the default cache, so a crashed or killed run resumes
+       from there instead of starting over. This needs a shared cache
+       (Redis, via REDIS_URL): with the DummyCache fallback checkpoints are
+       dropped, and a local-memory cache loses them with the process, so an
+       interrupted run starts over (a warning is logged).
+
+Rows whose stored fingerprint and model tag still match their text are
+never sent to the provider: a plain run embeds rows without a vector or
+with a vector from another model/dimension (a targeted re-embed after a
+model change), and a `force` run re-checks every row but only re-embeds
+those whose text changed.
+
+`bulk_update` bypasses the model save hooks, so built vector indexes are
+synced (per row for small runs, rebuilt for large ones) and the tenants'
+cached retrievals invalidated once the rows are written.
+"""
+
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+from .context import count_tokens, truncate_to_tokens
+from .embeddings import batch_generate_embeddings, embedding_fingerprint, embedding_model_tag
+from .rate_limit import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+PROPERTY = 'property'
+DOCUMENT = 'document'
+KINDS = (PROPERTY, DOCUMENT)
+
+# Runs writing up to this many rows sync indexes row by row; bigger runs rebuild them
+INDEX_SYNC_MAX_ROWS = 500
+
+CHECKPOINT_PREFIX = 'embedding_backfill'
+
+
+class BackfillError(Exception):
+    """Raised when an embedding request fails; the checkpoint keeps the last written row."""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        # Set when the request was shed by the rate limiter: resume after this many seconds
+        self.retry_after = retry_after
+
+
+@dataclass
+class BackfillStats:
+    """Progress of one backfill run (also what is checkpointed)."""
+
+    kind: str
+    run_id: Optional[str] = None
+    rows: int = 0           # rows written back
+    skipped: int = 0        # rows without text to embed
+    unchanged: int = 0      # rows whose embedding still matches their text and model
+    failed: int = 0         # rows the provider returned no vector for
+    tokens: int = 0         # tokens sent to the provider
+    batches: int = 0        # provider requests
+    last_pk: Optional[str] = None
+    resumed_from: Optional[str] = None
+    elapsed_seconds: float = 0.0
+    status: str = 'running'
+    error: str = ''
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def as_dict(self) -> Dict:
+        stats = asdict(self)
+        stats['elapsed_seconds'] = round(self.elapsed_seconds, 2)
+        stats['rows_per_second'] = round(self.rows_per_second, 1)
+        stats['tokens_per_second'] = round(self.tokens_per_second, 1)
+        return stats
+
+
+@dataclass
+class _Batch:
+    seq: int
+    rows: List = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    hashes: List[str] = field(default_factory=list)
+    tokens: int = 0
+    update_fields: set = field(default_factory=lambda: {'embedding', 'embedding_hash', 'embedding_model'})
+
+
+def _queryset(kind: str):
+    """Rows of a kind with only the columns the backfill reads."""
+    from apps.documents.models import Document
+    from apps.properties.models import Property
+
+    common = ('id', 'tenant_id', 'user_roles', 'is_active', 'embedding_hash', 'embedding_model')
+    if kind == PROPERTY:
+        return Property.objects.only(
+            *common, 'content_for_search', 'card_version', *Property.CARD_SOURCE_FIELDS
+        )
+    # Chunked documents are embedded through their passages
+    return Document.objects.filter(passage_count=0).only(*common, 'content')
+
+
+def _source_text(kind: str, obj) -> Tuple[str, set]:
+    """
+    Text to embed for a row, and the extra fields to write back.
+
+    Stale property cards are re-rendered here (and saved with the embedding)
+    rather than through `get_card()`, which would issue one UPDATE per row.
+    """
+    if kind == DOCUMENT:
+        return obj.content or '', set()
+
+    if obj.card_version != obj.CARD_VERSION or not obj.content_for_search:
+        obj.content_for_search = obj.generate_search_content()
+        obj.card_version = obj.CARD_VERSION
+        return obj.content_for_search, {'content_for_search', 'card_version'}
+    return obj.content_for_search, set()
+
+
+def checkpoint_key(kind: str, tenant_id=None, force: bool = False) -> str:
+    """Cache key of a backfill's checkpoint (one per kind, tenant and mode)."""
+    return f"{CHECKPOINT_PREFIX}:{kind}:{tenant_id or 'all'}:{'force' if force else 'missing'}"
+
+
+def checkpoints_persist() -> bool:
+    """Whether the default cache keeps checkpoints across processes (e.g. Redis)."""
+    from django.core.cache.backends.dummy import DummyCache
+    from django.core.cache.backends.locmem import LocMemCache
+
+    return not isinstance(caches['default'], (DummyCache, LocMemCache))
+
+
+def get_checkpoint(kind: str, tenant_id=None, force: bool = False) -> Optional[Dict]:
+    """Last checkpointed progress of a backfill, if any."""
+    return caches['default'].get(checkpoint_key(kind, tenant_id, force))
+
+
+class EmbeddingBackfill:
+    """
+    Embed every row of one kind that needs it, in batches.
+
+    Usage:
+        backfill = EmbeddingBackfill('property', tenant_id=tenant.id)
+        stats = backfill.run(on_progress=lambda stats: print(stats.rows))
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        tenant_id=None,
+        ids: Optional[Iterable] = None,
+        force: bool = False,
+        restart: bool = False,
+        batch_tokens: int = None,
+        batch_size: int = None,
+        concurrency: int = None,
+        model: str = None,
+        run_id: str = None,
+    ):
+        """
+        Args:
+            kind: 'property' or 'document'
+            tenant_id: Only rows of this tenant (default: all tenants)
+            ids: Only these primary keys (not checkpointed)
+            force: Also re-check rows that have a current-model embedding,
+                re-embedding those whose text changed
+            restart: Ignore an existing checkpoint and start from the first row
+            batch_tokens: Max tokens per provider request
+            batch_size: Max inputs per provider request
+            concurrency: Max provider requests in flight
+            model: Embedding model (default: OPENAI_EMBEDDING_MODEL)
+            run_id: Identifies this run in the checkpoint (e.g. the Celery task id)
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown backfill kind: {kind}")
+
+        self.kind = kind
+        self.tenant_id = tenant_id
+        self.ids = [str(pk) for pk in ids] if ids is not None else None
+        self.force = force
+        self.restart = restart
+        self.batch_tokens = batch_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.concurrency = max(1, concurrency or settings.EMBEDDING_BACKFILL_CONCURRENCY)
+        self.model = model or settings.OPENAI_EMBEDDING_MODEL
+        self.model_tag = embedding_model_tag(self.model)
+        self.max_input_tokens = settings.EMBEDDING_MAX_INPUT_TOKENS
+        self.run_id = run_id
+
+        # Checkpoints only make sense for open-ended runs
+        self.checkpointed = self.ids is None
+        self.cache_key = checkpoint_key(kind, tenant_id, force)
+
+        # Written rows are kept for per-row index syncs until there are too many
+        self._written: List = []
+        self._written_tenants = set()
+
+    def _load_checkpoint(self) -> Optional[str]:
+        if not self.checkpointed:
+            return None
+        if not checkpoints_persist():
+            logger.warning(
+                f"⚠️ Backfill checkpoints for {self.kind} are not persisted "
+                f"(default cache is {type(caches['default']).__name__}); an interrupted run "
+                f"will start over. Set REDIS_URL to make backfills resumable."
+            )
+        if self.restart:
+            caches['default'].delete(self.cache_key)
+            return None
+        checkpoint = caches['default'].get(self.cache_key)
+        if checkpoint and checkpoint.get('status') != 'complete':
+            return checkpoint.get('last_pk')
+        return None
+
+    def _save_checkpoint(self, stats: BackfillStats):
+        if self.checkpointed:
+            caches['default'].set(self.cache_key, stats.as_dict(), timeout=None)
+
+    def _rows(self, after_pk: Optional[str]):
+        queryset = _queryset(self.kind)
+        if self.tenant_id:
+            queryset = queryset.filter(tenant_id=self.tenant_id)
+        if self.ids is not None:
+            queryset = queryset.filter(pk__in=self.ids)
+        if self.force:
+            queryset = queryset.annotate(has_embedding=ExpressionWrapper(
+                Q(embedding__isnull=False), output_field=BooleanField()
+            ))
+        else:
+            # Missing, or produced by another model/dimension
+            queryset = queryset.filter(Q(embedding__isnull=True) | ~Q(embedding_model=self.model_tag))
+        if after_pk:
+            queryset = queryset.filter(pk__gt=after_pk)
+        return queryset.order_by('pk').iterator(chunk_size=settings.EMBEDDING_BACKFILL_CHUNK_SIZE)
+
+    def _batches(self, rows, stats: BackfillStats):
+        """Pack rows into token-bounded batches."""
+        batch = _Batch(seq=0)
+        for obj in rows:
+            text, extra_fields = _source_text(self.kind, obj)
+            if not text.strip():
+                stats.skipped += 1
+                continue
+
+            fingerprint = embedding_fingerprint(text)
+            if (getattr(obj, 'has_embedding', False)
+                    and obj.embedding_model == self.model_tag
+                    and obj.embedding_hash == fingerprint):
+                stats.unchanged += 1
+                continue
+
+            tokens = count_tokens(text, self.model)
+            if tokens > self.max_input_tokens:
+                text = truncate_to_tokens(text, self.max_input_tokens, self.model)
+                tokens = self.max_input_tokens
+
+            if batch.rows and (batch.tokens + tokens > self.batch_tokens
+                               or len(batch.rows) >= self.batch_size):
+                yield batch
+                batch = _Batch(seq=batch.seq + 1)
+
+            batch.rows.append(obj)
+            batch.texts.append(text)
+            batch.hashes.append(fingerprint)
+            batch.tokens += tokens
+            batch.update_fields |= extra_fields
+
+        if batch.rows:
+            yield batch
+
+    def _embed(self, batch: _Batch) -> List[Optional[List[float]]]:
+        try:
+            # Queue behind other callers for up to a minute's refill rather than failing
+            return batch_generate_embeddings(
+                batch.texts, model=self.model, tokens=batch.tokens,
+                max_wait=settings.LLM_RATE_LIMIT_BATCH_MAX_WAIT,
+            )
+        except RateLimitExceeded as e:
+            raise BackfillError(str(e), retry_after=e.retry_after)
+
+    def _write(self, batch: _Batch, vectors, stats: BackfillStats):
+        """Write one batch back with a single bulk_update."""
+        if not any(vector is not None for vector in vectors):
+            raise BackfillError(f"Embedding request for {len(batch.rows)} {self.kind} rows failed")
+
+        rows = []
+        for obj, fingerprint, vector in zip(batch.rows, batch.hashes, vectors):
+            if vector is None:
+                stats.failed += 1
+                continue
+            obj.embedding = vector
+            obj.embedding_hash = fingerprint
+            obj.embedding_model = self.model_tag
+            rows.append(obj)
+
+        model = type(batch.rows[0])
+        model.objects.bulk_update(rows, sorted(batch.update_fields), batch_size=1000)
+        stats.rows += len(rows)
+        stats.tokens += batch.tokens
+        stats.batches += 1
+        self._written_tenants.update(obj.tenant_id for obj in rows)
+        if stats.rows <= INDEX_SYNC_MAX_ROWS:
+            self._written.extend(rows)
+        else:
+            self._written = []
+
+    def _sync_indexes(self, stats: BackfillStats):
+        """Apply written rows to built vector indexes and drop cached retrievals."""
+        from .retrieval_cache import bump_inventory_version
+        from .vector_index import rebuild_built_indexes, sync_object
+
+        if stats.rows <= INDEX_SYNC_MAX_ROWS:
+            for obj in self._written:
+                sync_object(obj, self.kind)
+        else:
+            for tenant_id in self._written_tenants:
+                rebuild_built_indexes(tenant_id)
+
+        for tenant_id in self._written_tenants:
+            bump_inventory_version(tenant_id)
+        self._written = []
+        self._written_tenants = set()
+
+    def run(self, on_progress: Callable[[BackfillStats], None] = None) -> BackfillStats:
+        """
+        Embed all matching rows.
+
+        Args:
+            on_progress: Called with the running stats after every written batch
+
+        Returns:
+            Final BackfillStats
+
+        Raises:
+            BackfillError: If an embedding request failed; rows written so far
+                are kept and the next run resumes after the last checkpoint
+        """
+        after_pk = self._load_checkpoint()
+        stats = BackfillStats(kind=self.kind, run_id=self.run_id, last_pk=after_pk, resumed_from=after_pk)
+        start = time.perf_counter()
+        self._save_checkpoint(stats)
+
+        if after_pk:
+            logger.info(f"🔄 Resuming {self.kind} embedding backfill after {after_pk}")
+
+        # Batches finished out of order wait here until every earlier one is written
+        done: Dict[int, str] = {}
+        order = deque()
+
+        def advance_checkpoint():
+            while order and order[0] in done:
+                stats.last_pk = done.pop(order.popleft())
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency,
+                                    thread_name_prefix='embedding-backfill') as executor:
+                pending = {}
+
+                def collect(return_when):
+                    finished, _ = wait(pending, return_when=return_when)
+                    for future in finished:
+                        batch = pending.pop(future)
+                        self._write(batch, future.result(), stats)
+                        done[batch.seq] = str(batch.rows[-1].pk)
+                    advance_checkpoint()
+                    stats.elapsed_seconds = time.perf_counter() - start
+                    self._save_checkpoint(stats)
+                    if on_progress:
+                        on_progress(stats)
+
+                try:
+                    for batch in self._batches(self._rows(after_pk), stats):
+                        order.append(batch.seq)
+                        pending[executor.submit(self._embed, batch)] = batch
+                        if len(pending) >= self.concurrency:
+                            collect(FIRST_COMPLETED)
+                    while pending:
+                        collect(FIRST_COMPLETED)
+                except BaseException:
+                    # Don't send queued requests once a batch has failed
+                    for future in list(pending):
+                        future.cancel()
+                    raise
+
+            stats.status = 'complete'
+        except Exception as e:
+            stats.status = 'failed'
+            stats.error = str(e)
+            raise
+        finally:
+            stats.elapsed_seconds = time.perf_counter() - start
+            self._save_checkpoint(stats)
+            if self._written_tenants:
+                self._sync_indexes(stats)
+
+            logger.info(
+                f"{'✅' if stats.status == 'complete' else '❌'} {self.kind} embedding backfill {stats.status}: "
+                f"{stats.rows} rows, {stats.tokens} tokens in {stats.elapsed_seconds:.1f}s "
+                f"({stats.rows_per_second:.1f} rows/s, {stats.tokens_per_second:.0f} tokens/s), "
+                f"{stats.unchanged} unchanged, {stats.failed} failed, {stats.skipped} skipped"
+            )
+
+        return stats
+
+
+def backfill_embeddings(kind: str, **options) -> BackfillStats:
+    """Run an EmbeddingBackfill (see EmbeddingBackfill.__init__ for options)."""
+    on_progress = options.pop('on_progress', None)
+    return EmbeddingBackfill(kind, **options).run(on_progress=on_progress)
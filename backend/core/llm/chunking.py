@@ -0,0 +1,194 @@
+"""
+Passage-level chunking of long documents.
+
+A Document whose content is longer than DOCUMENT_PASSAGE_TOKENS is split
+into overlapping passages at sentence boundaries (a sentence longer than a
+whole passage is cut by tokens). Each passage is stored as a child Document
+row (`parent`, `passage_index`) that inherits the parent's tenant, roles,
+content type and source, and gets its own embedding. The parent keeps the
+full text for the API and admin, but carries no embedding and is excluded
+from keyword search (`passage_count > 0`), so retrieval returns only the
+matching passages.
+
+Passages are re-synced whenever the parent is saved: unchanged passages
+keep their embeddings (see the fingerprints in core/llm/embeddings.py),
+changed and new ones are queued for embedding, and leftover ones are
+deleted.
+"""
+
+import logging
+from typing import List
+
+from django.conf import settings
+
+from .context import _SENTENCE_BOUNDARY, count_tokens, get_encoding
+
+logger = logging.getLogger(__name__)
+
+# Parent fields every passage copies
+PASSAGE_INHERITED_FIELDS = (
+    'tenant_id', 'user_roles', 'content_type', 'freshness_date', 'source_url',
+    'source_reference', 'is_active', 'metadata',
+)
+
+
+def _sentences(text: str, max_tokens: int, model: str) -> List[tuple]:
+    """(sentence, tokens) pairs; sentences over max_tokens are cut into token windows."""
+    encoding = get_encoding(model)
+    units = []
+    position = 0
+    for match in _SENTENCE_BOUNDARY.finditer(text + '\n'):
+        sentence = text[position:match.end()]
+        position = match.end()
+        if not sentence.strip():
+            continue
+
+        tokens = count_tokens(sentence, model)
+        if tokens <= max_tokens:
+            units.append((sentence, tokens))
+            continue
+
+        encoded = encoding.encode(sentence, disallowed_special=())
+        for start in range(0, len(encoded), max_tokens):
+            piece = encoded[start:start + max_tokens]
+            units.append((encoding.decode(piece), len(piece)))
+    return units
+
+
+def split_passages(text: str, max_tokens: int = None, overlap_tokens: int = None,
+                   model: str = None) -> List[str]:
+    """
+    Split text into overlapping, token-bounded passages.
+
+    Args:
+        text: Document content
+        max_tokens: Max tokens per passage (default DOCUMENT_PASSAGE_TOKENS)
+        overlap_tokens: Tokens of trailing sentences repeated at the start
+            of the next passage (default DOCUMENT_PASSAGE_OVERLAP_TOKENS)
+        model: Model whose tokenizer is used (default: the embedding model)
+
+    Returns:
+        Passages in document order; `[text]` when it fits in one passage
+    """
+    max_tokens = max_tokens or settings.DOCUMENT_PASSAGE_TOKENS
+    overlap_tokens = settings.DOCUMENT_PASSAGE_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    model = model or settings.OPENAI_EMBEDDING_MODEL
+
+    if not text or count_tokens(text, model) <= max_tokens:
+        return [text] if text else []
+
+    passages = []
+    current: List[tuple] = []
+    used = 0
+    for sentence, tokens in _sentences(text, max_tokens, model):
+        if current and used + tokens > max_tokens:
+            passages.append(''.join(s for s, _ in current).strip())
+
+            # Carry the last sentences over as overlap, without overflowing the next passage
+            carried = []
+            carried_tokens = 0
+            for previous in reversed(current):
+                if carried_tokens + previous[1] > overlap_tokens or carried_tokens + previous[1] + tokens > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[1]
+            current, used = carried, carried_tokens
+
+        current.append((sentence, tokens))
+        used += tokens
+
+    if current:
+        passages.append(''.join(s for s, _ in current).strip())
+    return passages
+
+
+def remove_passages(passages):
+    """Delete passage rows, dropping them from the vector indexes and cached answers first."""
+    from apps.documents.models import Document
+    from .semantic_cache import invalidate_sources
+    from .vector_index import remove_object
+
+    passages = list(passages)
+    if not passages:
+        return
+    for passage in passages:
+        remove_object(passage, 'document')
+        invalidate_sources('document', passage.id)
+    Document.objects.filter(pk__in=[passage.pk for passage in passages]).delete()
+
+
+def sync_passages(document) -> int:
+    """
+    Bring a parent document's passages in line with its content.
+
+    Called from Document.save for top-level documents.
+
+    Returns:
+        Number of passages (0 when the document is embedded whole)
+    """
+    from apps.documents.models import Document
+    from .embedding_queue import embedding_queue
+    from .semantic_cache import invalidate_sources
+    from .vector_index import remove_object, sync_object
+
+    if not settings.DOCUMENT_CHUNKING_ENABLED:
+        return document.passage_count
+
+    chunks = split_passages(document.content or '')
+    existing = {passage.passage_index: passage for passage in document.passages.all()}
+
+    if len(chunks) <= 1:
+        if existing or document.passage_count:
+            remove_passages(existing.values())
+            document.passage_count = 0
+            Document.objects.filter(pk=document.pk).update(passage_count=0)
+            if document.needs_embedding():
+                embedding_queue.add('document', document.id)
+        return 0
+
+    inherited = {field: getattr(document, field) for field in PASSAGE_INHERITED_FIELDS}
+    created, updated = [], []
+    for index, text in enumerate(chunks):
+        passage = existing.pop(index, None)
+        if passage is None:
+            created.append(Document(parent_id=document.id, passage_index=index, content=text, **inherited))
+            continue
+
+        changes = {field: value for field, value in inherited.items() if getattr(passage, field) != value}
+        if passage.content != text:
+            changes['content'] = text
+        if changes:
+            for field, value in changes.items():
+                setattr(passage, field, value)
+            updated.append(passage)
+
+    Document.objects.bulk_create(created)
+    if updated:
+        Document.objects.bulk_update(updated, ['content', *PASSAGE_INHERITED_FIELDS])
+        for passage in updated:
+            # Roles or is_active may have changed; the vector stays until re-embedded
+            sync_object(passage, 'document')
+            invalidate_sources('document', passage.id)
+    remove_passages(existing.values())
+
+    # The parent is only searched through its passages
+    if document.embedding is not None:
+        remove_object(document, 'document')
+        invalidate_sources('document', document.id)
+    document.passage_count = len(chunks)
+    document.embedding = None
+    document.embedding_hash = ''
+    document.embedding_model = ''
+    Document.objects.filter(pk=document.pk).update(
+        passage_count=len(chunks), embedding=None, embedding_hash='', embedding_model=''
+    )
+
+    for passage in created + updated:
+        if passage.needs_embedding():
+            embedding_queue.add('document', passage.id)
+
+    logger.info(
+        f"Document {document.id}: {len(chunks)} passages "
+        f"({len(created)} new, {len(updated)} updated)"
+    )
+    return len(chunks)
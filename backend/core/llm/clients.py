@@ -0,0 +1,193 @@
+"""
+Process-wide registry of LLM and embedding clients.
+
+Building an SDK client is not free, and every fresh client also opens its own
+HTTP connection pool, so each request paid for a new TLS handshake. Clients
+here are created once per process (per model) and share one keep-alive
+httpx pool for OpenAI traffic.
+
+Per-model overrides (temperature, max_tokens, timeout, max_retries) come from
+the LLM_CLIENT_OPTIONS setting, e.g.:
+
+    LLM_CLIENT_OPTIONS='{"gpt-4o": {"temperature": 0.1, "timeout": 30}}'
+
+`warm_clients()` is called when web and Celery worker processes start so the
+first request doesn't pay for client construction and the TLS handshake.
+"""
+
+import logging
+import threading
+from typing import Dict
+
+import httpx
+import openai
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[tuple, object] = {}
+# Re-entrant: factories build their own dependencies (e.g. the shared HTTP pool) under it
+_lock = threading.RLock()
+
+
+def _get_or_create(key: tuple, factory):
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = factory()
+                logger.debug(f"Created LLM client {key}")
+    return client
+
+
+def _model_options(model: str) -> Dict:
+    return dict(settings.LLM_CLIENT_OPTIONS.get(model, {}))
+
+
+def get_http_client() -> httpx.Client:
+    """Shared keep-alive connection pool for OpenAI API calls."""
+    return _get_or_create(('http',), lambda: httpx.Client(
+        limits=httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_SECONDS,
+        ),
+        timeout=settings.LLM_REQUEST_TIMEOUT,
+    ))
+
+
+def get_openai_client() -> openai.OpenAI:
+    """
+    Shared raw OpenAI SDK client.
+
+    Raises:
+        ValueError: If OPENAI_API_KEY is not configured
+    """
+    if not settings.OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+
+    return _get_or_create(('openai',), lambda: openai.OpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        max_retries=settings.LLM_MAX_RETRIES,
+        http_client=get_http_client(),
+    ))
+
+
+def get_embeddings(model: str = None):
+    """Shared LangChain OpenAIEmbeddings for a model."""
+    from langchain_openai import OpenAIEmbeddings
+    from .embeddings import embedding_request_dimensions
+
+    model = model or settings.OPENAI_EMBEDDING_MODEL
+
+    def build():
+        options = _model_options(model)
+        return OpenAIEmbeddings(
+            model=model,
+            dimensions=embedding_request_dimensions(model),
+            openai_api_key=settings.OPENAI_API_KEY,
+            max_retries=options.get('max_retries', settings.LLM_MAX_RETRIES),
+            request_timeout=options.get('timeout', settings.LLM_REQUEST_TIMEOUT),
+            http_client=get_http_client(),
+        )
+
+    return _get_or_create(('embeddings', model), build)
+
+
+def get_chat_model(model: str):
+    """
+    Shared LangChain chat model.
+
+    Claude models get a ChatAnthropic client, everything else ChatOpenAI.
+    """
+    def build():
+        options = _model_options(model)
+        temperature = options.get('temperature', settings.OPENAI_TEMPERATURE)
+        timeout = options.get('timeout', settings.LLM_REQUEST_TIMEOUT)
+        max_retries = options.get('max_retries', settings.LLM_MAX_RETRIES)
+
+        if model.startswith('claude'):
+            from langchain_anthropic import ChatAnthropic
+            return ChatAnthropic(
+                model=model,
+                temperature=temperature,
+                max_tokens=options.get('max_tokens', settings.ANTHROPIC_MAX_TOKENS),
+                default_request_timeout=timeout,
+                max_retries=max_retries,
+                anthropic_api_key=settings.ANTHROPIC_API_KEY
+            )
+
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            max_tokens=options.get('max_tokens', settings.OPENAI_MAX_TOKENS),
+            timeout=timeout,
+            max_retries=max_retries,
+            openai_api_key=settings.OPENAI_API_KEY,
+            http_client=get_http_client(),
+            # Report token usage on streamed replies too
+            stream_usage=True,
+        )
+
+    return _get_or_create(('chat', model), build)
+
+
+def warm_clients():
+    """
+    Build the default clients and router centroids, and open a pooled
+    connection to OpenAI.
+
+    Never raises: a failed warm-up only means the first request does the work.
+    """
+    if not settings.LLM_WARMUP_ENABLED:
+        return
+
+    try:
+        get_embeddings()
+        get_chat_model(settings.OPENAI_MODEL_CHAT)
+        if settings.ANTHROPIC_API_KEY:
+            get_chat_model(settings.ANTHROPIC_MODEL)
+
+        if settings.OPENAI_API_KEY:
+            if settings.ROUTER_ENABLED:
+                # Embeds the router centroids once (then cached)
+                from .router import get_query_router
+                get_query_router().centroids
+
+            # Cheap authenticated call that leaves a kept-alive TLS connection in the pool
+            get_openai_client().with_options(timeout=5.0, max_retries=0).models.retrieve(
+                settings.OPENAI_EMBEDDING_MODEL
+            )
+
+        logger.info("✓ LLM clients warmed")
+    except Exception as e:
+        logger.warning(f"LLM client warm-up failed: {e}")
+
+
+def install_clients(embeddings=None, chat_models: Dict[str, object] = None):
+    """
+    Register pre-built clients in place of the SDK ones.
+
+    Used by the offline benchmarks (testing/benchmarks) to swap in local
+    stand-ins; `reset_clients()` restores the real clients.
+
+    Args:
+        embeddings: Client for the current OPENAI_EMBEDDING_MODEL
+        chat_models: {model name: chat client}
+    """
+    with _lock:
+        if embeddings is not None:
+            _clients[('embeddings', settings.OPENAI_EMBEDDING_MODEL)] = embeddings
+        for model, client in (chat_models or {}).items():
+            _clients[('chat', model)] = client
+
+
+def reset_clients():
+    """Drop all cached clients (e.g. after a fork or in tests)."""
+    with _lock:
+        http = _clients.get(('http',))
+        _clients.clear()
+    if http is not None:
+        http.close()
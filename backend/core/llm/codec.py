@@ -0,0 +1,128 @@
+"""
+Compact binary encodings for vectors and cached payloads.
+
+Vectors are stored as little-endian float32 (or float16) bytes behind a
+3-byte header, instead of pickled Python float lists or JSON arrays:
+
+    b'VF' + b'4' + <float32 LE bytes>    1536 dims -> 6 KB (vs ~30 KB pickled)
+    b'VF' + b'2' + <float16 LE bytes>    1536 dims -> 3 KB
+
+Cached payloads (semantic-cache answers and indexes) are msgpack, compressed
+with zlib, behind a 2-byte header (b'MZ'); if msgpack is not installed they
+fall back to compressed JSON (b'JZ').
+
+Decoders accept everything written before this module existed: lists, JSON
+strings, pgvector literals and plain pickled dicts are returned as-is (or
+converted), so entries already in Redis stay readable until they expire.
+"""
+
+import base64
+import json
+import logging
+import zlib
+from typing import Any, Optional
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is in requirements.txt
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+VECTOR_MAGIC = b'VF'
+MSGPACK_MAGIC = b'MZ'
+JSON_MAGIC = b'JZ'
+
+_DTYPES = {
+    'float32': (b'4', np.dtype('<f4')),
+    'float16': (b'2', np.dtype('<f2')),
+}
+_DTYPE_CODES = {code: dtype for code, dtype in _DTYPES.values()}
+
+# zlib level: payloads are small and read far more often than written
+COMPRESSION_LEVEL = 6
+
+
+def encode_vector(vector, dtype: str = 'float32') -> bytes:
+    """
+    Encode a vector as header + little-endian float bytes.
+
+    Args:
+        vector: List, tuple or NumPy array of floats
+        dtype: 'float32' or 'float16'
+    """
+    code, np_dtype = _DTYPES[dtype]
+    return VECTOR_MAGIC + code + np.asarray(vector, dtype=np_dtype).tobytes()
+
+
+def decode_vector(value) -> Optional[np.ndarray]:
+    """
+    Decode any stored vector representation to a float32 array.
+
+    Accepts encoded bytes, lists/tuples/arrays, JSON arrays and pgvector
+    text literals ("[0.1,0.2,...]"). Returns None for empty or unreadable
+    values.
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value)
+        if value[:2] != VECTOR_MAGIC or value[2:3] not in _DTYPE_CODES:
+            logger.warning("Unrecognised vector encoding")
+            return None
+        return np.frombuffer(value, dtype=_DTYPE_CODES[value[2:3]], offset=3).astype(np.float32)
+
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+
+    vector = np.asarray(value, dtype=np.float32).ravel()
+    return vector if vector.size else None
+
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray)):
+        return {'__bytes__': base64.b64encode(value).decode()}
+    return str(value)
+
+
+def _json_object_hook(obj):
+    if set(obj) == {'__bytes__'}:
+        return base64.b64decode(obj['__bytes__'])
+    return obj
+
+
+def encode_payload(obj: Any) -> bytes:
+    """Serialize a cache payload to compressed msgpack (bytes values stay binary)."""
+    if msgpack is not None:
+        packed = msgpack.packb(obj, use_bin_type=True, default=str)
+        return MSGPACK_MAGIC + zlib.compress(packed, COMPRESSION_LEVEL)
+
+    packed = json.dumps(obj, separators=(',', ':'), default=_json_default).encode()
+    return JSON_MAGIC + zlib.compress(packed, COMPRESSION_LEVEL)
+
+
+def decode_payload(value) -> Any:
+    """
+    Deserialize a cache payload written by `encode_payload`.
+
+    Anything else (e.g. a dict pickled before payloads were encoded) is
+    returned unchanged.
+    """
+    if not isinstance(value, (bytes, bytearray)):
+        return value
+
+    magic, body = bytes(value[:2]), value[2:]
+    if magic == MSGPACK_MAGIC:
+        if msgpack is None:
+            raise RuntimeError("msgpack is required to read this cache entry")
+        return msgpack.unpackb(zlib.decompress(body), raw=False)
+    if magic == JSON_MAGIC:
+        return json.loads(zlib.decompress(body), object_hook=_json_object_hook)
+
+    return value
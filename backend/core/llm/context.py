@@ -0,0 +1,200 @@
+"""
+Token-budgeted context packing for RAG prompts.
+
+Retrieved sources are added in relevance order until MAX_CONTEXT_TOKENS
+(minus the share reserved for conversation history) is used up. A source that
+does not fit is cut at a sentence boundary when enough budget remains,
+otherwise it is dropped. The history reserve holds the conversation summary
+first, then as many of the newest raw messages as fit. Tokens are counted
+with tiktoken using the chat model's encoding.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import tiktoken
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Split after sentence punctuation or at line breaks
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n+')
+
+# Don't bother packing a truncated source smaller than this
+MIN_SOURCE_TOKENS = 50
+
+TRUNCATION_MARKER = ' [...]'
+
+
+@lru_cache(maxsize=8)
+def get_encoding(model: str = None):
+    """Get (and cache) the tiktoken encoding for a model."""
+    model = model or settings.OPENAI_MODEL_CHAT
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+
+def count_tokens(text: str, model: str = None) -> int:
+    """Count tokens in text."""
+    if not text:
+        return 0
+    return len(get_encoding(model).encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = None) -> str:
+    """
+    Truncate text to at most max_tokens, cutting at a sentence boundary.
+
+    Falls back to a hard token cut when the first sentence alone is too long.
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    budget = max_tokens - count_tokens(TRUNCATION_MARKER, model)
+    kept = []
+    used = 0
+    position = 0
+
+    for match in _SENTENCE_BOUNDARY.finditer(text + '\n'):
+        sentence = text[position:match.end()]
+        tokens = count_tokens(sentence, model)
+        if used + tokens > budget:
+            break
+        kept.append(sentence)
+        used += tokens
+        position = match.end()
+
+    if kept:
+        return ''.join(kept).rstrip() + TRUNCATION_MARKER
+
+    encoding = get_encoding(model)
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max(budget, 0)]) + TRUNCATION_MARKER
+
+
+class ContextPacker:
+    """
+    Packs retrieved sources and conversation history into a token budget.
+
+    Usage:
+        packer = ContextPacker()
+        context, history, stats = packer.pack(retrieved_docs, messages, summary)
+        # history: the messages to send as chat turns
+        # stats: {'budget_tokens', 'packed_tokens', 'dropped_tokens', ...}
+    """
+
+    def __init__(self, max_tokens: int = None, history_reserve: int = None,
+                 max_source_tokens: int = None, model: str = None):
+        self.max_tokens = max_tokens or settings.MAX_CONTEXT_TOKENS
+        self.history_reserve = settings.CONTEXT_HISTORY_RESERVE_TOKENS if history_reserve is None else history_reserve
+        self.max_source_tokens = max_source_tokens or settings.CONTEXT_MAX_TOKENS_PER_SOURCE
+        self.model = model
+
+    def _format_source(self, index: int, doc: Dict, content: str) -> str:
+        parts = [f"[Document {index}]", f"Type: {doc['content_type']}"]
+        if doc.get('freshness_date'):
+            parts.append(f"Updated: {doc['freshness_date']}")
+        if doc.get('source_reference'):
+            parts.append(f"Source: {doc['source_reference']}")
+        parts.append(f"Content: {content}")
+        parts.append("")
+        return "\n".join(parts)
+
+    def _pack_sources(self, retrieved_docs: List[Dict], budget: int) -> Tuple[List[str], Dict]:
+        blocks = []
+        packed_tokens = 0
+        dropped_tokens = 0
+        truncated = 0
+        dropped = 0
+
+        for doc in retrieved_docs:
+            content = doc['content'] or ''
+            full_tokens = count_tokens(content, self.model)
+            overhead = count_tokens(self._format_source(len(blocks) + 1, doc, ''), self.model)
+
+            allowed = min(self.max_source_tokens, budget - packed_tokens - overhead)
+            if allowed < min(full_tokens, MIN_SOURCE_TOKENS):
+                dropped += 1
+                dropped_tokens += full_tokens
+                continue
+
+            if full_tokens > allowed:
+                content = truncate_to_tokens(content, allowed, self.model)
+                truncated += 1
+
+            content_tokens = count_tokens(content, self.model)
+            dropped_tokens += max(full_tokens - content_tokens, 0)
+
+            blocks.append(self._format_source(len(blocks) + 1, doc, content))
+            packed_tokens += overhead + content_tokens
+
+        return blocks, {
+            'packed_tokens': packed_tokens,
+            'dropped_tokens': dropped_tokens,
+            'sources_packed': len(blocks),
+            'sources_truncated': truncated,
+            'sources_dropped': dropped,
+        }
+
+    def _pack_history(self, conversation_history: List, budget: int) -> Tuple[List, int]:
+        """Keep the most recent messages that fit, in chronological order."""
+        kept = []
+        used = 0
+        for msg in reversed(conversation_history):
+            tokens = count_tokens(msg.content, self.model)
+            if used + tokens > budget:
+                break
+            kept.append(msg)
+            used += tokens
+        kept.reverse()
+        return kept, used
+
+    def pack(self, retrieved_docs: List[Dict], conversation_history: List,
+             summary: str = '') -> Tuple[str, List, Dict]:
+        """
+        Build the context string and trim the raw history.
+
+        Args:
+            retrieved_docs: Sources from `_hybrid_search`, best first
+            conversation_history: Unsummarized messages, oldest first
+            summary: Rolling summary of older messages
+
+        Returns:
+            (context, history, stats): history holds the messages to send as
+            chat turns; stats reports packed/dropped token counts
+        """
+        summary = truncate_to_tokens(summary, self.history_reserve, self.model) if summary else ''
+        summary_tokens = count_tokens(summary, self.model)
+        history, history_tokens = self._pack_history(
+            conversation_history, self.history_reserve - summary_tokens
+        )
+
+        source_budget = self.max_tokens - self.history_reserve
+        source_blocks, stats = self._pack_sources(retrieved_docs, source_budget)
+
+        context_parts = []
+        if source_blocks:
+            context_parts.append("=== RELEVANT INFORMATION ===\n")
+            context_parts.extend(source_blocks)
+
+        if summary:
+            context_parts.append("=== CONVERSATION SUMMARY ===\n")
+            context_parts.append(summary)
+
+        stats.update({
+            'budget_tokens': self.max_tokens,
+            'summary_tokens': summary_tokens,
+            'history_tokens': history_tokens,
+            'history_messages': len(history),
+        })
+
+        if stats['sources_dropped'] or stats['sources_truncated']:
+            logger.info(
+                f"Context packed {stats['packed_tokens']} tokens, dropped {stats['dropped_tokens']} "
+                f"({stats['sources_truncated']} truncated, {stats['sources_dropped']} dropped)"
+            )
+
+        return "\n".join(context_parts), history, stats
@@ -0,0 +1,202 @@
+"""
+Two-tier cache for query embeddings.
+
+    local   bounded in-process LRU of float32 vectors (no network, no pickling)
+    remote  the 'embeddings' Redis cache, shared by all workers, holding
+            float32 (or float16, EMBEDDING_CACHE_DTYPE) bytes from codec
+
+Keys are built from a normalized form of the query (lowercased, whitespace
+collapsed) and the embedding model, so "Casas en  Escazú" and "casas en
+escazú" share one entry and a model change never returns stale vectors.
+Remote hits are promoted to the local tier. When Redis is absent the
+'embeddings' cache is a DummyCache and only the local tier works.
+
+Hit counters are kept per tier and process; `stats()` reports them and a
+summary is logged every STATS_LOG_INTERVAL lookups.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+from .codec import decode_vector, encode_vector
+from .retrieval_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Log the hit rates every this many lookups
+STATS_LOG_INTERVAL = 1000
+
+
+class EmbeddingCache:
+    """
+    In-process LRU in front of the shared Redis embedding cache.
+
+    Usage:
+        cache = get_embedding_cache()
+        embedding = cache.get(query)
+        if embedding is None:
+            embedding = embeddings.embed_query(query)
+            cache.set(query, embedding)
+    """
+
+    def __init__(self, max_entries: int = None, ttl: int = None, remote=None, model: str = None):
+        self.max_entries = settings.EMBEDDING_CACHE_LOCAL_SIZE if max_entries is None else max_entries
+        self.ttl = ttl or settings.EMBEDDING_CACHE_TTL_SECONDS
+        self.remote = remote or caches['embeddings']
+        self.model = model or settings.OPENAI_EMBEDDING_MODEL
+        self.dtype = settings.EMBEDDING_CACHE_DTYPE
+
+        self._local: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {'local_hits': 0, 'remote_hits': 0, 'misses': 0}
+
+    def key(self, query: str) -> str:
+        digest = hashlib.md5(normalize_query(query).encode()).hexdigest()
+        return f"emb:{self.model}:{digest}"
+
+    # ------------------------------------------------------------------
+    # Local tier
+    # ------------------------------------------------------------------
+
+    def _get_local(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._local.get(key)
+            if vector is None:
+                return None
+            self._local.move_to_end(key)
+        return vector.tolist()
+
+    def _set_local(self, key: str, vector: np.ndarray):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._local[key] = vector
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self._counts[outcome] += 1
+            lookups = sum(self._counts.values())
+        if lookups % STATS_LOG_INTERVAL == 0:
+            stats = self.stats()
+            logger.info(
+                f"Embedding cache: {lookups} lookups, local {stats['local_hit_rate']:.1%}, "
+                f"remote {stats['remote_hit_rate']:.1%}, {len(self._local)} local entries"
+            )
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get(self, query: str) -> Optional[List[float]]:
+        """Cached embedding for a query, or None."""
+        key = self.key(query)
+
+        embedding = self._get_local(key)
+        if embedding is not None:
+            self._count('local_hits')
+            return embedding
+
+        try:
+            vector = decode_vector(self.remote.get(key))
+        except Exception as e:
+            logger.warning(f"Embedding cache unavailable: {e}")
+            vector = None
+
+        if vector is None:
+            self._count('misses')
+            return None
+
+        self._set_local(key, vector)
+        self._count('remote_hits')
+        return vector.tolist()
+
+    def set(self, query: str, embedding: List[float]):
+        """Store an embedding in both tiers."""
+        key = self.key(query)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self._set_local(key, vector)
+        try:
+            self.remote.set(key, encode_vector(vector, self.dtype), timeout=self.ttl)
+        except Exception as e:
+            logger.warning(f"Embedding cache unavailable: {e}")
+
+    async def aget(self, query: str) -> Optional[List[float]]:
+        """Async version of `get`; local hits never leave the event loop."""
+        key = self.key(query)
+
+        embedding = self._get_local(key)
+        if embedding is not None:
+            self._count('local_hits')
+            return embedding
+
+        try:
+            vector = decode_vector(await self.remote.aget(key))
+        except Exception as e:
+            logger.warning(f"Embedding cache unavailable: {e}")
+            vector = None
+
+        if vector is None:
+            self._count('misses')
+            return None
+
+        self._set_local(key, vector)
+        self._count('remote_hits')
+        return vector.tolist()
+
+    async def aset(self, query: str, embedding: List[float]):
+        """Async version of `set`."""
+        key = self.key(query)
+        vector = np.asarray(embedding, dtype=np.float32)
+        self._set_local(key, vector)
+        try:
+            await self.remote.aset(key, encode_vector(vector, self.dtype), timeout=self.ttl)
+        except Exception as e:
+            logger.warning(f"Embedding cache unavailable: {e}")
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """Per-tier hit counts and rates for this process."""
+        with self._lock:
+            counts = dict(self._counts)
+            entries = len(self._local)
+        lookups = sum(counts.values())
+        return {
+            **counts,
+            'lookups': lookups,
+            'local_hit_rate': counts['local_hits'] / lookups if lookups else 0.0,
+            'remote_hit_rate': counts['remote_hits'] / lookups if lookups else 0.0,
+            'local_entries': entries,
+        }
+
+    def clear_local(self):
+        """Drop the in-process tier and reset the counters."""
+        with self._lock:
+            self._local.clear()
+            self._counts = dict.fromkeys(self._counts, 0)
+
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache (the local tier is shared by all requests)."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache()
+    return _embedding_cache
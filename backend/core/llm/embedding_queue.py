@@ -0,0 +1,130 @@
+"""
+Debounced micro-batching of post-save embeddings.
+
+Saving a property (or a whole sheet import of them) only records its id in
+an in-process buffer. A single background thread waits
+EMBEDDING_QUEUE_WINDOW_MS after the first pending id (or less, once
+EMBEDDING_QUEUE_MAX_ITEMS ids are waiting) and then hands the ids over in
+groups of at most EMBEDDING_QUEUE_MAX_ITEMS:
+
+    ENABLE_ASYNC_EMBEDDINGS=True   one `embed_objects_task` per group (Celery
+                                   retries failed batches and redelivers them
+                                   if a worker dies; worker concurrency bounds
+                                   the requests in flight)
+    ENABLE_ASYNC_EMBEDDINGS=False  embedded in the flusher thread itself, one
+                                   group at a time
+
+Each group is one batched provider call through the backfill engine
+(core/llm/backfill.py), which also skips rows whose fingerprint is current.
+Ids still buffered when a process is killed are not lost for good: they
+have no current embedding, so the next `generate_embeddings` run picks
+them up.
+"""
+
+import atexit
+import logging
+import threading
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingQueue:
+    """
+    Thread-safe buffer of ids waiting for an embedding, flushed in the background.
+
+    Usage:
+        embedding_queue.add('property', property_obj.id)  # on the request path, no API calls
+        embedding_queue.flush()                             # normally done by the flusher thread
+    """
+
+    def __init__(self, window_ms: float = None, max_items: int = None):
+        self.window = (window_ms or settings.EMBEDDING_QUEUE_WINDOW_MS) / 1000
+        self.max_items = max_items or settings.EMBEDDING_QUEUE_MAX_ITEMS
+
+        # kind -> ids, in arrival order without duplicates
+        self._pending: Dict[str, Dict[str, None]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()   # something is pending
+        self._full = threading.Event()   # a whole batch is pending
+        self._flusher = None
+
+    def add(self, kind: str, obj_id):
+        """Queue a property or document for (re-)embedding once the current transaction commits."""
+        transaction.on_commit(lambda: self._add(kind, obj_id))
+
+    def _add(self, kind: str, obj_id):
+        with self._lock:
+            self._pending.setdefault(kind, {})[str(obj_id)] = None
+            pending = sum(len(ids) for ids in self._pending.values())
+
+        self._ensure_flusher()
+        self._wake.set()
+        if pending >= self.max_items:
+            self._full.set()
+
+    def flush(self) -> int:
+        """Dispatch every buffered id. Returns the number of ids dispatched."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        dispatched = 0
+        for kind, ids in pending.items():
+            ids = list(ids)
+            for start in range(0, len(ids), self.max_items):
+                group = ids[start:start + self.max_items]
+                self._dispatch(kind, group)
+                dispatched += len(group)
+        return dispatched
+
+    def _dispatch(self, kind: str, ids: List[str]):
+        if settings.ENABLE_ASYNC_EMBEDDINGS:
+            try:
+                from apps.ingestion.tasks import embed_objects_task
+                embed_objects_task.delay(kind, ids)
+                logger.debug(f"Queued embedding of {len(ids)} {kind} rows")
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Could not queue embedding task, embedding {len(ids)} {kind} rows inline: {e}")
+
+        try:
+            from .backfill import backfill_embeddings
+            backfill_embeddings(kind, ids=ids, force=True)
+        except Exception as e:
+            logger.error(f"❌ Error embedding {len(ids)} {kind} rows: {e}", exc_info=True)
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(
+                target=self._run, name='embedding-queue-flusher', daemon=True
+            )
+            self._flusher.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            # Debounce: collect ids for one window, unless a batch fills up first
+            self._full.wait(self.window)
+            self._wake.clear()
+            self._full.clear()
+            self.flush()
+            close_old_connections()
+
+
+embedding_queue = EmbeddingQueue()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        embedding_queue.flush()
+    except Exception:
+        pass
@@ -3,14 +3,71 @@ Embedding generation for semantic search.
 Uses OpenAI embeddings API to create vector representations of property data.
 """
 
+import hashlib
 import logging
 from typing import List, Optional
 import openai
 from django.conf import settings
 
+from .clients import get_openai_client
+from .rate_limit import RateLimitExceeded, rate_limited
+
 logger = logging.getLogger(__name__)
 
 
+def embedding_fingerprint(text: str) -> str:
+    """
+    Fingerprint of the text an embedding was generated from.
+    
+    Stored next to the vector (embedding_hash) so unchanged rows are not
+    re-embedded.
+    """
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def embedding_model_tag(model: str = None, dimensions: int = None) -> str:
+    """
+    Identify the embedding model and dimension a vector was produced with.
+    
+    Stored next to the vector (embedding_model); rows with another tag are
+    stale after a model or dimension change.
+    """
+    model = model or settings.OPENAI_EMBEDDING_MODEL
+    dimensions = dimensions or settings.EMBEDDING_DIMENSIONS
+    return f"{model}:{dimensions}"
+
+
+def embedding_request_dimensions(model: str = None) -> Optional[int]:
+    """
+    `dimensions` to request from the embeddings API, so vectors match the
+    EMBEDDING_DIMENSIONS recorded in their model tag.
+    
+    None for text-embedding-ada-002, which only returns its native 1536.
+    """
+    model = model or settings.OPENAI_EMBEDDING_MODEL
+    if model == 'text-embedding-ada-002':
+        return None
+    return settings.EMBEDDING_DIMENSIONS
+
+
+def embedding_request_options(model: str = None) -> dict:
+    """Extra embeddings.create() arguments for a model."""
+    dimensions = embedding_request_dimensions(model)
+    return {'dimensions': dimensions} if dimensions else {}
+
+
+def embedding_is_current(obj, text: str) -> bool:
+    """
+    Whether a Property/Document embedding was generated from `text` with the
+    current embedding model and dimension.
+    """
+    return (
+        obj.embedding is not None
+        and obj.embedding_model == embedding_model_tag()
+        and obj.embedding_hash == embedding_fingerprint(text)
+    )
+
+
 def generate_embedding(text: str) -> Optional[List[float]]:
     """
     Generate embedding vector for given text using OpenAI API.
@@ -31,7 +88,7 @@ def generate_embedding(text: str) -> Optional[List[float]]:
             logger.error("OPENAI_API_KEY not configured")
             return None
         
-        client = openai.OpenAI(api_key=api_key)
+        client = get_openai_client()
         
         # Get embedding model from settings (default to text-embedding-3-small)
         model = getattr(settings, 'OPENAI_EMBEDDING_MODEL', 'text-embedding-3-small')
@@ -45,10 +102,13 @@ def generate_embedding(text: str) -> Optional[List[float]]:
             text = text[:32000]
         
         # Call OpenAI API
-        response = client.embeddings.create(
-            model=model,
-            input=text
-        )
+        from .context import count_tokens
+        with rate_limited(model, count_tokens(text, model)):
+            response = client.embeddings.create(
+                model=model,
+                input=text,
+                **embedding_request_options(model)
+            )
         
         # Extract embedding vector
         embedding = response.data[0].embedding
@@ -68,7 +128,7 @@ def generate_embedding(text: str) -> Optional[List[float]]:
 def generate_property_embedding(property_obj) -> Optional[List[float]]:
     """
     Generate embedding for a Property object.
-    Combines all relevant text fields into searchable content.
+    Embeds the stored property card (see Property.generate_search_content).
     
     Args:
         property_obj: Property model instance
@@ -77,47 +137,8 @@ def generate_property_embedding(property_obj) -> Optional[List[float]]:
         Embedding vector or None
     """
     try:
-        # Build comprehensive text for embedding
-        parts = []
-        
-        # Property name and description
-        if property_obj.property_name:
-            parts.append(f"Property: {property_obj.property_name}")
-        
-        if property_obj.description:
-            parts.append(f"Description: {property_obj.description}")
-        
-        # Location info
-        if property_obj.location:
-            parts.append(f"Location: {property_obj.location}")
-        
-        # Property details
-        if property_obj.property_type:
-            parts.append(f"Type: {property_obj.property_type}")
-        
-        if property_obj.bedrooms:
-            parts.append(f"Bedrooms: {property_obj.bedrooms}")
-        
-        if property_obj.bathrooms:
-            parts.append(f"Bathrooms: {property_obj.bathrooms}")
-        
-        if property_obj.square_meters:
-            parts.append(f"Area: {property_obj.square_meters} m²")
-        
-        if property_obj.lot_size_m2:
-            parts.append(f"Lot size: {property_obj.lot_size_m2} m²")
-        
-        # Price
-        if property_obj.price_usd:
-            parts.append(f"Price: ${property_obj.price_usd:,.2f} USD")
-        
-        # Amenities
-        if property_obj.amenities:
-            amenities_text = ", ".join(property_obj.amenities)
-            parts.append(f"Amenities: {amenities_text}")
-        
-        # Combine all parts
-        text = "\n".join(parts)
+        # Stored property card (re-rendered only when stale)
+        text = property_obj.get_card()
         
         logger.info(f"Generating embedding for property: {property_obj.property_name}")
         logger.info(f"Combined text length: {len(text)} chars")
@@ -130,7 +151,8 @@ def generate_property_embedding(property_obj) -> Optional[List[float]]:
         return None
 
 
-def batch_generate_embeddings(texts: List[str], model: str = None) -> List[Optional[List[float]]]:
+def batch_generate_embeddings(texts: List[str], model: str = None, tokens: int = None,
+                              max_wait: float = None) -> List[Optional[List[float]]]:
     """
     Generate embeddings for multiple texts in a single API call.
     More efficient for bulk operations.
@@ -138,9 +160,14 @@ def batch_generate_embeddings(texts: List[str], model: str = None) -> List[Optio
     Args:
         texts: List of text strings to embed
         model: Embedding model to use (optional)
+        tokens: Token count of the texts, if already known (counted otherwise)
+        max_wait: Longest wait for rate limit capacity (default LLM_RATE_LIMIT_MAX_WAIT)
         
     Returns:
         List of embedding vectors (same order as input)
+    
+    Raises:
+        RateLimitExceeded: If the embedding model's rate limit has no room within max_wait
     """
     if not texts:
         return []
@@ -151,7 +178,7 @@ def batch_generate_embeddings(texts: List[str], model: str = None) -> List[Optio
             logger.error("OPENAI_API_KEY not configured")
             return [None] * len(texts)
         
-        client = openai.OpenAI(api_key=api_key)
+        client = get_openai_client()
         
         if not model:
             model = getattr(settings, 'OPENAI_EMBEDDING_MODEL', 'text-embedding-3-small')
@@ -170,11 +197,17 @@ def batch_generate_embeddings(texts: List[str], model: str = None) -> List[Optio
             logger.warning("No valid texts to embed")
             return [None] * len(texts)
         
+        if tokens is None:
+            from .context import count_tokens
+            tokens = sum(count_tokens(text, model) for text in valid_texts)
+        
         # Call OpenAI API with batch
-        response = client.embeddings.create(
-            model=model,
-            input=valid_texts
-        )
+        with rate_limited(model, tokens, max_wait):
+            response = client.embeddings.create(
+                model=model,
+                input=valid_texts,
+                **embedding_request_options(model)
+            )
         
         # Build result list with None for invalid texts
         results = [None] * len(texts)
@@ -186,6 +219,8 @@ def batch_generate_embeddings(texts: List[str], model: str = None) -> List[Optio
         
         return results
         
+    except RateLimitExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error in batch embedding generation: {e}", exc_info=True)
         return [None] * len(texts)
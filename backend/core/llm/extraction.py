@@ -7,11 +7,12 @@ import logging
 from typing import Dict, Optional
 from decimal import Decimal
 
-import openai
 from django.conf import settings
 from django.utils import timezone
 
+from .clients import get_openai_client
 from .prompts import PROPERTY_EXTRACTION_PROMPT
+from .rate_limit import RateLimitExceeded, estimate_chat_tokens, rate_limited
 
 from .schemas import PropertyData
 
@@ -36,7 +37,7 @@ class PropertyExtractor:
             logger.error("❌ OPENAI_API_KEY is empty! Check environment variables.")
             raise ValueError("OPENAI_API_KEY environment variable is not set")
         
-        self.client = openai.OpenAI(api_key=api_key)
+        self.client = get_openai_client()
         self.model = settings.OPENAI_MODEL_CHAT
         self.max_tokens = settings.OPENAI_MAX_TOKENS
         self.temperature = 0.1  # Low temperature for consistent extraction
@@ -104,19 +105,21 @@ class PropertyExtractor:
         
         return combined
     
-    def extract_from_html(self, html: str, url: Optional[str] = None) -> Dict:
+    def extract_from_html(self, html: str, url: Optional[str] = None, max_wait: float = None) -> Dict:
         """
         Extract property data from HTML content.
         
         Args:
             html: HTML content to extract from
             url: Optional source URL
+            max_wait: Longest wait for rate limit capacity (default LLM_RATE_LIMIT_MAX_WAIT)
             
         Returns:
             Dictionary with extracted property data
             
         Raises:
             ExtractionError: If extraction fails
+            RateLimitExceeded: If the model's rate limit has no room within max_wait
         """
         
         # Clean content
@@ -130,14 +133,16 @@ class PropertyExtractor:
         try:
             logger.info("Starting LLM property extraction with Structured Outputs...")
             
-            completion = self.client.beta.chat.completions.parse(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a data extraction specialist. Extract the following property information."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format=PropertyData,
-            )
+            messages = [
+                {"role": "system", "content": "You are a data extraction specialist. Extract the following property information."},
+                {"role": "user", "content": prompt}
+            ]
+            with rate_limited(self.model, estimate_chat_tokens(messages, self.max_tokens), max_wait):
+                completion = self.client.beta.chat.completions.parse(
+                    model=self.model,
+                    messages=messages,
+                    response_format=PropertyData,
+                )
             
             # Extract parsed Pydantic model
             property_data = completion.choices[0].message.parsed
@@ -175,6 +180,8 @@ class PropertyExtractor:
             
             return validated_data
             
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Unexpected extraction error: {e}")
             raise ExtractionError(f"Extraction failed: {str(e)}")
@@ -222,7 +229,7 @@ class PropertyExtractor:
         raise last_error
 
 
-def extract_property_data(content: str, url: Optional[str] = None) -> Dict:
+def extract_property_data(content: str, url: Optional[str] = None, max_wait: float = None) -> Dict:
     """
     Convenience function to extract property data.
     
@@ -232,4 +239,4 @@ def extract_property_data(content: str, url: Optional[str] = None) -> Dict:
         price = data['price_usd']
     """
     extractor = PropertyExtractor()
-    return extractor.extract_from_html(content, url=url)
+    return extractor.extract_from_html(content, url=url, max_wait=max_wait)
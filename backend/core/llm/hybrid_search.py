@@ -0,0 +1,218 @@
+"""
+Hybrid (vector + full-text) retrieval with reciprocal-rank fusion.
+
+On PostgreSQL with pgvector the whole retrieval is one SQL statement: vector
+and full-text candidates for documents and properties are gathered in CTEs,
+fused with RRF and joined back to their rows. Elsewhere the same fusion runs
+in Python over the results of the vector backend and keyword search.
+
+Fusion uses ranks, not raw scores, so cosine similarities and ts_rank values
+never get added together:
+
+    rrf = alpha / (RRF_K + vector_rank) + (1 - alpha) / (RRF_K + keyword_rank)
+
+The result is rescaled by (RRF_K + 1) so an item ranked first in both lists
+scores 1.0. Parsed query constraints (see query_filters) are added to both
+property subqueries, so only qualifying listings are ranked.
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from apps.documents.models import Document
+from apps.properties.models import Property
+from .query_filters import QueryFilters
+
+logger = logging.getLogger(__name__)
+
+# Columns never needed to build a retrieval result
+_EXCLUDED_COLUMNS = ('embedding', 'raw_html', 'search_vector')
+
+HYBRID_SEARCH_SQL = """
+SET LOCAL hnsw.ef_search = %(ef_search)s;
+SET LOCAL ivfflat.probes = %(probes)s;
+WITH
+tsq AS (
+    SELECT websearch_to_tsquery('spanish', immutable_unaccent(%(query)s))
+           || websearch_to_tsquery('english', immutable_unaccent(%(query)s)) AS q
+),
+vec AS (
+    SELECT type, id, score, row_number() OVER (ORDER BY score DESC) AS rank
+    FROM (
+        (SELECT 'document' AS type, id, 1 - (embedding <=> %(embedding)s::vector) AS score
+         FROM documents
+         WHERE tenant_id = %(tenant_id)s AND is_active AND embedding IS NOT NULL
+           AND %(role)s = ANY(user_roles)
+         ORDER BY embedding <=> %(embedding)s::vector
+         LIMIT %(candidates)s)
+        UNION ALL
+        (SELECT 'property' AS type, id, 1 - (embedding <=> %(embedding)s::vector) AS score
+         FROM properties
+         WHERE tenant_id = %(tenant_id)s AND is_active AND embedding IS NOT NULL
+           AND %(role)s = ANY(user_roles){vector_property_filters}
+         ORDER BY embedding <=> %(embedding)s::vector
+         LIMIT %(candidates)s)
+    ) v
+),
+kw AS (
+    SELECT type, id, score, row_number() OVER (ORDER BY score DESC) AS rank
+    FROM (
+        (SELECT 'document' AS type, d.id, ts_rank(d.search_vector, q, 32) AS score
+         FROM documents d, tsq
+         WHERE d.tenant_id = %(tenant_id)s AND d.is_active
+           AND %(role)s = ANY(d.user_roles)
+           AND d.passage_count = 0
+           AND d.search_vector @@ q
+         ORDER BY score DESC
+         LIMIT %(candidates)s)
+        UNION ALL
+        (SELECT 'property' AS type, p.id, ts_rank(p.search_vector, q, 32) AS score
+         FROM properties p, tsq
+         WHERE p.tenant_id = %(tenant_id)s AND p.is_active
+           AND %(role)s = ANY(p.user_roles)
+           AND p.search_vector @@ q{keyword_property_filters}
+         ORDER BY score DESC
+         LIMIT %(candidates)s)
+    ) k
+),
+fused AS (
+    SELECT coalesce(vec.type, kw.type) AS type,
+           coalesce(vec.id, kw.id) AS id,
+           coalesce(vec.score, 0) AS vector_score,
+           coalesce(kw.score, 0) AS keyword_score,
+           (coalesce(%(alpha)s / (%(rrf_k)s + vec.rank), 0)
+            + coalesce((1 - %(alpha)s) / (%(rrf_k)s + kw.rank), 0)) * (%(rrf_k)s + 1) AS relevance_score
+    FROM vec FULL OUTER JOIN kw ON vec.type = kw.type AND vec.id = kw.id
+    ORDER BY relevance_score DESC
+    LIMIT %(k)s
+)
+SELECT f.type, f.vector_score, f.keyword_score, f.relevance_score,
+       CASE WHEN f.type = 'document'
+            THEN to_jsonb(d) - 'embedding' - 'search_vector'
+            ELSE to_jsonb(p) - 'embedding' - 'raw_html' - 'search_vector'
+       END AS row
+FROM fused f
+LEFT JOIN documents d ON f.type = 'document' AND d.id = f.id
+LEFT JOIN properties p ON f.type = 'property' AND p.id = f.id
+ORDER BY f.relevance_score DESC
+"""
+
+
+def _instance_from_row(model, row: Dict):
+    """
+    Build a model instance from a to_jsonb() row without another query.
+
+    Excluded columns (embedding, raw_html, ...) are left deferred, so they
+    are only loaded if something actually reads them.
+    """
+    field_names = []
+    values = []
+    for field in model._meta.concrete_fields:
+        if field.column in _EXCLUDED_COLUMNS or field.column not in row:
+            continue
+        field_names.append(field.attname)
+        values.append(field.to_python(row[field.column]))
+
+    return model.from_db(connection.alias, field_names, values)
+
+
+def hybrid_search_sql(tenant_id: str, user_role: str, query: str,
+                      query_embedding: List[float], k: int,
+                      candidates: int, filters: Optional[QueryFilters] = None) -> List[Dict]:
+    """
+    Run vector + keyword retrieval and RRF fusion in a single statement.
+
+    Properties are restricted by `filters` before ranking.
+
+    Returns:
+        List of dicts with object, type, vector_score, keyword_score and
+        relevance_score, best first
+    """
+    params = {
+        'tenant_id': str(tenant_id),
+        'role': user_role,
+        'query': query,
+        'embedding': '[' + ','.join(repr(float(x)) for x in query_embedding) + ']',
+        'candidates': candidates,
+        'k': k,
+        'alpha': float(settings.HYBRID_SEARCH_ALPHA),
+        'rrf_k': float(settings.RRF_K),
+        'ef_search': int(settings.PGVECTOR_HNSW_EF_SEARCH),
+        'probes': int(settings.PGVECTOR_IVFFLAT_PROBES),
+    }
+
+    filters = filters or QueryFilters()
+    vector_filters, filter_params = filters.as_sql()
+    keyword_filters, _ = filters.as_sql('p')
+    params.update(filter_params)
+    sql = HYBRID_SEARCH_SQL.format(
+        vector_property_filters=vector_filters,
+        keyword_property_filters=keyword_filters
+    )
+
+    models = {'document': Document, 'property': Property}
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+    fused = []
+    for obj_type, vector_score, keyword_score, relevance_score, row in rows:
+        if row is None:
+            continue
+        fused.append({
+            'object': _instance_from_row(models[obj_type], row),
+            'type': obj_type,
+            'vector_score': float(vector_score),
+            'keyword_score': float(keyword_score),
+            'relevance_score': float(relevance_score),
+        })
+
+    return fused
+
+
+def reciprocal_rank_fusion(vector_results: List[Tuple[any, float, str]],
+                           keyword_results: List[Tuple[any, float, str]],
+                           k: int) -> List[Dict]:
+    """
+    Fuse ranked (object, score, type) lists with RRF in Python.
+
+    Same formula and output shape as `hybrid_search_sql`; both input lists
+    must be sorted best first.
+    """
+    alpha = settings.HYBRID_SEARCH_ALPHA
+    rrf_k = settings.RRF_K
+
+    fused = {}
+
+    for rank, (obj, score, obj_type) in enumerate(vector_results, 1):
+        key = (obj_type, obj.id)
+        fused[key] = {
+            'object': obj,
+            'type': obj_type,
+            'vector_score': score,
+            'keyword_score': 0.0,
+            'relevance_score': alpha / (rrf_k + rank),
+        }
+
+    for rank, (obj, score, obj_type) in enumerate(keyword_results, 1):
+        key = (obj_type, obj.id)
+        entry = fused.setdefault(key, {
+            'object': obj,
+            'type': obj_type,
+            'vector_score': 0.0,
+            'keyword_score': 0.0,
+            'relevance_score': 0.0,
+        })
+        entry['keyword_score'] = score
+        entry['relevance_score'] += (1 - alpha) / (rrf_k + rank)
+
+    results = sorted(fused.values(), key=lambda x: x['relevance_score'], reverse=True)[:k]
+    for entry in results:
+        entry['relevance_score'] *= (rrf_k + 1)
+
+    return results
@@ -352,3 +352,39 @@ Now extract the property information from the following content:
 ---
 
 Return ONLY the JSON object, no additional text or explanation."""
+
+
+# Rolling conversation summary prompt
+CONVERSATION_SUMMARY_PROMPT = """You maintain a running summary of a real estate chat between a user and an assistant.
+
+Update the existing summary with the new messages. Keep:
+- What the user is looking for (budget, location, property type, bedrooms, timeline)
+- Specific properties, prices and facts the assistant already gave
+- Open questions or follow-ups the user asked for
+
+Drop greetings and small talk. Write in the language of the conversation, in at most {max_words} words.
+
+**Existing summary:**
+{summary}
+
+**New messages:**
+{messages}
+
+Return ONLY the updated summary."""
+
+
+# Templated answers for routes that skip retrieval and the LLM (see core/llm/router.py)
+ROUTE_TEMPLATES = {
+    'greeting': (
+        "Hello! I can help you with Costa Rica properties: prices, locations, features, "
+        "comparisons and investment questions. What are you looking for?\n\n"
+        "¡Hola! Puedo ayudarte con propiedades en Costa Rica: precios, ubicaciones, "
+        "características, comparaciones e inversión. ¿Qué estás buscando?"
+    ),
+    'out_of_scope': (
+        "Sorry, I can only help with questions about our properties and the Costa Rica "
+        "real estate market.\n\n"
+        "Lo siento, solo puedo ayudarte con preguntas sobre nuestras propiedades y el "
+        "mercado inmobiliario de Costa Rica."
+    ),
+}
@@ -0,0 +1,382 @@
+"""
+Rule-based extraction of hard listing constraints from buyer questions.
+
+Understands English and Spanish phrasing for:
+
+    price       "under $450k", "between 200 and 300 thousand dollars",
+                "hasta 1,5 millones", "presupuesto de 250 mil"
+    bedrooms    "3 bedrooms", "at least two beds", "3+ br", "tres habitaciones",
+                "2 to 3 bedrooms", "de 2 a 3 habitaciones", "2-3 br", "2 o 3 cuartos"
+    type        house/casa, condo/condominio, villa, land/lote/terreno,
+                commercial/comercial, apartment/apartamento
+    location    any town or area that appears in the tenant's listings
+
+The result becomes indexed SQL filters on `price_usd`, `bedrooms`,
+`property_type` and `location`, applied to properties before similarity
+ranking (documents are never filtered). Matching is deliberately
+conservative: a number is only read as a price next to a comparator and a
+currency, magnitude or price word, so nothing is filtered on a guess.
+"""
+
+import logging
+import re
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.core.cache import caches
+from django.db.models import Q
+
+from apps.properties.models import Property, PropertyType
+from core.utils.full_text import strip_accents
+
+logger = logging.getLogger(__name__)
+
+# Shortest place name matched against queries (skips "CR", "SJ", ...)
+MIN_LOCATION_LENGTH = 4
+
+NUMBER_WORDS = {
+    'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+    'un': 1, 'una': 1, 'uno': 1, 'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5,
+    'seis': 6, 'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10,
+}
+
+MAGNITUDES = {
+    'k': 1_000, 'mil': 1_000, 'thousand': 1_000,
+    'm': 1_000_000, 'mm': 1_000_000, 'million': 1_000_000, 'millions': 1_000_000,
+    'millon': 1_000_000, 'millones': 1_000_000,
+}
+
+PROPERTY_TYPE_WORDS = {
+    PropertyType.HOUSE: ('house', 'houses', 'casa', 'casas'),
+    PropertyType.CONDO: ('condo', 'condos', 'condominium', 'condominiums', 'condominio', 'condominios'),
+    PropertyType.VILLA: ('villa', 'villas'),
+    PropertyType.LAND: ('land', 'terreno', 'terrenos', 'lote', 'lotes', 'finca', 'fincas'),
+    PropertyType.COMMERCIAL: ('commercial', 'comercial', 'comerciales'),
+    PropertyType.APARTMENT: ('apartment', 'apartments', 'apartamento', 'apartamentos',
+                             'departamento', 'departamentos'),
+}
+
+# Abbreviated magnitudes must touch the number ("450k", "1.2m"), so that
+# "300 m de la playa" is read as meters, not millions
+SHORT_MAGNITUDES = ('k', 'm', 'mm')
+
+_NUMBER = r'\d[\d.,]*|' + '|'.join(NUMBER_WORDS)
+
+# Amount with optional currency and magnitude ("$1.2m", "450,000 usd", "300 mil dolares").
+# A magnitude must end the word, so "5km" and "3 miles" are not read as thousands
+_AMOUNT = (
+    r'(?:us\$|\$|usd\s*)?\s*(?P<{n}>\d[\d.,]*)\s*'
+    r'(?P<{n}_mag>(?:millones|millon|millions|million|thousand|mil|mm|k|m)(?![a-z²0-9]))?'
+    r'\s*(?P<{n}_cur>usd|us\$|dollars?|dolares|dolar)?'
+)
+
+_MAX_WORDS = (
+    r'under|below|less than|no more than|not more than|max(?:imum)?|up to|at most|within|'
+    r'budget of|budget is|budget|menos de|hasta|maximo|no mas de|por debajo de|inferior a|'
+    r'presupuesto de|presupuesto es|presupuesto'
+)
+_MIN_WORDS = (
+    r'over|above|more than|at least|min(?:imum)?|starting at|from|'
+    r'mas de|desde|a partir de|minimo|al menos|superior a|arriba de|por encima de'
+)
+
+_PRICE_RANGE = re.compile(
+    r'\b(?:between|entre|from|de)\s+' + _AMOUNT.format(n='low') + r'\s+(?:and|to|y|a|-)\s+' + _AMOUNT.format(n='high')
+)
+_PRICE_MAX = re.compile(r'\b(?:' + _MAX_WORDS + r')\s*(?:of\s+|de\s+|:\s*)?' + _AMOUNT.format(n='amount'))
+_PRICE_MIN = re.compile(r'\b(?:' + _MIN_WORDS + r')\s*(?:of\s+|de\s+)?' + _AMOUNT.format(n='amount'))
+_PRICE_WORDS = re.compile(
+    r'\b(?:price|prices|priced|cost|costs|budget|afford|precio|precios|cuesta|cuestan|'
+    r'presupuesto|valor|dolares|dollars|usd)\b|\$'
+)
+
+# Units that make a number an area, not a price ("under 2000 m2")
+_AREA_UNIT = re.compile(r'\s*(?:m2|sq|square|metros?|meters?|mts?|ft|feet|acres?|hectareas?|ha|varas?)\b')
+
+_BEDROOM_WORDS = (
+    r'bed(?:room)?s?|br|bd|habitaci(?:o|on|ones)|cuartos?|recamaras?|dormitorios?|alcobas?'
+)
+_BEDROOMS = re.compile(
+    r'\b(?P<prefix>at least|minimum of|min|al menos|minimo|desde|a partir de|mas de|more than|'
+    r'up to|at most|hasta|maximo)?\s*(?P<count>' + _NUMBER + r')\s*(?P<plus>\+|or more|o mas)?\s*'
+    r'(?:-\s*)?(?:' + _BEDROOM_WORDS + r')\b'
+)
+# "2 to 3 bedrooms", "between two and three beds", "de 2 a 3 habitaciones", "2-3 br", "2 o 3 cuartos"
+_BEDROOM_RANGE = re.compile(
+    r'\b(?:between\s+|entre\s+|from\s+|de\s+|desde\s+)?(?P<low>' + _NUMBER + r')'
+    r'(?:\s*-\s*|\s+(?:to|and|or|a|y|o)\s+)(?P<high>' + _NUMBER + r')\s*'
+    r'(?:-\s*)?(?:' + _BEDROOM_WORDS + r')\b'
+)
+
+
+@dataclass
+class QueryFilters:
+    """Hard property constraints parsed from one query."""
+    min_price: Optional[Decimal] = None
+    max_price: Optional[Decimal] = None
+    min_bedrooms: Optional[int] = None
+    max_bedrooms: Optional[int] = None
+    property_types: List[str] = field(default_factory=list)
+    locations: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return any(value not in (None, []) for value in asdict(self).values())
+
+    def as_metadata(self) -> Dict:
+        return {
+            name: float(value) if isinstance(value, Decimal) else value
+            for name, value in asdict(self).items()
+            if value not in (None, [])
+        }
+
+    def as_q(self) -> Q:
+        """ORM condition for the Property model."""
+        q = Q()
+        if self.min_price is not None:
+            q &= Q(price_usd__gte=self.min_price)
+        if self.max_price is not None:
+            q &= Q(price_usd__lte=self.max_price)
+        if self.min_bedrooms is not None:
+            q &= Q(bedrooms__gte=self.min_bedrooms)
+        if self.max_bedrooms is not None:
+            q &= Q(bedrooms__lte=self.max_bedrooms)
+        if self.property_types:
+            q &= Q(property_type__in=self.property_types)
+        if self.locations:
+            location_q = Q()
+            for location in self.locations:
+                location_q |= Q(location__icontains=location)
+            q &= location_q
+        return q
+
+    def as_sql(self, alias: str = '') -> Tuple[str, Dict]:
+        """
+        Raw SQL condition (prefixed with AND) and params for `hybrid_search_sql`.
+
+        Args:
+            alias: Table alias of the properties table, e.g. 'p'
+        """
+        column = f"{alias}." if alias else ''
+        conditions = []
+        params = {}
+
+        if self.min_price is not None:
+            conditions.append(f"{column}price_usd >= %(filter_min_price)s")
+            params['filter_min_price'] = self.min_price
+        if self.max_price is not None:
+            conditions.append(f"{column}price_usd <= %(filter_max_price)s")
+            params['filter_max_price'] = self.max_price
+        if self.min_bedrooms is not None:
+            conditions.append(f"{column}bedrooms >= %(filter_min_bedrooms)s")
+            params['filter_min_bedrooms'] = self.min_bedrooms
+        if self.max_bedrooms is not None:
+            conditions.append(f"{column}bedrooms <= %(filter_max_bedrooms)s")
+            params['filter_max_bedrooms'] = self.max_bedrooms
+        if self.property_types:
+            conditions.append(f"{column}property_type = ANY(%(filter_property_types)s)")
+            params['filter_property_types'] = list(self.property_types)
+        if self.locations:
+            conditions.append(f"{column}location ILIKE ANY(%(filter_locations)s)")
+            params['filter_locations'] = [f"%{location}%" for location in self.locations]
+
+        sql = ''.join(f" AND {condition}" for condition in conditions)
+        return sql, params
+
+
+def _parse_number(text: str) -> Optional[Decimal]:
+    """
+    Parse "1,500,000", "1.500.000", "1.5", "1,5", "450" or a number word.
+
+    With both separators the last one is the decimal mark; a lone separator
+    followed by exactly three digits is a thousands separator.
+    """
+    if text in NUMBER_WORDS:
+        return Decimal(NUMBER_WORDS[text])
+
+    text = text.rstrip('.,')
+    if not text:
+        return None
+
+    if '.' in text and ',' in text:
+        decimal_mark = '.' if text.rfind('.') > text.rfind(',') else ','
+        thousands = ',' if decimal_mark == '.' else '.'
+        text = text.replace(thousands, '').replace(decimal_mark, '.')
+    else:
+        for separator in ('.', ','):
+            if separator in text:
+                parts = text.split(separator)
+                if len(parts) > 2 or len(parts[-1]) == 3:
+                    text = text.replace(separator, '')
+                else:
+                    text = text.replace(separator, '.')
+
+    try:
+        return Decimal(text)
+    except ArithmeticError:
+        return None
+
+
+def _amount(match, name: str, price_context: bool) -> Optional[Decimal]:
+    """Read a matched amount as USD, or None if it doesn't look like a price."""
+    value = _parse_number(match.group(name))
+    if value is None or _AREA_UNIT.match(match.string, match.end(name)):
+        return None
+
+    magnitude = match.group(f'{name}_mag')
+    has_currency = '$' in match.group(0) or match.group(f'{name}_cur') or 'usd' in match.group(0)
+    if magnitude in SHORT_MAGNITUDES and match.start(f'{name}_mag') != match.end(name) and not has_currency:
+        return None
+    if magnitude:
+        value *= MAGNITUDES[magnitude]
+
+    if not (magnitude or has_currency or (price_context and value >= 1000)):
+        return None
+    return value
+
+
+def _parse_price(text: str, filters: QueryFilters):
+    price_context = bool(_PRICE_WORDS.search(text))
+
+    for match in _PRICE_RANGE.finditer(text):
+        low = _amount(match, 'low', price_context)
+        high_magnitude = match.group('high_mag')
+        if low is None and high_magnitude and not match.group('low_mag'):
+            # "between 200 and 300 thousand": the magnitude applies to both ends
+            value = _parse_number(match.group('low'))
+            low = value * MAGNITUDES[high_magnitude] if value is not None else None
+        high = _amount(match, 'high', price_context)
+        if low is not None and high is not None and low <= high:
+            filters.min_price, filters.max_price = low, high
+            return
+
+    match = _PRICE_MAX.search(text)
+    if match:
+        filters.max_price = _amount(match, 'amount', price_context)
+
+    match = _PRICE_MIN.search(text)
+    if match:
+        filters.min_price = _amount(match, 'amount', price_context)
+
+
+def _bedroom_count(text: str) -> Optional[int]:
+    """Parse a bedroom count, or None unless it is a whole number from 1 to 20."""
+    count = _parse_number(text)
+    if count is None or count != int(count) or not 0 < count <= 20:
+        return None
+    return int(count)
+
+
+def _parse_bedrooms(text: str, filters: QueryFilters) -> str:
+    """Set bedroom bounds and return the text with the match removed."""
+    match = _BEDROOM_RANGE.search(text)
+    if match:
+        low, high = _bedroom_count(match.group('low')), _bedroom_count(match.group('high'))
+        if low is not None and high is not None:
+            filters.min_bedrooms, filters.max_bedrooms = min(low, high), max(low, high)
+            return text[:match.start()] + ' ' + text[match.end():]
+
+    match = _BEDROOMS.search(text)
+    if not match:
+        return text
+
+    count = _bedroom_count(match.group('count'))
+    if count is None:
+        return text
+
+    prefix = match.group('prefix') or ''
+    if prefix in ('up to', 'at most', 'hasta', 'maximo'):
+        filters.max_bedrooms = count
+    elif prefix in ('mas de', 'more than'):
+        filters.min_bedrooms = count + 1
+    elif prefix or match.group('plus'):
+        filters.min_bedrooms = count
+    else:
+        filters.min_bedrooms = filters.max_bedrooms = count
+
+    return text[:match.start()] + ' ' + text[match.end():]
+
+
+def _parse_property_types(query: str, filters: QueryFilters):
+    """
+    Match type words on the original casing, skipping ones that start a
+    proper name ("Villa Mar", "Casa Luna").
+    """
+    for property_type, words in PROPERTY_TYPE_WORDS.items():
+        pattern = re.compile(r'\b(?:' + '|'.join(words) + r')\b(?!\s+(?-i:[A-Z]))', re.IGNORECASE)
+        if pattern.search(query):
+            filters.property_types.append(property_type)
+
+
+def get_location_names(tenant_id) -> List[str]:
+    """
+    Distinct place names in a tenant's active listings.
+
+    "Tamarindo, Guanacaste" contributes "Tamarindo" and "Guanacaste". Cached
+    per inventory version, so new listings are picked up on the next query.
+    """
+    from .retrieval_cache import get_inventory_version
+
+    cache = caches['default']
+    version = get_inventory_version(tenant_id, cache)
+    cache_key = f"property_locations:{tenant_id}:v{version}" if version is not None else None
+
+    names = cache.get(cache_key) if cache_key else None
+    if names is not None:
+        return names
+
+    locations = Property.objects.filter(
+        tenant_id=tenant_id, is_active=True, location__isnull=False
+    ).values_list('location', flat=True).distinct()
+
+    names = set()
+    for location in locations:
+        for part in re.split(r'[,;/()]', location):
+            part = part.strip()
+            if len(part) >= MIN_LOCATION_LENGTH:
+                names.add(part)
+
+    names = sorted(names, key=len, reverse=True)
+    if cache_key:
+        cache.set(cache_key, names, timeout=3600)
+    return names
+
+
+def _parse_locations(text: str, tenant_id, filters: QueryFilters):
+    for name in get_location_names(tenant_id):
+        pattern = r'\b' + re.escape(strip_accents(name).lower()) + r'\b'
+        if re.search(pattern, text):
+            filters.locations.append(name)
+            # Don't also match "Santa" after "Santa Ana"
+            text = re.sub(pattern, ' ', text)
+
+
+def parse_query_filters(query: str, tenant_id=None) -> QueryFilters:
+    """
+    Extract hard property constraints from a query.
+
+    Args:
+        query: User question (English or Spanish)
+        tenant_id: Tenant whose listing locations are recognised; locations
+            are skipped without it
+
+    Returns:
+        QueryFilters, falsy when nothing was recognised
+    """
+    filters = QueryFilters()
+    text = strip_accents(query).lower()
+
+    try:
+        text = _parse_bedrooms(text, filters)
+        _parse_price(text, filters)
+        _parse_property_types(strip_accents(query), filters)
+        if tenant_id is not None:
+            _parse_locations(text, tenant_id, filters)
+    except Exception as e:
+        logger.warning(f"Query filter parsing failed, searching unfiltered: {e}")
+        return QueryFilters()
+
+    if filters:
+        logger.info(f"🔎 Query filters {filters.as_metadata()} for: {query[:80]}")
+    return filters
@@ -3,83 +3,133 @@ RAG (Retrieval Augmented Generation) pipeline using LangChain.
 Implements hybrid search, semantic caching, and role-based filtering.
 """
 
-import hashlib
+import asyncio
 import logging
+import re
+import time
 from typing import List, Dict, Optional, Tuple
-from decimal import Decimal
 
 import numpy as np
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.cache import caches
-from django.db.models import Q
-from pgvector.django import CosineDistance
+from django.db import close_old_connections
+from django.db.models import F, Q
 
-from langchain_openai import OpenAIEmbeddings
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 
 from apps.documents.models import Document
 from apps.properties.models import Property
 from apps.conversations.models import Conversation, Message
+from core.utils.full_text import build_search_query, full_text_available
+from .clients import get_chat_model, get_embeddings
+from .context import ContextPacker, count_tokens
+from .embedding_cache import get_embedding_cache
 from .prompts import get_system_prompt
+from .query_filters import QueryFilters, parse_query_filters
+from .rate_limit import RateLimitExceeded, arate_limited, estimate_chat_tokens, rate_limited
+from .hybrid_search import hybrid_search_sql, reciprocal_rank_fusion
+from .retrieval_cache import RetrievalCache
+from .retrieval_stats import retrieval_stats
+from .router import RouteDecision, get_query_router
+from .semantic_cache import SemanticCache
+from .summarization import unsummarized_messages
+from .timing import StageTimings
+from .vector_search import get_vector_backend
 
 logger = logging.getLogger(__name__)
 
+# Size of the content chunks used to replay cached answers on streams
+CACHE_REPLAY_CHUNK_CHARS = 48
+
 
 class RAGError(Exception):
     """Base exception for RAG errors."""
     pass
 
 
+def _db_call(func):
+    """
+    Wrap a blocking ORM function for use from async code.
+    
+    Runs in a pool thread rather than the single thread-sensitive executor,
+    so several queries can be in flight at once. Each pool thread keeps its
+    own persistent connection (CONN_MAX_AGE); stale ones are closed after use.
+    """
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def _add_usage(total: Dict, chunk) -> Dict:
+    """Add the token usage reported on a streamed chunk to a running total."""
+    usage = getattr(chunk, 'usage_metadata', None) or {}
+    for key in ('input_tokens', 'output_tokens'):
+        total[key] = total.get(key, 0) + (usage.get(key) or 0)
+    return total
+
+
+def _token_usage(usage: Optional[Dict], messages: List, response_text: str) -> Tuple[int, int]:
+    """
+    (input, output) token counts reported by the provider.
+    
+    Counted locally with tiktoken when the provider reported none.
+    """
+    if usage and usage.get('input_tokens'):
+        return usage['input_tokens'], usage.get('output_tokens') or 0
+    
+    input_tokens = sum(count_tokens(str(message.content)) for message in messages)
+    return input_tokens, count_tokens(response_text)
+
+
 class RAGPipeline:
     """
     Complete RAG pipeline with:
     - Hybrid vector + keyword search
     - Semantic caching
     - Role-based filtering
-    - LLM routing (GPT-4o-mini vs Claude)
+    - Embedding-based LLM routing (GPT-4o-mini vs Claude, or a templated answer)
     - Citation tracking
+    
+    `aquery` / `aquery_stream` are the async equivalents of `query` /
+    `query_stream` for ASGI: retrieval stages that don't depend on each
+    other run concurrently.
     """
     
     def __init__(self, tenant_id: str, user_role: str):
         self.tenant_id = tenant_id
         self.user_role = user_role
         
-        # Initialize embeddings
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.OPENAI_EMBEDDING_MODEL,
-            openai_api_key=settings.OPENAI_API_KEY
-        )
-        
-        # Initialize LLMs
-        self.simple_llm = ChatOpenAI(
-            model=settings.OPENAI_MODEL_CHAT,
-            temperature=settings.OPENAI_TEMPERATURE,
-            max_tokens=settings.OPENAI_MAX_TOKENS,
-            openai_api_key=settings.OPENAI_API_KEY
-        )
+        # Shared, process-wide clients (see core.llm.clients)
+        self.embeddings = get_embeddings()
+        self.simple_llm = get_chat_model(settings.OPENAI_MODEL_CHAT)
+        self.complex_llm = get_chat_model(settings.ANTHROPIC_MODEL)
         
-        self.complex_llm = ChatAnthropic(
-            model=settings.ANTHROPIC_MODEL,
-            temperature=settings.OPENAI_TEMPERATURE,
-            max_tokens=settings.ANTHROPIC_MAX_TOKENS,
-            anthropic_api_key=settings.ANTHROPIC_API_KEY
-        )
+        # Vector search backend (pgvector or in-process index)
+        self.vector_backend = get_vector_backend()
         
         # Cache
         self.cache = caches['default']
-        self.embedding_cache = caches['embeddings']
+        self.embedding_cache = get_embedding_cache()
+        self.semantic_cache = SemanticCache(tenant_id, user_role, cache=self.cache)
+        self.retrieval_cache = RetrievalCache(tenant_id, user_role, cache=self.cache)
+        
+        # Token budget for retrieved context
+        self.context_packer = ContextPacker()
+        
+        # Query router (shared centroids)
+        self.router = get_query_router()
     
     def _get_query_embedding(self, query: str) -> List[float]:
-        """Get embedding for query with caching."""
-        
-        # Create cache key
-        cache_key = f"emb:{hashlib.md5(query.encode()).hexdigest()}"
+        """Get embedding for query with caching (in-process LRU, then Redis)."""
         
         # Check cache
-        cached = self.embedding_cache.get(cache_key)
-        if cached:
+        cached = self.embedding_cache.get(query)
+        if cached is not None:
             logger.debug("Embedding cache hit")
             return cached
         
@@ -88,111 +138,79 @@ class RAGPipeline:
         embedding = self.embeddings.embed_query(query)
         
         # Cache it
-        self.embedding_cache.set(cache_key, embedding, timeout=86400 * 7)  # 7 days
+        self.embedding_cache.set(query, embedding)
         
         return embedding
     
-    def _vector_search(self, query_embedding: List[float], k: int = 10) -> List[Tuple[any, float, str]]:
+    def _parse_filters(self, query: str) -> QueryFilters:
+        """Parse hard property constraints (price, bedrooms, type, location) from the query."""
+        if not settings.QUERY_FILTERS_ENABLED:
+            return QueryFilters()
+        return parse_query_filters(query, self.tenant_id)
+    
+    def _vector_search(self, query_embedding: List[float], k: int = 10,
+                       filters: Optional[QueryFilters] = None) -> List[Tuple[any, float, str]]:
         """
         Perform vector similarity search on both documents and properties.
         
+        Delegates to the configured backend (pgvector or the in-process index).
+        Properties are restricted by `filters` before ranking.
+        
         Returns:
             List of (object, similarity_score, type) tuples where type is 'document' or 'property'
         """
-        results = []
-        
-        # Search documents
-        logger.debug(f"🔍 Searching documents: tenant_id={self.tenant_id}, user_role={self.user_role}")
-        documents = Document.objects.filter(
-            tenant_id=self.tenant_id,
-            is_active=True,
-            user_roles__contains=[self.user_role]
-        ).filter(
-            embedding__isnull=False
-        ).annotate(
-            similarity=1 - CosineDistance('embedding', query_embedding)
-        ).order_by('-similarity')[:k]
-        
-        logger.info(f"📄 Found {documents.count()} documents with embeddings")
-        for doc in documents:
-            results.append((doc, float(doc.similarity), 'document'))
-        
-        # Search properties
-        logger.debug(f"🔍 Searching properties: tenant_id={self.tenant_id}, user_role={self.user_role}")
-        
-        # First check total properties
-        total_properties = Property.objects.filter(tenant_id=self.tenant_id).count()
-        logger.info(f"🏠 Total properties for tenant: {total_properties}")
-        
-        properties_with_roles = Property.objects.filter(
-            tenant_id=self.tenant_id,
-            user_roles__contains=[self.user_role]
-        ).count()
-        logger.info(f"🏠 Properties with user_role '{self.user_role}': {properties_with_roles}")
-        
-        properties_with_embeddings = Property.objects.filter(
-            tenant_id=self.tenant_id,
-            user_roles__contains=[self.user_role],
-            embedding__isnull=False
-        ).count()
-        logger.info(f"🏠 Properties with embeddings: {properties_with_embeddings}")
-        
-        properties = Property.objects.filter(
-            tenant_id=self.tenant_id,
-            user_roles__contains=[self.user_role]
-        ).filter(
-            embedding__isnull=False
-        ).annotate(
-            similarity=1 - CosineDistance('embedding', query_embedding)
-        ).order_by('-similarity')[:k]
-        
-        logger.info(f"🏠 Retrieved {properties.count()} properties for comparison")
-        for prop in properties:
-            logger.debug(f"  - Property: {prop.property_name}, similarity: {prop.similarity}")
-            results.append((prop, float(prop.similarity), 'property'))
-        
-        # Sort all results by similarity and take top k
-        results.sort(key=lambda x: x[1], reverse=True)
-        results = results[:k]
+        results = self.vector_backend.search(
+            self.tenant_id, self.user_role, query_embedding, k=k, filters=filters
+        )
         
-        logger.info(f"Vector search found {len(results)} items ({sum(1 for r in results if r[2]=='document')} docs, {sum(1 for r in results if r[2]=='property')} properties)")
+        logger.info(f"Vector search ({self.vector_backend.name}) found {len(results)} items ({sum(1 for r in results if r[2]=='document')} docs, {sum(1 for r in results if r[2]=='property')} properties)")
         return results
     
-    def _keyword_search(self, query: str, k: int = 10) -> List[Tuple[any, float, str]]:
+    def _keyword_search(self, query: str, k: int = 10,
+                        filters: Optional[QueryFilters] = None) -> List[Tuple[any, float, str]]:
         """
         Perform BM25-style keyword search using PostgreSQL full-text search on documents and properties.
         
+        Matches against the stored, GIN-indexed `search_vector` columns.
+        
         Returns:
             List of (object, relevance_score, type) tuples
         """
-        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+        from django.contrib.postgres.search import SearchRank
+        
+        if not full_text_available():
+            logger.debug("Keyword search skipped: full-text search requires PostgreSQL")
+            return []
         
         results = []
-        search_query = SearchQuery(query, search_type='websearch')
+        search_query = build_search_query(query)
         
-        # Search documents
+        # Search documents (chunked documents are matched through their passages)
         documents = Document.objects.filter(
             tenant_id=self.tenant_id,
             is_active=True,
-            user_roles__contains=[self.user_role]
+            user_roles__contains=[self.user_role],
+            passage_count=0,
+            search_vector=search_query
         ).annotate(
-            rank=SearchRank('content', search_query)
-        ).filter(
-            rank__gt=0
+            # Normalization 32 scales ranks to 0-1 (rank / (rank + 1))
+            rank=SearchRank(F('search_vector'), search_query, normalization=32)
         ).order_by('-rank')[:k]
         
         for doc in documents:
             results.append((doc, float(doc.rank), 'document'))
         
-        # Search properties (search in property_name and description)
+        # Search properties (name, location, type and description)
         properties = Property.objects.filter(
             tenant_id=self.tenant_id,
-            user_roles__contains=[self.user_role]
-        ).annotate(
-            search=SearchVector('property_name', 'description', 'location'),
-            rank=SearchRank(SearchVector('property_name', 'description', 'location'), search_query)
-        ).filter(
-            rank__gt=0
+            is_active=True,
+            user_roles__contains=[self.user_role],
+            search_vector=search_query
+        )
+        if filters:
+            properties = properties.filter(filters.as_q())
+        properties = properties.annotate(
+            rank=SearchRank(F('search_vector'), search_query, normalization=32)
         ).order_by('-rank')[:k]
         
         for prop in properties:
@@ -206,14 +224,21 @@ class RAGPipeline:
         return results
     
     def _hybrid_search(self, query: str, query_embedding: List[float], 
-                      k: int = None) -> List[Dict]:
+                      k: int = None, filters: Optional[QueryFilters] = None,
+                      timings: Optional[StageTimings] = None) -> List[Dict]:
         """
-        Combine vector and keyword search with alpha blending.
+        Combine vector and keyword search with reciprocal-rank fusion.
+        
+        Uses a single SQL round trip when pgvector is available, otherwise
+        fuses the vector backend and keyword results in Python. Rankings are
+        cached per inventory version, so a repeated query skips both searches.
         
         Args:
             query: Search query string
             query_embedding: Query embedding vector
             k: Number of results (default from settings)
+            filters: Property constraints applied before ranking
+            timings: Stage timings of the current query
             
         Returns:
             List of document dictionaries with scores
@@ -221,46 +246,41 @@ class RAGPipeline:
         
         if k is None:
             k = settings.VECTOR_SEARCH_TOP_K
+        timings = timings or StageTimings()
+        
+        with timings.stage('retrieval_cache'):
+            cache_key = self.retrieval_cache.key(query, k)
+            fused = self.retrieval_cache.get(cache_key)
+        if fused is not None:
+            with timings.stage('fusion'):
+                return self._format_results(fused)
+        
+        if self.vector_backend.name == 'pgvector':
+            with timings.stage('hybrid_search'):
+                fused = hybrid_search_sql(
+                    self.tenant_id, self.user_role, query, query_embedding,
+                    k=k, candidates=k * 2, filters=filters
+                )
+        else:
+            with timings.stage('vector_search'):
+                vector_results = self._vector_search(query_embedding, k=k * 2, filters=filters)
+            with timings.stage('keyword_search'):
+                keyword_results = self._keyword_search(query, k=k * 2, filters=filters)
+            with timings.stage('fusion'):
+                fused = reciprocal_rank_fusion(vector_results, keyword_results, k=k)
+        
+        with timings.stage('retrieval_cache'):
+            self.retrieval_cache.set(cache_key, fused)
+        with timings.stage('fusion'):
+            return self._format_results(fused)
+    
+    def _format_results(self, fused: List[Dict]) -> List[Dict]:
+        """Turn fused search hits into result dictionaries and record retrieval stats."""
         
-        alpha = settings.HYBRID_SEARCH_ALPHA
-        
-        # Get results from both methods
-        vector_results = self._vector_search(query_embedding, k=k * 2)
-        keyword_results = self._keyword_search(query, k=k * 2)
-        
-        # Combine scores
-        doc_scores = {}
-        
-        # Add vector scores
-        for obj, score, obj_type in vector_results:
-            key = f"{obj_type}_{obj.id}"
-            doc_scores[key] = {
-                'object': obj,
-                'type': obj_type,
-                'vector_score': score,
-                'keyword_score': 0.0
-            }
-        
-        # Add keyword scores
-        for obj, score, obj_type in keyword_results:
-            key = f"{obj_type}_{obj.id}"
-            if key in doc_scores:
-                doc_scores[key]['keyword_score'] = score
-            else:
-                doc_scores[key] = {
-                    'object': obj,
-                    'type': obj_type,
-                    'vector_score': 0.0,
-                    'keyword_score': score
-                }
-        
-        # Calculate combined scores
-        combined_results = []
-        for key, scores in doc_scores.items():
-            combined_score = (
-                alpha * scores['vector_score'] + 
-                (1 - alpha) * scores['keyword_score']
-            )
+        # Build result dictionaries
+        top_results = []
+        for scores in fused:
+            combined_score = scores['relevance_score']
             
             obj = scores['object']
             obj_type = scores['type']
@@ -278,30 +298,14 @@ class RAGPipeline:
                     'vector_score': scores['vector_score'],
                     'keyword_score': scores['keyword_score']
                 }
+                if obj.parent_id:
+                    result['parent_id'] = str(obj.parent_id)
+                    result['passage_index'] = obj.passage_index
             else:  # property
-                # Build property content for LLM
-                property_content = f"Property: {obj.property_name}\n"
-                if obj.price_usd:
-                    property_content += f"Price: ${obj.price_usd:,.2f} USD\n"
-                if obj.location:
-                    property_content += f"Location: {obj.location}\n"
-                if obj.property_type:
-                    property_content += f"Type: {obj.property_type}\n"
-                if obj.bedrooms:
-                    property_content += f"Bedrooms: {obj.bedrooms}\n"
-                if obj.bathrooms:
-                    property_content += f"Bathrooms: {obj.bathrooms}\n"
-                if obj.square_meters:
-                    property_content += f"Area: {obj.square_meters} m²\n"
-                if obj.description:
-                    property_content += f"Description: {obj.description}\n"
-                if obj.source_url:
-                    property_content += f"URL: {obj.source_url}\n"
-                
                 result = {
                     'id': str(obj.id),
                     'type': 'property',
-                    'content': property_content,
+                    'content': obj.get_card(),
                     'metadata': {
                         'property_name': obj.property_name,
                         'price_usd': float(obj.price_usd) if obj.price_usd else None,
@@ -319,105 +323,148 @@ class RAGPipeline:
                     'keyword_score': scores['keyword_score']
                 }
             
-            combined_results.append(result)
-        
-        # Sort by combined score
-        combined_results.sort(key=lambda x: x['relevance_score'], reverse=True)
-        
-        # Return top k
-        top_results = combined_results[:k]
+            top_results.append(result)
         
         logger.info(f"Hybrid search returning {len(top_results)} documents")
         
-        # Track retrieval
-        for result in top_results:
-            if result.get('type') == 'document':
-                doc = Document.objects.get(id=result['id'])
-                doc.increment_retrieved(relevance_score=Decimal(str(result['relevance_score'])))
-            # Properties don't have retrieval tracking yet
+        # Track retrieval (buffered, flushed in the background)
+        if settings.RETRIEVAL_STATS_ENABLED:
+            retrieval_stats.record(top_results)
         
         return top_results
     
     def _check_semantic_cache(self, query: str, query_embedding: List[float]) -> Optional[Dict]:
-        """Check if we have a cached response for similar query."""
+        """Check if we have a cached response for a similar query (nearest neighbour by embedding)."""
         
         if not settings.ENABLE_SEMANTIC_CACHE:
             return None
         
-        cache_key_prefix = f"semantic_cache:{self.tenant_id}:{self.user_role}"
-        
-        # Get all cached queries (this is simplified - in production use vector DB)
-        # For now, just check exact match
-        cache_key = f"{cache_key_prefix}:{hashlib.md5(query.encode()).hexdigest()}"
-        cached = self.cache.get(cache_key)
-        
-        if cached:
-            logger.info("Semantic cache hit!")
-            return cached
-        
-        return None
+        try:
+            return self.semantic_cache.lookup(query_embedding)
+        except Exception as e:
+            logger.error(f"Semantic cache lookup failed: {e}")
+            return None
     
-    def _cache_response(self, query: str, response: str, sources: List[Dict]):
+    def _cache_response(self, query: str, query_embedding: List[float],
+                        response: str, sources: List[Dict]):
         """Cache response for future similar queries."""
         
         if not settings.ENABLE_SEMANTIC_CACHE:
             return
         
-        cache_key_prefix = f"semantic_cache:{self.tenant_id}:{self.user_role}"
-        cache_key = f"{cache_key_prefix}:{hashlib.md5(query.encode()).hexdigest()}"
+        try:
+            self.semantic_cache.store(query, query_embedding, response, sources)
+        except Exception as e:
+            logger.error(f"Semantic cache store failed: {e}")
+    
+    def _build_context(self, query: str, retrieved_docs: List[Dict],
+                      conversation_history: List[Message],
+                      conversation: Optional[Conversation] = None) -> Tuple[str, List[Message], Dict]:
+        """
+        Build context from retrieved documents and the conversation summary.
         
-        cache_data = {
-            'response': response,
-            'sources': sources,
-            'cached_at': str(timezone.now())
-        }
+        Sources are packed in relevance order into MAX_CONTEXT_TOKENS, with
+        part of the budget reserved for the summary and the raw history.
+        Raw messages are returned for use as chat turns, not repeated in the
+        context.
         
-        # Different TTL based on content type
-        ttl = settings.LLM_CACHE_TTL_HOURS * 3600
+        Returns:
+            (context, history, stats) with packed/dropped token counts
+        """
+        # The current question is already saved as the newest message
+        if (conversation_history and conversation_history[-1].role == 'user'
+                and conversation_history[-1].content == query):
+            conversation_history = conversation_history[:-1]
         
-        self.cache.set(cache_key, cache_data, timeout=ttl)
+        summary = conversation.summary if conversation else ''
+        return self.context_packer.pack(retrieved_docs, conversation_history, summary)
     
-    def _should_use_complex_model(self, query: str) -> bool:
-        """Determine if query requires complex model (Claude)."""
+    def _get_conversation_history(self, conversation: Optional[Conversation]) -> List[Message]:
+        """
+        Get messages not yet folded into the summary, oldest first.
+        
+        Capped at the last MAX_CONVERSATION_HISTORY in case summarization lags.
+        """
+        if not conversation:
+            return []
         
-        complex_keywords = [
-            'invest', 'investment', 'roi', 'return',
-            'legal', 'law', 'regulation', 'tax',
-            'compare', 'comparison', 'versus', 'vs',
-            'analyze', 'analysis', 'calculate',
-            'risk', 'forecast', 'predict'
+        recent = unsummarized_messages(conversation).order_by('-created_at')[:settings.MAX_CONVERSATION_HISTORY]
+        return list(reversed(recent))
+    
+    def _route(self, query: str, query_embedding: List[float]) -> RouteDecision:
+        """Classify the query from its embedding (see core.llm.router)."""
+        return self.router.route(query, query_embedding)
+    
+    def _select_llm(self, decision: RouteDecision):
+        """Return (llm, model_name) for a routing decision."""
+        if decision.use_complex_model:
+            return self.complex_llm, settings.ANTHROPIC_MODEL
+        return self.simple_llm, settings.OPENAI_MODEL_CHAT
+    
+    def _template_result(self, decision: RouteDecision, start_time: float,
+                         timings: StageTimings) -> Dict:
+        """Result for routes answered from a template, without retrieval or LLM."""
+        return {
+            'response': decision.template,
+            'sources': [],
+            'model': 'template',
+            'latency_ms': int((time.time() - start_time) * 1000),
+            'cached': False,
+            'tokens_used': 0,
+            'tokens_input': 0,
+            'tokens_output': 0,
+            'route': decision.as_metadata(),
+            'timings': timings.as_dict()
+        }
+    
+    @staticmethod
+    def _stream_metadata(model_name: str, start_time: float, timings: StageTimings,
+                         usage: Tuple[int, int] = (0, 0), cached: bool = False, **extra) -> Dict:
+        """Final stream chunk: what `query` returns besides the response and sources."""
+        tokens_input, tokens_output = usage
+        return {
+            'type': 'metadata',
+            'model': model_name,
+            'cached': cached,
+            'latency_ms': int((time.time() - start_time) * 1000),
+            'tokens_used': tokens_input + tokens_output,
+            'tokens_input': tokens_input,
+            'tokens_output': tokens_output,
+            'timings': timings.as_dict(),
+            **extra
+        }
+    
+    @staticmethod
+    def _replay_chunks(text: str):
+        """Split a cached answer into word-aligned chunks for a fast SSE replay."""
+        chunk = ''
+        for piece in re.split(r'(\s+)', text):
+            chunk += piece
+            if len(chunk) >= CACHE_REPLAY_CHUNK_CHARS:
+                yield chunk
+                chunk = ''
+        if chunk:
+            yield chunk
+    
+    def _build_messages(self, query: str, context: str,
+                        conversation_history: List[Message]) -> List:
+        """Build the chat messages: system prompt, history, then context and question."""
+        messages = [
+            SystemMessage(content=get_system_prompt(self.user_role)),
         ]
         
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in complex_keywords)
-    
-    def _build_context(self, retrieved_docs: List[Dict], 
-                      conversation_history: List[Message]) -> str:
-        """Build context from retrieved documents and conversation history."""
-        
-        context_parts = []
-        
-        # Add retrieved documents
-        if retrieved_docs:
-            context_parts.append("=== RELEVANT INFORMATION ===\n")
-            for i, doc in enumerate(retrieved_docs, 1):
-                context_parts.append(f"[Document {i}]")
-                context_parts.append(f"Type: {doc['content_type']}")
-                if doc.get('freshness_date'):
-                    context_parts.append(f"Updated: {doc['freshness_date']}")
-                if doc.get('source_reference'):
-                    context_parts.append(f"Source: {doc['source_reference']}")
-                context_parts.append(f"Content: {doc['content']}")
-                context_parts.append("")
-        
-        # Add recent conversation
-        if conversation_history:
-            context_parts.append("=== RECENT CONVERSATION ===\n")
-            for msg in conversation_history[-5:]:  # Last 5 messages
-                role = msg.role.upper()
-                context_parts.append(f"{role}: {msg.content}\n")
-        
-        return "\n".join(context_parts)
+        # Add conversation history
+        for msg in conversation_history:
+            if msg.role == 'user':
+                messages.append(HumanMessage(content=msg.content))
+            elif msg.role == 'assistant':
+                messages.append(AIMessage(content=msg.content))
+        
+        # Add current query with context
+        user_message = f"{context}\n\n=== USER QUESTION ===\n{query}"
+        messages.append(HumanMessage(content=user_message))
+        
+        return messages
     
     def query(self, 
              query: str,
@@ -435,95 +482,100 @@ class RAGPipeline:
             Dictionary with response and metadata
         """
         
-        import time
         start_time = time.time()
+        timings = StageTimings()
         
         logger.info(f"RAG query from {self.user_role}: {query[:100]}...")
         
         # 1. Generate query embedding
-        query_embedding = self._get_query_embedding(query)
+        with timings.stage('embedding'):
+            query_embedding = self._get_query_embedding(query)
         
         # 2. Check semantic cache
-        cached = self._check_semantic_cache(query, query_embedding)
+        with timings.stage('semantic_cache'):
+            cached = self._check_semantic_cache(query, query_embedding)
         if cached:
             return {
                 'response': cached['response'],
                 'sources': cached['sources'],
                 'cached': True,
-                'latency_ms': int((time.time() - start_time) * 1000)
+                'latency_ms': int((time.time() - start_time) * 1000),
+                'timings': timings.as_dict()
             }
         
-        # 3. Retrieve relevant documents
-        retrieved_docs = self._hybrid_search(query, query_embedding)
-        
-        # 4. Get conversation history
-        conversation_history = []
-        if conversation:
-            # Get last N messages (Django QuerySet doesn't support negative indexing)
-            all_messages = conversation.messages.order_by('created_at')
-            total_count = all_messages.count()
-            start_index = max(0, total_count - settings.MAX_CONVERSATION_HISTORY)
-            conversation_history = list(all_messages[start_index:])
-        
-        # 5. Build context
-        context = self._build_context(retrieved_docs, conversation_history)
+        # 3. Route: trivial intents get a templated answer
+        with timings.stage('routing'):
+            decision = self._route(query, query_embedding)
+        if decision.template:
+            return self._template_result(decision, start_time, timings)
+        
+        # 4. Retrieve relevant documents that satisfy the query's hard constraints
+        with timings.stage('query_filters'):
+            filters = self._parse_filters(query)
+        retrieved_docs = self._hybrid_search(query, query_embedding, filters=filters, timings=timings)
+        
+        # 5. Get conversation history
+        with timings.stage('history'):
+            conversation_history = self._get_conversation_history(conversation)
+        
+        # 6. Build context
+        with timings.stage('context_packing'):
+            context, conversation_history, context_stats = self._build_context(
+                query, retrieved_docs, conversation_history, conversation
+            )
         
-        # 6. Choose LLM
-        use_complex = self._should_use_complex_model(query)
-        llm = self.complex_llm if use_complex else self.simple_llm
-        model_name = settings.ANTHROPIC_MODEL if use_complex else settings.OPENAI_MODEL_CHAT
+        # 7. Choose LLM
+        llm, model_name = self._select_llm(decision)
         
         logger.info(f"Using model: {model_name}")
         
-        # 7. Build messages
-        system_prompt = get_system_prompt(self.user_role)
-        
-        messages = [
-            SystemMessage(content=system_prompt),
-        ]
-        
-        # Add conversation history
-        for msg in conversation_history:
-            if msg.role == 'user':
-                messages.append(HumanMessage(content=msg.content))
-            elif msg.role == 'assistant':
-                messages.append(AIMessage(content=msg.content))
-        
-        # Add current query with context
-        user_message = f"{context}\n\n=== USER QUESTION ===\n{query}"
-        messages.append(HumanMessage(content=user_message))
+        # 8. Build messages
+        messages = self._build_messages(query, context, conversation_history)
         
         # Log the full context being sent to LLM
         logger.info("=" * 80)
         logger.info("📤 CONTEXT SENT TO LLM:")
-        logger.info(f"Context length: {len(context)} characters")
+        logger.info(f"Context length: {len(context)} characters, {context_stats['packed_tokens']} tokens "
+                    f"({context_stats['dropped_tokens']} dropped)")
         logger.info(context[:2000])  # First 2000 chars
         if len(context) > 2000:
             logger.info(f"... (truncated, total {len(context)} chars)")
         logger.info("=" * 80)
         
-        # 8. Generate response
+        # 9. Generate response
         try:
-            response = llm.invoke(messages)
+            with timings.stage('generation'), rate_limited(model_name, estimate_chat_tokens(messages)):
+                response = llm.invoke(messages)
             response_text = response.content
+            tokens_input, tokens_output = _token_usage(
+                getattr(response, 'usage_metadata', None), messages, response_text
+            )
             
             latency_ms = int((time.time() - start_time) * 1000)
             
             logger.info(f"Response generated in {latency_ms}ms")
             
-            # 9. Cache response
-            self._cache_response(query, response_text, retrieved_docs)
+            # 10. Cache response
+            self._cache_response(query, query_embedding, response_text, retrieved_docs)
             
-            # 10. Return result
+            # 11. Return result
             return {
                 'response': response_text,
                 'sources': retrieved_docs,
                 'model': model_name,
                 'latency_ms': latency_ms,
                 'cached': False,
-                'tokens_used': getattr(response, 'usage', {}).get('total_tokens', 0)
+                'tokens_used': tokens_input + tokens_output,
+                'tokens_input': tokens_input,
+                'tokens_output': tokens_output,
+                'context': context_stats,
+                'route': decision.as_metadata(),
+                'filters': filters.as_metadata(),
+                'timings': timings.as_dict()
             }
             
+        except RateLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"LLM generation error: {e}")
             raise RAGError(f"Failed to generate response: {str(e)}")
@@ -537,76 +589,453 @@ class RAGPipeline:
             conversation: Optional conversation for history
             
         Yields:
-            Dictionary chunks with type and content
+            Dictionary chunks with type and content, ending with a
+            'metadata' chunk (model, token counts, latency and timings)
         """
-        import time
         start_time = time.time()
+        timings = StageTimings()
         
         logger.info(f"RAG streaming query from {self.user_role}: {query[:100]}...")
         
         try:
             # 1. Generate query embedding
-            query_embedding = self._get_query_embedding(query)
+            with timings.stage('embedding'):
+                query_embedding = self._get_query_embedding(query)
+            
+            # 2. Check semantic cache: replay hits as a chunked stream
+            with timings.stage('semantic_cache'):
+                cached = self._check_semantic_cache(query, query_embedding)
+            if cached:
+                yield {'type': 'sources', 'sources': cached['sources'][:5], 'cached': True}
+                for piece in self._replay_chunks(cached['response']):
+                    yield {'type': 'content', 'content': piece}
+                logger.info(f"Streamed cached answer in {int((time.time() - start_time) * 1000)}ms")
+                yield self._stream_metadata('cache', start_time, timings, cached=True)
+                return
             
-            # 2. Retrieve relevant documents
-            retrieved_docs = self._hybrid_search(query, query_embedding)
+            # 3. Route: trivial intents get a templated answer
+            with timings.stage('routing'):
+                decision = self._route(query, query_embedding)
+            if decision.template:
+                yield {'type': 'sources', 'sources': []}
+                yield {'type': 'content', 'content': decision.template}
+                yield self._stream_metadata('template', start_time, timings, route=decision.as_metadata())
+                return
             
-            # 3. Send sources first
+            # 4. Retrieve relevant documents that satisfy the query's hard constraints
+            with timings.stage('query_filters'):
+                filters = self._parse_filters(query)
+            retrieved_docs = self._hybrid_search(query, query_embedding, filters=filters, timings=timings)
+            
+            # 5. Send sources first
             yield {
                 'type': 'sources',
-                'sources': retrieved_docs[:5]  # Top 5 sources
+                'sources': retrieved_docs[:5],  # Top 5 sources
+                'filters': filters.as_metadata()
             }
             
-            # 4. Get conversation history
-            conversation_history = []
-            if conversation:
-                all_messages = conversation.messages.order_by('created_at')
-                total_count = all_messages.count()
-                start_index = max(0, total_count - settings.MAX_CONVERSATION_HISTORY)
-                conversation_history = list(all_messages[start_index:])
-            
-            # 5. Build context
-            context = self._build_context(retrieved_docs, conversation_history)
-            
-            # 6. Choose LLM
-            use_complex = self._should_use_complex_model(query)
-            llm = self.complex_llm if use_complex else self.simple_llm
-            
-            # 7. Build messages
-            system_prompt = get_system_prompt(self.user_role)
-            
-            messages = [
-                SystemMessage(content=system_prompt),
-            ]
-            
-            # Add conversation history
-            for msg in conversation_history:
-                if msg.role == 'user':
-                    messages.append(HumanMessage(content=msg.content))
-                elif msg.role == 'assistant':
-                    messages.append(AIMessage(content=msg.content))
-            
-            # Add current query with context
-            user_message = f"{context}\n\n=== USER QUESTION ===\n{query}"
-            messages.append(HumanMessage(content=user_message))
-            
-            # 8. Stream response
-            for chunk in llm.stream(messages):
-                if hasattr(chunk, 'content') and chunk.content:
-                    yield {
-                        'type': 'content',
-                        'content': chunk.content
-                    }
+            # 6. Get conversation history
+            with timings.stage('history'):
+                conversation_history = self._get_conversation_history(conversation)
+            
+            # 7. Build context
+            with timings.stage('context_packing'):
+                context, conversation_history, context_stats = self._build_context(
+                    query, retrieved_docs, conversation_history, conversation
+                )
+            logger.info(f"Context: {context_stats['packed_tokens']} tokens packed, {context_stats['dropped_tokens']} dropped")
+            
+            # 8. Choose LLM
+            llm, model_name = self._select_llm(decision)
+            
+            # 9. Build messages
+            messages = self._build_messages(query, context, conversation_history)
+            
+            # 10. Stream response
+            response_parts = []
+            usage = {}
+            generation_start = time.perf_counter()
+            with rate_limited(model_name, estimate_chat_tokens(messages)):
+                for chunk in llm.stream(messages):
+                    _add_usage(usage, chunk)
+                    if hasattr(chunk, 'content') and chunk.content:
+                        timings.mark('time_to_first_token')
+                        response_parts.append(chunk.content)
+                        yield {
+                            'type': 'content',
+                            'content': chunk.content
+                        }
+            timings.add('generation', (time.perf_counter() - generation_start) * 1000)
             
             latency_ms = int((time.time() - start_time) * 1000)
             logger.info(f"Streaming completed in {latency_ms}ms")
             
+            # 11. Cache the answer. Only reached once the last chunk is out:
+            # errors skip to the handler below and a client disconnect
+            # closes the generator at the pending yield.
+            response_text = ''.join(response_parts)
+            if response_parts:
+                self._cache_response(query, query_embedding, response_text, retrieved_docs)
+            
+            # 12. Model, real token counts and stage timings for the caller to persist
+            yield self._stream_metadata(
+                model_name, start_time, timings,
+                usage=_token_usage(usage, messages, response_text),
+                context=context_stats,
+                route=decision.as_metadata(),
+                filters=filters.as_metadata()
+            )
+            
+        except RateLimitExceeded as e:
+            logger.warning(f"🚦 {e}")
+            yield {
+                'type': 'error',
+                'error': str(e),
+                'retry_after': e.retry_after
+            }
         except Exception as e:
             logger.error(f"LLM streaming error: {e}")
             yield {
                 'type': 'error',
                 'error': str(e)
             }
-
-
-from django.utils import timezone
+    
+    # ------------------------------------------------------------------
+    # Async pipeline
+    # ------------------------------------------------------------------
+    
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        """Async version of `_get_query_embedding`."""
+        cached = await self.embedding_cache.aget(query)
+        if cached is not None:
+            logger.debug("Embedding cache hit")
+            return cached
+        
+        logger.debug("Generating query embedding...")
+        embedding = await self.embeddings.aembed_query(query)
+        
+        await self.embedding_cache.aset(query, embedding)
+        
+        return embedding
+    
+    async def _aget_conversation_history(self, conversation: Optional[Conversation]) -> List[Message]:
+        """Async version of `_get_conversation_history`."""
+        if not conversation:
+            return []
+        
+        recent = unsummarized_messages(conversation).order_by('-created_at')[:settings.MAX_CONVERSATION_HISTORY]
+        return list(reversed([msg async for msg in recent]))
+    
+    def _start_retrieval(self, query: str, conversation: Optional[Conversation],
+                         timings: StageTimings) -> Dict:
+        """
+        Start every stage that only needs the query text.
+        
+        Returns:
+            Dict of tasks: embedding, history, filters and (without pgvector) keyword
+        """
+        k = settings.VECTOR_SEARCH_TOP_K
+        tasks = {
+            'embedding': asyncio.create_task(
+                timings.timed('embedding', self._aget_query_embedding(query))
+            ),
+            'history': asyncio.create_task(
+                timings.timed('history', self._aget_conversation_history(conversation))
+            ),
+            'filters': asyncio.create_task(
+                timings.timed('query_filters', _db_call(self._parse_filters)(query))
+            ),
+            'keyword': None,
+        }
+        
+        # With pgvector the keyword search is part of the hybrid SQL statement
+        if self.vector_backend.name != 'pgvector':
+            tasks['keyword'] = asyncio.create_task(
+                self._akeyword_search(query, tasks['filters'], k=k * 2, timings=timings)
+            )
+        
+        return tasks
+    
+    async def _akeyword_search(self, query: str, filters_task: asyncio.Task, k: int = 10,
+                               timings: Optional[StageTimings] = None):
+        """Keyword search once the query filters are parsed."""
+        filters = await filters_task
+        timings = timings or StageTimings()
+        return await timings.timed(
+            'keyword_search', _db_call(self._keyword_search)(query, k=k, filters=filters)
+        )
+    
+    @staticmethod
+    def _cancel_pending(tasks: Dict):
+        for task in tasks.values():
+            if task is not None and not task.done():
+                task.cancel()
+    
+    async def _ahybrid_search(self, query: str, query_embedding: List[float],
+                              keyword_task: Optional[asyncio.Task] = None,
+                              k: int = None, filters: Optional[QueryFilters] = None,
+                              timings: Optional[StageTimings] = None) -> List[Dict]:
+        """
+        Async version of `_hybrid_search`.
+        
+        Without pgvector, vector search runs concurrently with the keyword
+        search (usually already in flight since `_start_retrieval`).
+        """
+        if k is None:
+            k = settings.VECTOR_SEARCH_TOP_K
+        timings = timings or StageTimings()
+        
+        with timings.stage('retrieval_cache'):
+            cache_key = await _db_call(self.retrieval_cache.key)(query, k)
+            fused = await _db_call(self.retrieval_cache.get)(cache_key)
+        if fused is not None:
+            if keyword_task is not None:
+                keyword_task.cancel()
+            return await timings.timed('fusion', _db_call(self._format_results)(fused))
+        
+        if self.vector_backend.name == 'pgvector':
+            fused = await timings.timed('hybrid_search', _db_call(hybrid_search_sql)(
+                self.tenant_id, self.user_role, query, query_embedding,
+                k=k, candidates=k * 2, filters=filters
+            ))
+        else:
+            if keyword_task is None:
+                keyword_task = asyncio.create_task(timings.timed(
+                    'keyword_search', _db_call(self._keyword_search)(query, k=k * 2, filters=filters)
+                ))
+            vector_results, keyword_results = await asyncio.gather(
+                timings.timed(
+                    'vector_search', _db_call(self._vector_search)(query_embedding, k=k * 2, filters=filters)
+                ),
+                keyword_task
+            )
+            with timings.stage('fusion'):
+                fused = reciprocal_rank_fusion(vector_results, keyword_results, k=k)
+        
+        await timings.timed('retrieval_cache', _db_call(self.retrieval_cache.set)(cache_key, fused))
+        return await timings.timed('fusion', _db_call(self._format_results)(fused))
+    
+    async def aquery(self, query: str, conversation: Optional[Conversation] = None) -> Dict:
+        """
+        Async RAG query.
+        
+        The query embedding, keyword search and conversation history load
+        start together; vector search starts as soon as the embedding is ready.
+        
+        Args:
+            query: User question
+            conversation: Optional conversation for history
+            
+        Returns:
+            Dictionary with response and metadata (same shape as `query`)
+        """
+        start_time = time.time()
+        timings = StageTimings()
+        
+        logger.info(f"Async RAG query from {self.user_role}: {query[:100]}...")
+        
+        tasks = self._start_retrieval(query, conversation, timings)
+        
+        try:
+            # 1. Query embedding (keyword search and history already running)
+            query_embedding = await tasks['embedding']
+            
+            # 2. Check semantic cache
+            cached = await timings.timed('semantic_cache', sync_to_async(
+                self._check_semantic_cache, thread_sensitive=False
+            )(query, query_embedding))
+            if cached:
+                return {
+                    'response': cached['response'],
+                    'sources': cached['sources'],
+                    'cached': True,
+                    'latency_ms': int((time.time() - start_time) * 1000),
+                    'timings': timings.as_dict()
+                }
+            
+            # 3. Route (the first call may embed the centroids)
+            decision = await timings.timed('routing', sync_to_async(
+                self._route, thread_sensitive=False
+            )(query, query_embedding))
+            if decision.template:
+                return self._template_result(decision, start_time, timings)
+            
+            # 4. Retrieve relevant documents that satisfy the query's hard constraints
+            filters = await tasks['filters']
+            retrieved_docs = await self._ahybrid_search(
+                query, query_embedding, tasks['keyword'], filters=filters, timings=timings
+            )
+            
+            # 5. Conversation history
+            conversation_history = await tasks['history']
+        finally:
+            self._cancel_pending(tasks)
+        
+        # 6. Build context
+        with timings.stage('context_packing'):
+            context, conversation_history, context_stats = self._build_context(
+                query, retrieved_docs, conversation_history, conversation
+            )
+        
+        # 7. Choose LLM
+        llm, model_name = self._select_llm(decision)
+        logger.info(f"Using model: {model_name}")
+        
+        # 8. Build messages
+        messages = self._build_messages(query, context, conversation_history)
+        
+        # 9. Generate response
+        try:
+            async with arate_limited(model_name, estimate_chat_tokens(messages)):
+                response = await timings.timed('generation', llm.ainvoke(messages))
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"LLM generation error: {e}")
+            raise RAGError(f"Failed to generate response: {str(e)}")
+        
+        response_text = response.content
+        tokens_input, tokens_output = _token_usage(
+            getattr(response, 'usage_metadata', None), messages, response_text
+        )
+        latency_ms = int((time.time() - start_time) * 1000)
+        logger.info(f"Async response generated in {latency_ms}ms")
+        
+        # 10. Cache response
+        await sync_to_async(self._cache_response, thread_sensitive=False)(
+            query, query_embedding, response_text, retrieved_docs
+        )
+        
+        return {
+            'response': response_text,
+            'sources': retrieved_docs,
+            'model': model_name,
+            'latency_ms': latency_ms,
+            'cached': False,
+            'tokens_used': tokens_input + tokens_output,
+            'tokens_input': tokens_input,
+            'tokens_output': tokens_output,
+            'context': context_stats,
+            'route': decision.as_metadata(),
+            'filters': filters.as_metadata(),
+            'timings': timings.as_dict()
+        }
+    
+    async def aquery_stream(self, query: str, conversation: Optional[Conversation] = None):
+        """
+        Async version of `query_stream`.
+        
+        Yields:
+            Dictionary chunks with type and content, ending with a
+            'metadata' chunk (model, token counts, latency and timings)
+        """
+        start_time = time.time()
+        timings = StageTimings()
+        
+        logger.info(f"Async RAG streaming query from {self.user_role}: {query[:100]}...")
+        
+        tasks = self._start_retrieval(query, conversation, timings)
+        
+        try:
+            # 1. Query embedding (keyword search and history already running)
+            query_embedding = await tasks['embedding']
+            
+            # 2. Check semantic cache: replay hits as a chunked stream
+            cached = await timings.timed('semantic_cache', sync_to_async(
+                self._check_semantic_cache, thread_sensitive=False
+            )(query, query_embedding))
+            if cached:
+                yield {'type': 'sources', 'sources': cached['sources'][:5], 'cached': True}
+                for piece in self._replay_chunks(cached['response']):
+                    yield {'type': 'content', 'content': piece}
+                logger.info(f"Streamed cached answer in {int((time.time() - start_time) * 1000)}ms")
+                yield self._stream_metadata('cache', start_time, timings, cached=True)
+                return
+            
+            # 3. Route (the first call may embed the centroids)
+            decision = await timings.timed('routing', sync_to_async(
+                self._route, thread_sensitive=False
+            )(query, query_embedding))
+            if decision.template:
+                yield {'type': 'sources', 'sources': []}
+                yield {'type': 'content', 'content': decision.template}
+                yield self._stream_metadata('template', start_time, timings, route=decision.as_metadata())
+                return
+            
+            # 4. Retrieve relevant documents that satisfy the query's hard constraints
+            filters = await tasks['filters']
+            retrieved_docs = await self._ahybrid_search(
+                query, query_embedding, tasks['keyword'], filters=filters, timings=timings
+            )
+            
+            # 5. Send sources first
+            yield {
+                'type': 'sources',
+                'sources': retrieved_docs[:5],  # Top 5 sources
+                'filters': filters.as_metadata()
+            }
+            
+            # 6. Conversation history
+            conversation_history = await tasks['history']
+            
+            # 7. Build context
+            with timings.stage('context_packing'):
+                context, conversation_history, context_stats = self._build_context(
+                    query, retrieved_docs, conversation_history, conversation
+                )
+            logger.info(f"Context: {context_stats['packed_tokens']} tokens packed, {context_stats['dropped_tokens']} dropped")
+            
+            # 8. Choose LLM and build messages
+            llm, model_name = self._select_llm(decision)
+            messages = self._build_messages(query, context, conversation_history)
+            
+            # 9. Stream response
+            response_parts = []
+            usage = {}
+            generation_start = time.perf_counter()
+            async with arate_limited(model_name, estimate_chat_tokens(messages)):
+                async for chunk in llm.astream(messages):
+                    _add_usage(usage, chunk)
+                    if hasattr(chunk, 'content') and chunk.content:
+                        timings.mark('time_to_first_token')
+                        response_parts.append(chunk.content)
+                        yield {
+                            'type': 'content',
+                            'content': chunk.content
+                        }
+            timings.add('generation', (time.perf_counter() - generation_start) * 1000)
+            
+            latency_ms = int((time.time() - start_time) * 1000)
+            logger.info(f"Async streaming completed in {latency_ms}ms")
+            
+            # 10. Cache the answer (only complete streams get here, see query_stream)
+            response_text = ''.join(response_parts)
+            if response_parts:
+                await sync_to_async(self._cache_response, thread_sensitive=False)(
+                    query, query_embedding, response_text, retrieved_docs
+                )
+            
+            # 11. Model, real token counts and stage timings for the caller to persist
+            yield self._stream_metadata(
+                model_name, start_time, timings,
+                usage=_token_usage(usage, messages, response_text),
+                context=context_stats,
+                route=decision.as_metadata(),
+                filters=filters.as_metadata()
+            )
+            
+        except RateLimitExceeded as e:
+            logger.warning(f"🚦 {e}")
+            yield {
+                'type': 'error',
+                'error': str(e),
+                'retry_after': e.retry_after
+            }
+        except Exception as e:
+            logger.error(f"LLM streaming error: {e}")
+            yield {
+                'type': 'error',
+                'error': str(e)
+            }
+        finally:
+            self._cancel_pending(tasks)
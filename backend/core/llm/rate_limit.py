@@ -0,0 +1,370 @@
+"""
+Cluster-wide rate limiting of LLM and embedding requests.
+
+Chat, extraction, the site extractors and embedding backfills all share the
+same provider quotas, but used to find out about them only through 429s
+(and Celery retries with multi-minute backoff). Every request now reserves
+capacity first from two token buckets per model, kept in Redis so every web
+and worker process draws from the same budget:
+
+    requests  refills at LLM_RATE_LIMITS[model]['rpm'] per minute
+    tokens    refills at LLM_RATE_LIMITS[model]['tpm'] per minute
+
+A reservation is one atomic Lua call. If the buckets are short the caller is
+told how long until its share has refilled and, when that is within its
+`max_wait`, the share is taken right away (the bucket goes negative) and the
+caller sleeps it off. Waiting callers are queued in arrival order without
+any polling, and load runs at the configured ceiling. When the wait would
+be longer, nothing is taken and RateLimitExceeded (with `retry_after`) is
+raised so the caller can shed the request:
+
+    LLM_RATE_LIMIT_MAX_WAIT        chat, extraction and site extractors
+    LLM_RATE_LIMIT_BATCH_MAX_WAIT  embedding backfills and batch ingestion
+
+A 429 that gets through anyway (another client on the same key, limits set
+too high) empties the model's buckets for the provider's Retry-After, so the
+whole cluster backs off together instead of every worker hitting it again.
+
+Token costs are estimates made before the call: input tokens plus
+`max_tokens` for chat completions, the same way the provider counts them
+against TPM. Models missing from LLM_RATE_LIMITS are not limited. Without
+Redis the buckets are kept per process.
+
+Usage:
+    with rate_limited(model, estimate_chat_tokens(messages, max_tokens)):
+        response = client.chat.completions.create(model=model, messages=messages, ...)
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Buckets of idle models expire after this long (they would be full by then)
+BUCKET_TTL_SECONDS = 120
+
+# max_wait of reservations that never shed (headroom reads, 429 penalties)
+UNBOUNDED_WAIT = 1e9
+
+# Retry-After assumed for a 429 that carries none
+DEFAULT_RETRY_AFTER = 1.0
+
+# KEYS[1]: bucket hash
+# ARGV: rpm, tpm, requests, tokens, max_wait (seconds), penalty (seconds)
+# Returns {granted, wait, requests left, tokens left}
+_RESERVE_SCRIPT = """
+local rpm, tpm = tonumber(ARGV[1]), tonumber(ARGV[2])
+local requests, tokens = tonumber(ARGV[3]), tonumber(ARGV[4])
+local max_wait, penalty = tonumber(ARGV[5]), tonumber(ARGV[6])
+
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'updated')
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+local r = math.min(rpm, (tonumber(state[1]) or rpm) + elapsed * rpm / 60)
+local t = math.min(tpm, (tonumber(state[2]) or tpm) + elapsed * tpm / 60)
+
+if penalty > 0 then
+    r = math.min(r, -penalty * rpm / 60)
+    t = math.min(t, -penalty * tpm / 60)
+end
+
+local wait = 0
+if r < requests then wait = (requests - r) * 60 / rpm end
+if t < tokens then wait = math.max(wait, (tokens - t) * 60 / tpm) end
+
+local granted = 0
+if wait <= max_wait then
+    r = r - requests
+    t = t - tokens
+    granted = 1
+end
+
+redis.call('HSET', KEYS[1], 'requests', tostring(r), 'tokens', tostring(t), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], %d)
+return {granted, tostring(wait), tostring(r), tostring(t)}
+""" % BUCKET_TTL_SECONDS
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would have to wait longer than allowed for provider capacity."""
+
+    def __init__(self, model: str, retry_after: float):
+        self.model = model
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit for {model} reached, retry in {retry_after:.1f}s")
+
+
+@dataclass
+class ModelLimits:
+    """Requests and tokens per minute allowed for one model (0 = unlimited)."""
+    rpm: int = 0
+    tpm: int = 0
+
+
+class _LocalBuckets:
+    """In-process equivalent of the Redis script, used when Redis is not configured."""
+
+    def __init__(self):
+        self._state: Dict[str, Tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, rpm: float, tpm: float, requests: float, tokens: float,
+                max_wait: float, penalty: float = 0.0) -> Tuple[bool, float, float, float]:
+        with self._lock:
+            now = time.monotonic()
+            r, t, updated = self._state.get(key, (rpm, tpm, now))
+            elapsed = max(0.0, now - updated)
+            r = min(rpm, r + elapsed * rpm / 60)
+            t = min(tpm, t + elapsed * tpm / 60)
+
+            if penalty > 0:
+                r = min(r, -penalty * rpm / 60)
+                t = min(t, -penalty * tpm / 60)
+
+            wait = 0.0
+            if r < requests:
+                wait = (requests - r) * 60 / rpm
+            if t < tokens:
+                wait = max(wait, (tokens - t) * 60 / tpm)
+
+            granted = wait <= max_wait
+            if granted:
+                r -= requests
+                t -= tokens
+            self._state[key] = (r, t, now)
+            return granted, wait, r, t
+
+
+class _RedisBuckets:
+    """Buckets shared by every process through the default Redis cache."""
+
+    def __init__(self, connection, prefix: str):
+        self.connection = connection
+        self.prefix = prefix
+        self._script = connection.register_script(_RESERVE_SCRIPT)
+
+    def reserve(self, key: str, rpm: float, tpm: float, requests: float, tokens: float,
+                max_wait: float, penalty: float = 0.0) -> Tuple[bool, float, float, float]:
+        granted, wait, r, t = self._script(
+            keys=[f"{self.prefix}:{key}"],
+            args=[rpm, tpm, requests, tokens, max_wait, penalty],
+        )
+        return bool(granted), float(wait), float(r), float(t)
+
+
+def _redis_buckets() -> Optional[_RedisBuckets]:
+    cache = settings.CACHES.get('default', {})
+    if not cache.get('BACKEND', '').endswith('RedisCache'):
+        return None
+
+    from django_redis import get_redis_connection
+    prefix = f"{cache.get('KEY_PREFIX') or 'llm'}:llm_rate"
+    return _RedisBuckets(get_redis_connection('default'), prefix)
+
+
+class RateLimiter:
+    """
+    Per-model request and token buckets shared across the cluster.
+
+    Usage:
+        rate_limiter.acquire('gpt-4o-mini', tokens=1200)           # may sleep briefly
+        rate_limiter.acquire(embedding_model, tokens=90000, max_wait=60)
+        rate_limiter.headroom()                                    # {model: {...}}
+    """
+
+    def __init__(self, limits: Dict[str, Dict] = None, buckets=None):
+        self._limits = limits
+        self._buckets = buckets
+        self._local = _LocalBuckets()
+        self._lock = threading.Lock()
+
+    @property
+    def limits(self) -> Dict[str, ModelLimits]:
+        raw = self._limits if self._limits is not None else settings.LLM_RATE_LIMITS
+        return {model: ModelLimits(**values) for model, values in raw.items()}
+
+    def limits_for(self, model: str) -> Optional[ModelLimits]:
+        """Configured limits of a model, or None when it is not limited."""
+        if not settings.LLM_RATE_LIMIT_ENABLED or not model:
+            return None
+        limits = self.limits.get(model)
+        if limits is None or not (limits.rpm or limits.tpm):
+            return None
+        return limits
+
+    @property
+    def buckets(self):
+        if self._buckets is None:
+            with self._lock:
+                if self._buckets is None:
+                    try:
+                        self._buckets = _redis_buckets() or self._local
+                    except Exception as e:
+                        logger.warning(f"⚠️ Redis unavailable for rate limiting, limiting per process: {e}")
+                        self._buckets = self._local
+        return self._buckets
+
+    def _reserve(self, model: str, limits: ModelLimits, requests: int, tokens: int,
+                 max_wait: float, penalty: float = 0.0) -> Tuple[bool, float, float, float]:
+        # An unlimited dimension costs nothing; a request larger than a minute's worth
+        # of tokens only waits for a full bucket (the provider takes it at that point)
+        rpm, tpm = limits.rpm or 1, limits.tpm or 1
+        requests = min(requests, limits.rpm) if limits.rpm else 0
+        tokens = min(tokens, limits.tpm) if limits.tpm else 0
+
+        try:
+            return self.buckets.reserve(model, rpm, tpm, requests, tokens, max_wait, penalty)
+        except Exception as e:
+            # Never fail an LLM call because the limiter's store is down
+            logger.warning(f"⚠️ Rate limiter store error, limiting per process: {e}")
+            return self._local.reserve(model, rpm, tpm, requests, tokens, max_wait, penalty)
+
+    def reserve(self, model: str, tokens: int = 0, max_wait: float = None) -> float:
+        """
+        Take capacity for one request.
+
+        Args:
+            model: Model the request goes to
+            tokens: Estimated tokens the request counts against TPM
+            max_wait: Longest acceptable wait in seconds (default LLM_RATE_LIMIT_MAX_WAIT)
+
+        Returns:
+            Seconds the caller must wait before sending the request
+
+        Raises:
+            RateLimitExceeded: If the capacity would only be free after max_wait
+        """
+        limits = self.limits_for(model)
+        if limits is None:
+            return 0.0
+
+        max_wait = settings.LLM_RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+        granted, wait, _, _ = self._reserve(model, limits, 1, tokens, max_wait)
+        if not granted:
+            logger.warning(f"🚦 {model} rate limit reached, shedding request ({tokens} tokens, retry in {wait:.1f}s)")
+            raise RateLimitExceeded(model, wait)
+        if wait > 0:
+            logger.debug(f"🚦 Waiting {wait:.2f}s for {model} capacity ({tokens} tokens)")
+        return wait
+
+    def acquire(self, model: str, tokens: int = 0, max_wait: float = None) -> float:
+        """Reserve capacity and sleep until it is free. Returns the seconds waited."""
+        wait = self.reserve(model, tokens, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, model: str, tokens: int = 0, max_wait: float = None) -> float:
+        """Async equivalent of `acquire`."""
+        if self.limits_for(model) is None:
+            return 0.0
+        wait = await sync_to_async(self.reserve, thread_sensitive=False)(model, tokens, max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def backoff(self, model: str, seconds: float):
+        """Empty a model's buckets for `seconds`, e.g. after the provider answered 429."""
+        limits = self.limits_for(model)
+        if limits is None:
+            return
+        self._reserve(model, limits, 0, 0, UNBOUNDED_WAIT, penalty=seconds)
+        logger.warning(f"🚦 {model} returned 429, pausing all callers for {seconds:.1f}s")
+
+    def headroom(self, models: Iterable[str] = None) -> Dict[str, Dict]:
+        """
+        Capacity left per model, as exposed by the rate limits endpoint.
+
+        Returns:
+            {model: {'rpm', 'tpm', 'requests_available', 'tokens_available',
+            'requests_headroom', 'tokens_headroom'}}; headroom is the available
+            fraction of a minute's budget (negative while callers are queued)
+        """
+        result = {}
+        for model in models or self.limits:
+            limits = self.limits_for(model)
+            if limits is None:
+                continue
+            _, _, requests, tokens = self._reserve(model, limits, 0, 0, UNBOUNDED_WAIT)
+            result[model] = {
+                'rpm': limits.rpm or None,
+                'tpm': limits.tpm or None,
+                'requests_available': round(requests, 1) if limits.rpm else None,
+                'tokens_available': round(tokens) if limits.tpm else None,
+                'requests_headroom': round(requests / limits.rpm, 3) if limits.rpm else None,
+                'tokens_headroom': round(tokens / limits.tpm, 3) if limits.tpm else None,
+            }
+        return result
+
+
+rate_limiter = RateLimiter()
+
+
+def estimate_chat_tokens(messages, max_tokens: int = None) -> int:
+    """
+    Tokens a chat completion counts against TPM: its input plus `max_tokens`.
+
+    Args:
+        messages: OpenAI-style message dicts or LangChain messages
+        max_tokens: Completion limit of the request (default OPENAI_MAX_TOKENS)
+    """
+    from .context import count_tokens
+
+    text = '\n'.join(
+        str(message.get('content', '') if isinstance(message, dict) else getattr(message, 'content', message))
+        for message in messages
+    )
+    return count_tokens(text) + (settings.OPENAI_MAX_TOKENS if max_tokens is None else max_tokens)
+
+
+def _retry_after(error) -> Optional[float]:
+    """Retry-After of a provider 429, or None for any other error."""
+    if getattr(error, 'status_code', None) != 429:
+        return None
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after') or DEFAULT_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+@contextmanager
+def rate_limited(model: str, tokens: int = 0, max_wait: float = None):
+    """
+    Wait for capacity before a provider call; turn a 429 into a cluster-wide pause.
+
+    Raises:
+        RateLimitExceeded: If no capacity is free within max_wait, or the provider answered 429
+    """
+    rate_limiter.acquire(model, tokens, max_wait)
+    try:
+        yield
+    except Exception as e:
+        retry_after = _retry_after(e)
+        if retry_after is None:
+            raise
+        rate_limiter.backoff(model, retry_after)
+        raise RateLimitExceeded(model, retry_after) from e
+
+
+@asynccontextmanager
+async def arate_limited(model: str, tokens: int = 0, max_wait: float = None):
+    """Async equivalent of `rate_limited`."""
+    await rate_limiter.aacquire(model, tokens, max_wait)
+    try:
+        yield
+    except Exception as e:
+        retry_after = _retry_after(e)
+        if retry_after is None:
+            raise
+        await sync_to_async(rate_limiter.backoff, thread_sensitive=False)(model, retry_after)
+        raise RateLimitExceeded(model, retry_after) from e
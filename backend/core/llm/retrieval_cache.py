@@ -0,0 +1,190 @@
+"""
+Retrieval-result cache versioned by tenant inventory.
+
+Repeated (tenant, role, query) retrievals return the same ranking until a
+property or document of the tenant changes, so `_hybrid_search` stores the
+ranked ids and scores under a key that embeds the tenant's inventory version:
+
+    retrieval_cache:{tenant}:{role}:v{version}:{k}:{md5(normalized query)}
+
+Saving, deleting or bulk-importing inventory bumps the version with a single
+INCR, which makes every older key unreachable; they simply expire after
+RETRIEVAL_CACHE_TTL_SECONDS, so invalidation never scans keys. A hit skips
+both database searches and rehydrates the rows with one `in_bulk` per model.
+
+With DummyCache (no Redis) there is no version, so lookups miss and stores
+are no-ops.
+"""
+
+import hashlib
+import logging
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.documents.models import Document
+from apps.properties.models import Property
+
+from .hybrid_search import _EXCLUDED_COLUMNS
+from .semantic_cache import _STATS_FIELDS
+
+logger = logging.getLogger(__name__)
+
+_MODELS = {'document': Document, 'property': Property}
+
+
+def _version_key(tenant_id) -> str:
+    return f"inventory_version:{tenant_id}"
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivial variants share an entry."""
+    return ' '.join(query.lower().split())
+
+
+def get_inventory_version(tenant_id, cache=None) -> Optional[int]:
+    """
+    Current inventory version of a tenant, initialised on first use.
+
+    A fresh counter starts at the current time in milliseconds rather than 1,
+    so a counter evicted from Redis never comes back at a version whose
+    entries are still cached.
+    """
+    cache = cache or caches['default']
+    key = _version_key(tenant_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_inventory_version(tenant_id, update_fields=None):
+    """
+    Invalidate every cached retrieval of a tenant.
+
+    Called from Property/Document save and delete, and after bulk imports or
+    queryset updates that bypass model saves. Saves that only touch the
+    retrieval statistics are ignored.
+    """
+    if not settings.RETRIEVAL_CACHE_ENABLED:
+        return
+
+    if update_fields is not None and set(update_fields) <= _STATS_FIELDS:
+        return
+
+    cache = caches['default']
+    key = _version_key(tenant_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Not initialised yet (or evicted): nothing cached can match a new version
+        cache.add(key, int(time.time() * 1000), timeout=None)
+    except Exception as e:
+        logger.error(f"Error bumping inventory version for tenant {tenant_id}: {e}")
+
+
+class RetrievalCache:
+    """
+    Ranked retrieval hits for one (tenant, role) pair.
+
+    The key is taken before searching, so results of a search that raced
+    with an inventory change land under the old, already unreachable version.
+
+    Usage:
+        cache = RetrievalCache(tenant_id, 'buyer')
+        key = cache.key(query, k)
+        fused = cache.get(key)
+        if fused is None:
+            fused = run_search(...)
+            cache.set(key, fused)
+    """
+
+    def __init__(self, tenant_id: str, user_role: str, cache=None):
+        self.cache = cache or caches['default']
+        self.tenant_id = tenant_id
+        self.user_role = user_role
+        self.ttl = settings.RETRIEVAL_CACHE_TTL_SECONDS
+
+    def key(self, query: str, k: int) -> Optional[str]:
+        """Cache key at the current inventory version (None when caching is off)."""
+        if not settings.RETRIEVAL_CACHE_ENABLED:
+            return None
+
+        try:
+            version = get_inventory_version(self.tenant_id, self.cache)
+        except Exception as e:
+            logger.error(f"Error reading inventory version for tenant {self.tenant_id}: {e}")
+            return None
+        if version is None:
+            return None
+
+        digest = hashlib.md5(normalize_query(query).encode()).hexdigest()
+        return f"retrieval_cache:{self.tenant_id}:{self.user_role}:v{version}:{k}:{digest}"
+
+    def _rehydrate(self, hits: List[List]) -> Optional[List[Dict]]:
+        """Load the cached hits' rows, or None if any of them is gone."""
+        ids = {}
+        for obj_type, obj_id, *_ in hits:
+            ids.setdefault(obj_type, []).append(obj_id)
+
+        objects = {}
+        for obj_type, obj_ids in ids.items():
+            model = _MODELS[obj_type]
+            deferred = [f.name for f in model._meta.concrete_fields if f.column in _EXCLUDED_COLUMNS]
+            rows = model.objects.filter(
+                tenant_id=self.tenant_id, is_active=True
+            ).defer(*deferred).in_bulk(obj_ids)
+            objects.update({(obj_type, str(pk)): obj for pk, obj in rows.items()})
+
+        fused = []
+        for obj_type, obj_id, vector_score, keyword_score, relevance_score in hits:
+            obj = objects.get((obj_type, obj_id))
+            if obj is None:
+                return None
+            fused.append({
+                'object': obj,
+                'type': obj_type,
+                'vector_score': vector_score,
+                'keyword_score': keyword_score,
+                'relevance_score': relevance_score,
+            })
+        return fused
+
+    def get(self, key: Optional[str]) -> Optional[List[Dict]]:
+        """Cached fused hits (same shape as `hybrid_search_sql`) or None."""
+        if key is None:
+            return None
+
+        try:
+            hits = self.cache.get(key)
+            if hits is None:
+                return None
+
+            fused = self._rehydrate(hits)
+            if fused is None:
+                self.cache.delete(key)
+                return None
+
+            logger.info(f"Retrieval cache hit ({len(fused)} results)")
+            return fused
+        except Exception as e:
+            logger.error(f"Retrieval cache lookup failed: {e}")
+            return None
+
+    def set(self, key: Optional[str], fused: List[Dict]):
+        """Store the ranked ids and scores of fused hits."""
+        if key is None:
+            return
+
+        try:
+            hits = [
+                [entry['type'], str(entry['object'].id), entry['vector_score'],
+                 entry['keyword_score'], entry['relevance_score']]
+                for entry in fused
+            ]
+            self.cache.set(key, hits, timeout=self.ttl)
+        except Exception as e:
+            logger.error(f"Retrieval cache store failed: {e}")
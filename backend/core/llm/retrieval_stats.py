@@ -0,0 +1,144 @@
+"""
+Buffered retrieval statistics for documents and properties.
+
+RAG requests only record hits in an in-process buffer. A background thread
+flushes the buffer every RETRIEVAL_STATS_FLUSH_SECONDS (or sooner once
+RETRIEVAL_STATS_MAX_PENDING objects are waiting) with one UPDATE per model.
+The UPDATE computes the new counts and running averages from F() expressions,
+so concurrent workers never overwrite each other's increments.
+"""
+
+import atexit
+import logging
+import threading
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, DecimalField, F, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+
+def apply_retrieval_stats(model, stats: Dict[object, Tuple[int, Decimal]]) -> int:
+    """
+    Atomically add retrieval counts and relevance scores in one UPDATE.
+
+    Args:
+        model: Document or Property
+        stats: {object_id: (hit_count, relevance_score_sum)}
+
+    Returns:
+        Number of rows updated
+    """
+    if not stats:
+        return 0
+
+    hits = Case(
+        *[When(id=obj_id, then=Value(count)) for obj_id, (count, _) in stats.items()],
+        output_field=IntegerField()
+    )
+    score_sum = Case(
+        *[When(id=obj_id, then=Value(total)) for obj_id, (_, total) in stats.items()],
+        output_field=DecimalField(max_digits=12, decimal_places=6)
+    )
+
+    # Every right-hand side sees the row as it was before this UPDATE
+    return model.objects.filter(id__in=list(stats)).update(
+        avg_relevance_score=Case(
+            When(avg_relevance_score__isnull=True, then=score_sum / hits),
+            default=(F('avg_relevance_score') * F('times_retrieved') + score_sum) / (F('times_retrieved') + hits),
+            output_field=DecimalField(max_digits=4, decimal_places=3)
+        ),
+        times_retrieved=F('times_retrieved') + hits,
+    )
+
+
+class RetrievalStatsBuffer:
+    """
+    Thread-safe buffer of retrieval hits, flushed in the background.
+
+    Usage:
+        retrieval_stats.record(top_results)  # on the request path, no queries
+        retrieval_stats.flush()              # normally done by the flusher thread
+    """
+
+    def __init__(self, flush_interval: float = None, max_pending: int = None):
+        self.flush_interval = flush_interval or settings.RETRIEVAL_STATS_FLUSH_SECONDS
+        self.max_pending = max_pending or settings.RETRIEVAL_STATS_MAX_PENDING
+
+        # (type, id) -> [hit_count, relevance_score_sum]
+        self._pending: Dict[Tuple[str, str], List] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher = None
+
+    def record(self, results: List[Dict]):
+        """Buffer hits from `_hybrid_search` result dictionaries."""
+        with self._lock:
+            for result in results:
+                key = (result['type'], result['id'])
+                entry = self._pending.setdefault(key, [0, Decimal('0')])
+                entry[0] += 1
+                entry[1] += Decimal(str(round(result['relevance_score'], 6)))
+            pending = len(self._pending)
+
+        self._ensure_flusher()
+        if pending >= self.max_pending:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """Write all buffered hits. Returns the number of rows updated."""
+        from apps.documents.models import Document
+        from apps.properties.models import Property
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        by_model = {'document': {}, 'property': {}}
+        for (obj_type, obj_id), (count, total) in pending.items():
+            by_model[obj_type][obj_id] = (count, total)
+
+        updated = 0
+        try:
+            updated += apply_retrieval_stats(Document, by_model['document'])
+            updated += apply_retrieval_stats(Property, by_model['property'])
+            logger.debug(f"Flushed retrieval stats for {updated} objects")
+        except Exception as e:
+            logger.error(f"Error flushing retrieval stats: {e}", exc_info=True)
+
+        return updated
+
+    def _ensure_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(
+                target=self._run, name='retrieval-stats-flusher', daemon=True
+            )
+            self._flusher.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            close_old_connections()
+
+
+retrieval_stats = RetrievalStatsBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        retrieval_stats.flush()
+    except Exception:
+        pass
@@ -0,0 +1,218 @@
+"""
+Embedding-based query routing.
+
+The query embedding computed for retrieval is compared against one centroid
+per route, built from the labeled example queries below:
+
+    simple              -> retrieval + fast model
+    comparative         -> retrieval + strong model
+    financial_analysis  -> retrieval + strong model
+    greeting            -> templated answer, no retrieval or LLM call
+    out_of_scope        -> templated answer, no retrieval or LLM call
+
+A strong-model route must clear ROUTER_COMPLEX_THRESHOLD and beat the simple
+centroid by ROUTER_MARGIN; templated routes must clear
+ROUTER_TEMPLATE_THRESHOLD. Anything else goes to the fast model. Centroids
+are embedded once and cached, so routing adds no API call per query.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+from .clients import get_embeddings
+from .codec import decode_vector, encode_vector
+from .prompts import ROUTE_TEMPLATES
+
+logger = logging.getLogger(__name__)
+
+SIMPLE = 'simple'
+COMPARATIVE = 'comparative'
+FINANCIAL_ANALYSIS = 'financial_analysis'
+GREETING = 'greeting'
+OUT_OF_SCOPE = 'out_of_scope'
+
+COMPLEX_ROUTES = (COMPARATIVE, FINANCIAL_ANALYSIS)
+TEMPLATE_ROUTES = (GREETING, OUT_OF_SCOPE)
+
+ROUTE_EXAMPLES = {
+    SIMPLE: [
+        "What is the price of Villa Mar?",
+        "How many bedrooms does the condo in Tamarindo have?",
+        "Show me houses for sale in Escazú",
+        "Is there a pool?",
+        "What properties do you have near the beach?",
+        "Does the apartment include parking?",
+        "¿Cuánto cuesta la casa en Santa Ana?",
+        "¿Cuántas habitaciones tiene el apartamento?",
+        "Busco una casa de 3 habitaciones en Heredia",
+        "What is the return policy for the booking deposit?",
+        "What time is check-in?",
+    ],
+    COMPARATIVE: [
+        "Compare Villa Mar and Casa Luna",
+        "Which is better for a family, the condo in Jacó or the house in Atenas?",
+        "What are the differences between these two properties?",
+        "Tamarindo versus Nosara for a vacation home",
+        "Rank these listings by price per square meter",
+        "¿Cuál es mejor, la casa en Escazú o el apartamento en Rohrmoser?",
+        "Compara las propiedades en Guanacaste con las de Puntarenas",
+    ],
+    FINANCIAL_ANALYSIS: [
+        "What ROI can I expect if I rent this villa on Airbnb?",
+        "Calculate the cap rate for this property",
+        "Is this a good investment considering taxes and HOA fees?",
+        "Forecast the appreciation of land prices in Guanacaste",
+        "What are the legal requirements and taxes for foreigners buying property?",
+        "Estimate monthly cash flow with a 20% down payment mortgage",
+        "¿Cuál es el retorno de inversión de alquilar este condominio?",
+        "Analiza los riesgos legales y fiscales de comprar esta propiedad",
+    ],
+    GREETING: [
+        "Hi",
+        "Hello there",
+        "Good morning",
+        "Thanks!",
+        "Thank you, that's all",
+        "Hola",
+        "Buenos días",
+        "Muchas gracias",
+    ],
+    OUT_OF_SCOPE: [
+        "Write me a poem about cats",
+        "Who won the football match yesterday?",
+        "Help me debug my Python code",
+        "What's the capital of Australia?",
+        "Tell me a joke",
+        "Escríbeme una canción",
+        "¿Quién ganó las elecciones en Estados Unidos?",
+    ],
+}
+
+
+@dataclass
+class RouteDecision:
+    """Outcome of routing one query."""
+    route: str
+    score: float
+    use_complex_model: bool = False
+    template: Optional[str] = None
+    scores: Dict[str, float] = field(default_factory=dict)
+
+    def as_metadata(self) -> Dict:
+        return {
+            'route': self.route,
+            'score': round(self.score, 4),
+            'scores': {name: round(score, 4) for name, score in self.scores.items()},
+        }
+
+
+class QueryRouter:
+    """
+    Nearest-centroid classifier over query embeddings.
+
+    Usage:
+        router = get_query_router()
+        decision = router.route(query, query_embedding)
+        if decision.template:
+            return decision.template
+    """
+
+    def __init__(self, examples: Dict[str, List[str]] = None):
+        self.examples = examples or ROUTE_EXAMPLES
+        self._centroids = None
+        self._lock = threading.Lock()
+
+    def _cache_key(self) -> str:
+        digest = hashlib.md5(json.dumps(self.examples, sort_keys=True).encode()).hexdigest()
+        return f"router_centroids:{settings.OPENAI_EMBEDDING_MODEL}:{digest}"
+
+    def _build_centroids(self) -> Dict[str, np.ndarray]:
+        cache = caches['embeddings']
+        cache_key = self._cache_key()
+
+        cached = cache.get(cache_key)
+        if cached:
+            return {name: decode_vector(vector) for name, vector in cached.items()}
+
+        names = list(self.examples)
+        texts = [text for name in names for text in self.examples[name]]
+        vectors = np.asarray(get_embeddings().embed_documents(texts), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        centroids = {}
+        offset = 0
+        for name in names:
+            count = len(self.examples[name])
+            centroid = vectors[offset:offset + count].mean(axis=0)
+            centroids[name] = centroid / np.linalg.norm(centroid)
+            offset += count
+
+        cache.set(cache_key, {name: encode_vector(vector) for name, vector in centroids.items()}, timeout=None)
+        logger.info(f"Built {len(centroids)} router centroids from {len(texts)} examples")
+        return centroids
+
+    @property
+    def centroids(self) -> Dict[str, np.ndarray]:
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    self._centroids = self._build_centroids()
+        return self._centroids
+
+    def route(self, query: str, query_embedding: List[float]) -> RouteDecision:
+        """
+        Pick a route for a query from its embedding.
+
+        Falls back to the simple route if routing is disabled or fails.
+        """
+        if not settings.ROUTER_ENABLED:
+            return RouteDecision(route=SIMPLE, score=0.0)
+
+        try:
+            vector = np.asarray(query_embedding, dtype=np.float32)
+            vector /= np.linalg.norm(vector)
+            scores = {name: float(centroid @ vector) for name, centroid in self.centroids.items()}
+        except Exception as e:
+            logger.warning(f"Query routing failed, using simple route: {e}")
+            return RouteDecision(route=SIMPLE, score=0.0)
+
+        best = max(scores, key=scores.get)
+        best_score = scores[best]
+        decision = RouteDecision(route=SIMPLE, score=scores.get(SIMPLE, 0.0), scores=scores)
+
+        if best in COMPLEX_ROUTES:
+            if (best_score >= settings.ROUTER_COMPLEX_THRESHOLD
+                    and best_score - scores.get(SIMPLE, 0.0) >= settings.ROUTER_MARGIN):
+                decision.route = best
+                decision.score = best_score
+                decision.use_complex_model = True
+        elif best in TEMPLATE_ROUTES:
+            if settings.ROUTER_TEMPLATES_ENABLED and best_score >= settings.ROUTER_TEMPLATE_THRESHOLD:
+                decision.route = best
+                decision.score = best_score
+                decision.template = ROUTE_TEMPLATES[best]
+
+        logger.info(
+            f"🧭 Route '{decision.route}' ({decision.score:.3f}, nearest '{best}' {best_score:.3f}) "
+            f"for: {query[:80]}"
+        )
+        return decision
+
+
+_router = None
+
+
+def get_query_router() -> QueryRouter:
+    """Process-wide router (centroids are built once)."""
+    global _router
+    if _router is None:
+        _router = QueryRouter()
+    return _router
@@ -0,0 +1,314 @@
+"""
+Semantic answer cache keyed on query-embedding similarity.
+
+Each (tenant, role) pair keeps a compact index in the default cache (Redis in
+production): entry ids plus a float32 matrix of the answered queries'
+embeddings. A lookup is one GET of the index and one matmul; if the nearest
+neighbour clears SEMANTIC_CACHE_THRESHOLD the stored answer is returned and
+the LLM call is skipped.
+
+Entries and indexes are stored as compressed msgpack (see codec); entries
+pickled by earlier versions are still read.
+
+Entries expire after LLM_CACHE_TTL_HOURS and the index is capped at
+SEMANTIC_CACHE_MAX_ENTRIES with least-recently-used eviction. Hits don't
+rewrite the index: they refresh a small per-entry "used" key at most every
+_TOUCH_SECONDS, and eviction merges those in. Writers (store, pruning) update
+the shared index under a short cache.add() lock, so concurrent workers don't
+overwrite each other's rows.
+
+Every entry records the version token of each property/document it was
+answered from; saving one of them replaces its token, and a hit whose tokens
+no longer match is treated as a miss and pruned.
+
+With DummyCache (no Redis) every lookup misses and stores are no-ops.
+"""
+
+import hashlib
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .codec import decode_payload, encode_payload
+
+logger = logging.getLogger(__name__)
+
+# Saves that only touch these fields don't change what an answer would say
+_STATS_FIELDS = {'times_retrieved', 'avg_relevance_score'}
+
+# Index writer lock: held for one read-modify-write, waited on briefly
+_LOCK_TIMEOUT = 5
+_LOCK_WAIT_SECONDS = 1.0
+_LOCK_POLL_SECONDS = 0.01
+
+# Minimum interval between "used" updates of one entry
+_TOUCH_SECONDS = 300
+
+
+def _source_key(obj_type: str, obj_id) -> str:
+    return f"semantic_cache:source:{obj_type}:{obj_id}"
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour answer cache for one (tenant, role) pair.
+
+    Usage:
+        cache = SemanticCache(tenant_id, 'buyer')
+        hit = cache.lookup(query_embedding)
+        if hit is None:
+            ...
+            cache.store(query, query_embedding, response_text, sources)
+    """
+
+    def __init__(self, tenant_id: str, user_role: str, cache=None):
+        self.cache = cache or caches['default']
+        self.prefix = f"semantic_cache:{tenant_id}:{user_role}"
+        self.index_key = f"{self.prefix}:index"
+        self.lock_key = f"{self.prefix}:lock"
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD
+        self.ttl = settings.LLM_CACHE_TTL_HOURS * 3600
+        self.max_entries = settings.SEMANTIC_CACHE_MAX_ENTRIES
+
+    def _entry_key(self, entry_id: str) -> str:
+        return f"{self.prefix}:entry:{entry_id}"
+
+    def _used_key(self, entry_id: str) -> str:
+        return f"{self.prefix}:used:{entry_id}"
+
+    @contextmanager
+    def _index_lock(self):
+        """
+        Serialize index writers across workers.
+
+        Yields False if the lock could not be taken in time; callers skip the
+        write (the cache is best-effort). The lock expires on its own if a
+        worker dies holding it.
+        """
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + _LOCK_WAIT_SECONDS
+        while not self.cache.add(self.lock_key, token, timeout=_LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                logger.debug(f"Semantic cache index busy: {self.prefix}")
+                yield False
+                return
+            time.sleep(_LOCK_POLL_SECONDS)
+
+        try:
+            yield True
+        finally:
+            if self.cache.get(self.lock_key) == token:
+                self.cache.delete(self.lock_key)
+
+    def _load_index(self) -> Dict:
+        """Load the index, dropping entries older than the TTL."""
+        index = decode_payload(self.cache.get(self.index_key))
+        if not index:
+            return {'ids': [], 'vectors': None, 'created_at': [], 'last_used': []}
+
+        # Copy: frombuffer views are read-only and store() updates rows in place
+        vectors = np.frombuffer(index['vectors'], dtype=np.float32).reshape(len(index['ids']), -1).copy()
+        index = {
+            'ids': list(index['ids']),
+            'vectors': vectors,
+            'created_at': list(index['created_at']),
+            'last_used': list(index['last_used']),
+        }
+
+        cutoff = time.time() - self.ttl
+        expired = [i for i, created in enumerate(index['created_at']) if created < cutoff]
+        if expired:
+            self._drop(index, expired)
+
+        return index
+
+    def _save_index(self, index: Dict):
+        if not index['ids']:
+            self.cache.delete(self.index_key)
+            return
+
+        self.cache.set(self.index_key, encode_payload({
+            'ids': index['ids'],
+            'vectors': index['vectors'].astype(np.float32).tobytes(),
+            'created_at': index['created_at'],
+            'last_used': index['last_used'],
+        }), timeout=self.ttl)
+
+    @staticmethod
+    def _drop(index: Dict, rows: List[int]):
+        keep = [i for i in range(len(index['ids'])) if i not in set(rows)]
+        index['ids'] = [index['ids'][i] for i in keep]
+        index['created_at'] = [index['created_at'][i] for i in keep]
+        index['last_used'] = [index['last_used'][i] for i in keep]
+        index['vectors'] = index['vectors'][keep] if keep else None
+
+    def _remove(self, entry_id: str):
+        """Prune one entry's index row (expired or invalidated)."""
+        with self._index_lock() as locked:
+            if not locked:
+                return
+            index = self._load_index()
+            if entry_id in index['ids']:
+                self._drop(index, [index['ids'].index(entry_id)])
+                self._save_index(index)
+        self.cache.delete(self._used_key(entry_id))
+
+    def _is_current(self, entry: Dict) -> bool:
+        """Whether none of the entry's sources changed since it was stored."""
+        versions = entry.get('versions')
+        if versions is None:
+            # Stored before version tokens; can't tell
+            return False
+        if not versions:
+            return True
+        current = self.cache.get_many(list(versions))
+        return all(current.get(key) == version for key, version in versions.items())
+
+    def _touch(self, index: Dict, row: int):
+        """Record a hit for LRU eviction without rewriting the index."""
+        now = time.time()
+        if now - index['last_used'][row] < _TOUCH_SECONDS:
+            return
+        used_key = self._used_key(index['ids'][row])
+        last_touch = self.cache.get(used_key)
+        if last_touch is None or now - last_touch >= _TOUCH_SECONDS:
+            self.cache.set(used_key, now, timeout=self.ttl)
+
+    def _merge_touches(self, index: Dict):
+        """Fold the per-entry "used" times into the index before evicting."""
+        used = self.cache.get_many([self._used_key(entry_id) for entry_id in index['ids']])
+        for row, entry_id in enumerate(index['ids']):
+            touched = used.get(self._used_key(entry_id))
+            if touched is not None and touched > index['last_used'][row]:
+                index['last_used'][row] = touched
+
+    @staticmethod
+    def _normalize(query_embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def lookup(self, query_embedding: List[float]) -> Optional[Dict]:
+        """
+        Find a cached answer for a similar query.
+
+        Returns:
+            Cached entry dict (response, sources, query, similarity) or None
+        """
+        query = self._normalize(query_embedding)
+        if query is None:
+            return None
+
+        index = self._load_index()
+        if not index['ids'] or index['vectors'].shape[1] != query.shape[0]:
+            return None
+
+        scores = index['vectors'] @ query
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+
+        if similarity < self.threshold:
+            logger.debug(f"Semantic cache miss (best similarity {similarity:.3f})")
+            return None
+
+        entry_id = index['ids'][best]
+        entry = decode_payload(self.cache.get(self._entry_key(entry_id)))
+        if entry is None or not self._is_current(entry):
+            # Expired, evicted or answered from a property/document that changed since
+            self.cache.delete(self._entry_key(entry_id))
+            self._remove(entry_id)
+            return None
+
+        self._touch(index, best)
+
+        logger.info(f"Semantic cache hit (similarity {similarity:.3f}): {entry.get('query', '')[:100]}")
+        return {**entry, 'similarity': similarity}
+
+    def store(self, query: str, query_embedding: List[float], response: str, sources: List[Dict]):
+        """Cache an answer and register it under the sources it cited."""
+        vector = self._normalize(query_embedding)
+        if vector is None:
+            return
+
+        entry_id = hashlib.md5(query.strip().lower().encode()).hexdigest()
+        entry_key = self._entry_key(entry_id)
+
+        source_keys = [_source_key(source.get('type', 'document'), source['id']) for source in sources]
+        current = self.cache.get_many(source_keys) if source_keys else {}
+
+        self.cache.set(entry_key, encode_payload({
+            'query': query,
+            'response': response,
+            'sources': sources,
+            'versions': {key: current.get(key) for key in source_keys},
+            'cached_at': str(timezone.now()),
+        }), timeout=self.ttl)
+
+        with self._index_lock() as locked:
+            if locked:
+                self._add_to_index(entry_id, vector)
+
+    def _add_to_index(self, entry_id: str, vector: np.ndarray):
+        """Insert or refresh an index row and evict beyond the cap (under the index lock)."""
+        index = self._load_index()
+        now = time.time()
+
+        if entry_id in index['ids']:
+            row = index['ids'].index(entry_id)
+            index['vectors'][row] = vector
+            index['created_at'][row] = now
+            index['last_used'][row] = now
+        else:
+            index['ids'].append(entry_id)
+            index['created_at'].append(now)
+            index['last_used'].append(now)
+            if index['vectors'] is None:
+                index['vectors'] = vector[np.newaxis, :]
+            else:
+                index['vectors'] = np.vstack([index['vectors'], vector])
+
+        # Evict least recently used entries beyond the cap
+        overflow = len(index['ids']) - self.max_entries
+        if overflow > 0:
+            self._merge_touches(index)
+            lru = sorted(range(len(index['ids'])), key=lambda i: index['last_used'][i])[:overflow]
+            evicted = [index['ids'][i] for i in lru]
+            self.cache.delete_many(
+                [self._entry_key(entry_id) for entry_id in evicted]
+                + [self._used_key(entry_id) for entry_id in evicted]
+            )
+            self._drop(index, lru)
+
+        self._save_index(index)
+
+
+def invalidate_sources(obj_type: str, obj_id, update_fields=None):
+    """
+    Drop cached answers that cited a property or document.
+
+    Called from Property/Document save and delete. Replaces the object's
+    version token, so every entry that recorded the old one stops matching;
+    their index rows are pruned on the next lookup that hits them.
+    """
+    if not settings.ENABLE_SEMANTIC_CACHE:
+        return
+
+    if update_fields is not None and set(update_fields) <= _STATS_FIELDS:
+        return
+
+    try:
+        # Outlives every entry that could have recorded the previous token
+        caches['default'].set(
+            _source_key(obj_type, obj_id), uuid.uuid4().hex,
+            timeout=settings.LLM_CACHE_TTL_HOURS * 3600
+        )
+        logger.debug(f"Invalidated cached answers citing {obj_type} {obj_id}")
+    except Exception as e:
+        logger.error(f"Error invalidating semantic cache for {obj_type} {obj_id}: {e}")
@@ -0,0 +1,106 @@
+"""
+Rolling conversation summaries.
+
+Prompts carry Conversation.summary plus only the messages created after
+Conversation.summary_through. Once those unsummarized messages, minus the
+newest CONVERSATION_SUMMARY_KEEP_MESSAGES, add up to more than
+CONVERSATION_SUMMARY_TRIGGER_TOKENS, a background task folds them into the
+summary. Long sessions therefore keep a roughly constant prompt size.
+"""
+
+import logging
+from typing import List
+
+from django.conf import settings
+from django.core.cache import caches
+from langchain_core.messages import HumanMessage
+
+from apps.conversations.models import Conversation, Message
+from .clients import get_chat_model
+from .rate_limit import estimate_chat_tokens, rate_limited
+from .context import count_tokens
+from .prompts import CONVERSATION_SUMMARY_PROMPT
+
+logger = logging.getLogger(__name__)
+
+
+def unsummarized_messages(conversation: Conversation):
+    """Messages not yet folded into the summary, oldest first."""
+    messages = conversation.messages.order_by('created_at')
+    if conversation.summary_through:
+        messages = messages.filter(created_at__gt=conversation.summary_through)
+    return messages
+
+
+def _format_messages(messages: List[Message]) -> str:
+    return "\n".join(f"{msg.role.upper()}: {msg.content}" for msg in messages)
+
+
+def summarize_conversation(conversation_id: str) -> bool:
+    """
+    Fold older unsummarized messages into Conversation.summary.
+
+    Does nothing until the foldable messages cross the token threshold.
+
+    Returns:
+        True if the summary was updated
+    """
+    cache = caches['default']
+    lock_key = f"conversation_summary_lock:{conversation_id}"
+    if not cache.add(lock_key, 1, timeout=300):
+        logger.debug(f"Summary already running for conversation {conversation_id}")
+        return False
+
+    try:
+        conversation = Conversation.objects.get(id=conversation_id)
+        messages = list(unsummarized_messages(conversation))
+
+        keep = settings.CONVERSATION_SUMMARY_KEEP_MESSAGES
+        foldable = messages[:-keep] if keep else messages
+        if not foldable:
+            return False
+
+        transcript = _format_messages(foldable)
+        if count_tokens(transcript) < settings.CONVERSATION_SUMMARY_TRIGGER_TOKENS:
+            return False
+
+        prompt = CONVERSATION_SUMMARY_PROMPT.format(
+            max_words=settings.CONVERSATION_SUMMARY_MAX_WORDS,
+            summary=conversation.summary or '(none)',
+            messages=transcript
+        )
+        prompt_messages = [HumanMessage(content=prompt)]
+        with rate_limited(settings.OPENAI_MODEL_CHAT, estimate_chat_tokens(prompt_messages),
+                          settings.LLM_RATE_LIMIT_BATCH_MAX_WAIT):
+            response = get_chat_model(settings.OPENAI_MODEL_CHAT).invoke(prompt_messages)
+        summary = response.content.strip()
+
+        # update() leaves updated_at alone, so conversation ordering is unaffected
+        Conversation.objects.filter(id=conversation.id).update(
+            summary=summary,
+            summary_through=foldable[-1].created_at
+        )
+
+        logger.info(
+            f"✓ Summarized {len(foldable)} messages of conversation {conversation_id} "
+            f"({count_tokens(transcript)} → {count_tokens(summary)} tokens)"
+        )
+        return True
+
+    finally:
+        cache.delete(lock_key)
+
+
+def schedule_summary(conversation: Conversation):
+    """Queue a background summary after a chat turn, if one could be due."""
+    if not settings.CONVERSATION_SUMMARY_ENABLED:
+        return
+
+    try:
+        if unsummarized_messages(conversation).count() <= settings.CONVERSATION_SUMMARY_KEEP_MESSAGES:
+            return
+
+        from apps.conversations.tasks import summarize_conversation_task
+        summarize_conversation_task.delay(str(conversation.id))
+    except Exception as e:
+        logger.warning(f"Could not schedule summary for conversation {conversation.id}: {e}")
@@ -0,0 +1,87 @@
+"""
+Per-stage timing of one RAG query.
+
+RAGPipeline records how long each stage took and returns the breakdown with
+the result (and in the final stream chunk); the chat views persist it in
+Message.metadata['timings'], so slow stages can be found per tenant from
+stored messages:
+
+    embedding             query embedding, including the embedding cache
+    semantic_cache        semantic cache lookup
+    routing               query routing
+    query_filters         parsing price/bedroom/type/location constraints
+    retrieval_cache       ranked-retrieval cache lookup
+    vector_search         vector backend search
+    keyword_search        full-text search
+    hybrid_search         single SQL statement (pgvector: vector + keyword + fusion)
+    fusion                rank fusion and row hydration
+    history               conversation history load
+    context_packing       context packing into the token budget
+    time_to_first_token   query start to the first generated token (streams)
+    generation            chat model call
+
+Stages that ran concurrently (async pipeline) overlap, so their sum can
+exceed `total`.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+# Stage names in pipeline order
+STAGES = (
+    'embedding', 'semantic_cache', 'routing', 'query_filters', 'retrieval_cache',
+    'vector_search', 'keyword_search', 'hybrid_search', 'fusion', 'history',
+    'context_packing', 'time_to_first_token', 'generation',
+)
+
+
+class StageTimings:
+    """
+    Accumulates wall time per stage, in milliseconds.
+
+    Usage:
+        timings = StageTimings()
+        with timings.stage('embedding'):
+            embedding = embed(query)
+        embedding = await timings.timed('embedding', aembed(query))
+        timings.as_dict()  # {'embedding': 112.4, ..., 'total': 1830.2}
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the query started."""
+        return (time.perf_counter() - self.start) * 1000
+
+    def add(self, name: str, elapsed_ms: float):
+        with self._lock:
+            self._stages[name] = self._stages.get(name, 0.0) + elapsed_ms
+
+    def mark(self, name: str):
+        """Record the time since the query started (e.g. time to first token)."""
+        with self._lock:
+            self._stages.setdefault(name, self.elapsed_ms())
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    async def timed(self, name: str, awaitable):
+        """Await `awaitable`, recording its duration under `name`."""
+        with self.stage(name):
+            return await awaitable
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            stages = {name: round(value, 1) for name, value in self._stages.items()}
+        stages['total'] = round(self.elapsed_ms(), 1)
+        return stages
@@ -0,0 +1,690 @@
+"""
+In-process vector index for RAG retrieval.
+
+Keeps one contiguous float32 matrix per (tenant, role) in a memory-mapped
+file under VECTOR_INDEX_DIR. Every web worker maps the same file, so the
+vectors live once in the OS page cache and a top-k cosine query is a single
+NumPy matmul instead of deserializing embeddings row by row from the
+database. Works the same on SQLite and Postgres because it only reads the
+`embedding` column through the ORM.
+
+With VECTOR_INDEX_QUANTIZATION set, every row also gets int8 or binary
+codes (see quantization.py). Searches scan the codes for a pool of
+k * VECTOR_INDEX_RERANK_FACTOR candidates (4x that for binary) and rerank
+only those rows with exact cosine, so the float32 file is read a few pages
+per query and only the codes need to stay resident.
+
+Row keys live in fixed-width slots next to the rows, so a single upsert or
+remove writes one slot plus a small metadata file; writers find a key's row
+through an in-memory dict that is rebuilt only when another process changed
+the index.
+
+VECTOR_INDEX_DIR must be shared by every web and Celery container (see the
+compose files): saves in either one update the index in place.
+
+Layout per index:
+    <VECTOR_INDEX_DIR>/<tenant_id>/<role>.f32        rows (capacity x dimensions)
+    <VECTOR_INDEX_DIR>/<tenant_id>/<role>.keys       row keys ("type:id", KEY_BYTES each)
+    <VECTOR_INDEX_DIR>/<tenant_id>/<role>.q8         int8 codes + <role>.q8s row scales
+    <VECTOR_INDEX_DIR>/<tenant_id>/<role>.b1         binary codes (packed sign bits)
+    <VECTOR_INDEX_DIR>/<tenant_id>/<role>.meta.json  count, capacity, quantization
+    <VECTOR_INDEX_DIR>/<tenant_id>/<role>.lock       writer lock
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from . import quantization
+from .codec import decode_vector
+
+logger = logging.getLogger(__name__)
+
+# Minimum number of rows allocated when an index file is (re)created
+MIN_CAPACITY = 1024
+
+# Width of a row key slot; "property:<uuid>" takes 45
+KEY_BYTES = 64
+_KEY_DTYPE = f'S{KEY_BYTES}'
+
+# Code file suffixes per quantization mode
+_CODE_SUFFIXES = {quantization.INT8: 'q8', quantization.BINARY: 'b1'}
+
+_indexes: Dict[Tuple[str, str], 'VectorIndex'] = {}
+_indexes_lock = threading.Lock()
+
+
+def _as_vector(embedding, dimensions: int) -> Optional[np.ndarray]:
+    """
+    Convert a stored embedding to a unit-length float32 vector.
+
+    Accepts lists, NumPy arrays, pgvector text literals ("[0.1,0.2,...]")
+    and codec-encoded bytes. Returns None when the value is empty or has the
+    wrong dimensions.
+    """
+    vector = decode_vector(embedding)
+    if vector is None or vector.shape[0] != dimensions:
+        return None
+
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0:
+        return None
+
+    return vector / norm
+
+
+def _make_key(obj_type: str, obj_id) -> str:
+    return f"{obj_type}:{obj_id}"
+
+
+def _split_key(key) -> Tuple[str, str]:
+    if isinstance(key, bytes):
+        key = key.decode()
+    obj_type, obj_id = key.split(':', 1)
+    return obj_type, obj_id
+
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int, int]]:
+    """(inode, mtime, size) of a file, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _top_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, highest first."""
+    if len(scores) > k:
+        top = np.argpartition(-scores, k)[:k]
+        return top[np.argsort(-scores[top])]
+    return np.argsort(-scores)
+
+
+class VectorIndex:
+    """
+    Memory-mapped cosine-similarity index for one (tenant, role) pair.
+
+    Rows are stored L2-normalized, so the dot product with a normalized
+    query is the cosine similarity. Readers re-map the file whenever the
+    metadata file changes; writers serialize on an flock so several
+    workers can update the same index safely.
+
+    Usage:
+        index = get_vector_index(tenant_id, 'buyer')
+        hits = index.search(query_embedding, k=10)
+        # [('property', '<uuid>', 0.83), ('document', '<uuid>', 0.79), ...]
+    """
+
+    def __init__(self, tenant_id: str, user_role: str,
+                 base_dir: Optional[str] = None, dimensions: Optional[int] = None,
+                 quantization_mode: Optional[str] = None, rerank_factor: Optional[int] = None):
+        self.tenant_id = str(tenant_id)
+        self.user_role = user_role
+        self.dimensions = dimensions or settings.EMBEDDING_DIMENSIONS
+        # Optional settings: indexes built with explicit arguments (tests, tools) need no config
+        self.quantization = quantization_mode or getattr(
+            settings, 'VECTOR_INDEX_QUANTIZATION', quantization.NONE
+        )
+        if self.quantization not in quantization.MODES:
+            raise ValueError(f"Unknown VECTOR_INDEX_QUANTIZATION: {self.quantization}")
+        self.rerank_factor = (
+            max(1, rerank_factor or getattr(settings, 'VECTOR_INDEX_RERANK_FACTOR', 10))
+            * quantization.POOL_MULTIPLIER.get(self.quantization, 1)
+        )
+
+        base_dir = Path(base_dir or settings.VECTOR_INDEX_DIR)
+        self.directory = base_dir / self.tenant_id
+        self.data_path = self.directory / f"{user_role}.f32"
+        self.keys_path = self.directory / f"{user_role}.keys"
+        self.meta_path = self.directory / f"{user_role}.meta.json"
+        self.lock_path = self.directory / f"{user_role}.lock"
+        suffix = _CODE_SUFFIXES.get(self.quantization)
+        self.codes_path = self.directory / f"{user_role}.{suffix}" if suffix else None
+        self.scales_path = (
+            self.directory / f"{user_role}.q8s" if self.quantization == quantization.INT8 else None
+        )
+
+        # Reader state, refreshed when the metadata file changes
+        self._stamp = None
+        self._matrix = None
+        self._codes = None
+        self._scales = None
+        self._keys = None
+        self._count = 0
+        self._state_lock = threading.Lock()
+
+        # Writer state: key -> row, valid while the metadata file is unchanged
+        self._rows: Optional[Dict[str, int]] = None
+        self._rows_stamp = None
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def exists(self) -> bool:
+        """Check if the index has been built on disk."""
+        # Indexes written before the .keys file kept keys in the metadata; rebuilt on first use
+        return self.meta_path.exists() and self.data_path.exists() and self.keys_path.exists()
+
+    def __len__(self) -> int:
+        self._refresh()
+        return self._count
+
+    def _read_meta(self) -> Dict:
+        with open(self.meta_path, 'r') as f:
+            return json.load(f)
+
+    def _refresh(self):
+        """Re-map the data file if another process changed the index."""
+        stamp = _file_stamp(self.meta_path)
+        if stamp is None or not self.keys_path.exists():
+            with self._state_lock:
+                self._stamp = None
+                self._matrix = None
+                self._codes = None
+                self._scales = None
+                self._keys = None
+                self._count = 0
+            return
+
+        if stamp == self._stamp:
+            return
+
+        with self._state_lock:
+            if stamp == self._stamp:
+                return
+
+            meta = self._read_meta()
+            if meta['count'] > 0:
+                matrix = np.memmap(
+                    self.data_path,
+                    dtype=np.float32,
+                    mode='r',
+                    shape=(meta['capacity'], meta['dimensions'])
+                )
+                keys = self._map_keys(meta, mode='r')
+            else:
+                matrix, keys = None, None
+
+            codes, scales = None, None
+            if matrix is not None and meta.get('quantization', quantization.NONE) == self.quantization:
+                try:
+                    codes, scales = self._map_codes(meta, mode='r')
+                except FileNotFoundError:
+                    # Written before quantization was enabled; re-quantized on the next write
+                    codes, scales = None, None
+
+            self._matrix = matrix
+            self._codes = codes
+            self._scales = scales
+            self._keys = keys
+            self._count = meta['count']
+            self._stamp = stamp
+
+            logger.debug(f"Vector index loaded: {self.tenant_id}/{self.user_role} ({self._count} rows)")
+
+    def _map_keys(self, meta: Dict, mode: str) -> np.memmap:
+        return np.memmap(self.keys_path, dtype=_KEY_DTYPE, mode=mode, shape=(meta['capacity'],))
+
+    def _map_codes(self, meta: Dict, mode: str):
+        """Map the code (and scale) files, or (None, None) when unquantized."""
+        if self.codes_path is None:
+            return None, None
+
+        dtype, width = quantization.code_width(self.quantization, meta['dimensions'])
+        codes = np.memmap(self.codes_path, dtype=dtype, mode=mode, shape=(meta['capacity'], width))
+        scales = None
+        if self.scales_path is not None:
+            scales = np.memmap(self.scales_path, dtype=np.float32, mode=mode, shape=(meta['capacity'],))
+        return codes, scales
+
+    def search(self, query_embedding: List[float], k: int = 10,
+               allowed: Optional[Dict[str, Set[str]]] = None) -> List[Tuple[str, str, float]]:
+        """
+        Find the k most similar vectors.
+
+        Args:
+            query_embedding: Query embedding vector
+            k: Number of results
+            allowed: Optional {type: ids} restricting the rows of those types
+                (e.g. properties passing SQL pre-filters); other types are
+                searched in full
+
+        Returns:
+            List of (type, id, similarity) tuples, most similar first
+        """
+        self._refresh()
+
+        matrix, codes, scales = self._matrix, self._codes, self._scales
+        keys, count = self._keys, self._count
+        if matrix is None or count == 0 or k <= 0:
+            return []
+
+        query = _as_vector(query_embedding, self.dimensions)
+        if query is None:
+            logger.warning("Query embedding has wrong dimensions for vector index")
+            return []
+
+        # Two-stage search only pays off when the pool is smaller than the index
+        approximate = codes is not None and count > k * self.rerank_factor
+        if approximate:
+            scores = quantization.approximate_scores(
+                self.quantization, codes[:count],
+                scales[:count] if scales is not None else None,
+                query, self.dimensions
+            )
+        else:
+            scores = matrix[:count] @ query
+
+        if allowed is not None:
+            mask = np.fromiter(
+                (obj_type not in allowed or obj_id in allowed[obj_type]
+                 for obj_type, obj_id in map(_split_key, keys[:count])),
+                dtype=bool, count=count
+            )
+            scores = np.where(mask, scores, -np.inf)
+            k = min(k, int(mask.sum()))
+            if k == 0:
+                return []
+
+        if approximate:
+            pool = _top_rows(scores, k * self.rerank_factor)
+            pool = np.sort(pool[np.isfinite(scores[pool])])
+            # Exact rerank: only the pool's float32 rows are read from the map
+            exact = matrix[pool] @ query
+            order = _top_rows(exact, k)
+            top, similarities = pool[order], exact[order]
+        else:
+            top = _top_rows(scores, k)
+            similarities = scores[top]
+
+        results = []
+        for row, similarity in zip(top, similarities):
+            obj_type, obj_id = _split_key(keys[row])
+            results.append((obj_type, obj_id, float(similarity)))
+
+        return results
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _write_lock(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            except BaseException:
+                # A failed write may have left the key -> row dict ahead of the files
+                self._rows = None
+                raise
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_meta(self, meta: Dict):
+        tmp_path = self.meta_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+        # Our own write doesn't invalidate the key -> row dict
+        self._rows_stamp = _file_stamp(self.meta_path)
+
+    def _row_map(self, meta: Dict) -> Dict[str, int]:
+        """key -> row for writers (under the write lock), re-read only after other writers."""
+        if self._rows is None or _file_stamp(self.meta_path) != self._rows_stamp:
+            keys = self._map_keys(meta, mode='r')
+            self._rows = {key.decode(): row for row, key in enumerate(keys[:meta['count']])}
+            del keys
+            self._rows_stamp = _file_stamp(self.meta_path)
+        return self._rows
+
+    def _write_keys(self, keys: np.ndarray, capacity: int):
+        """Write a fresh key file with room for `capacity` slots."""
+        tmp_path = self.keys_path.with_suffix('.keys.tmp')
+        slots = np.memmap(tmp_path, dtype=_KEY_DTYPE, mode='w+', shape=(capacity,))
+        if len(keys):
+            slots[:len(keys)] = keys
+        slots.flush()
+        del slots
+        os.replace(tmp_path, self.keys_path)
+
+    def _write_data(self, rows: np.ndarray, capacity: int):
+        """Write a fresh data file with room for `capacity` rows."""
+        tmp_path = self.data_path.with_suffix('.f32.tmp')
+        matrix = np.memmap(tmp_path, dtype=np.float32, mode='w+',
+                           shape=(capacity, self.dimensions))
+        if len(rows):
+            matrix[:len(rows)] = rows
+        matrix.flush()
+        del matrix
+        os.replace(tmp_path, self.data_path)
+        self._write_codes(rows, capacity)
+
+    def _write_codes(self, rows: np.ndarray, capacity: int):
+        """Write fresh code files for `rows`, quantized block by block."""
+        if self.codes_path is None:
+            return
+
+        dtype, width = quantization.code_width(self.quantization, self.dimensions)
+        codes_tmp = self.codes_path.with_suffix(self.codes_path.suffix + '.tmp')
+        codes = np.memmap(codes_tmp, dtype=dtype, mode='w+', shape=(capacity, width))
+        scales = None
+        if self.scales_path is not None:
+            scales_tmp = self.scales_path.with_suffix(self.scales_path.suffix + '.tmp')
+            scales = np.memmap(scales_tmp, dtype=np.float32, mode='w+', shape=(capacity,))
+
+        for start in range(0, len(rows), quantization.BLOCK_ROWS):
+            block_codes, block_scales = quantization.encode(
+                self.quantization, rows[start:start + quantization.BLOCK_ROWS]
+            )
+            end = start + len(block_codes)
+            codes[start:end] = block_codes
+            if scales is not None:
+                scales[start:end] = block_scales
+
+        codes.flush()
+        del codes
+        os.replace(codes_tmp, self.codes_path)
+        if scales is not None:
+            scales.flush()
+            del scales
+            os.replace(scales_tmp, self.scales_path)
+
+    def _sync_quantization(self, meta: Dict):
+        """Re-quantize an index written under a different VECTOR_INDEX_QUANTIZATION."""
+        if meta.get('quantization', quantization.NONE) == self.quantization:
+            return
+
+        if meta['count'] > 0:
+            matrix = self._open_for_update(meta)
+            self._write_codes(matrix[:meta['count']], meta['capacity'])
+            del matrix
+        else:
+            self._write_codes(np.empty((0, self.dimensions), dtype=np.float32), meta['capacity'])
+        meta['quantization'] = self.quantization
+
+        logger.info(f"Vector index re-quantized: {self.tenant_id}/{self.user_role} ({self.quantization})")
+
+    def _open_for_update(self, meta: Dict) -> np.memmap:
+        return np.memmap(self.data_path, dtype=np.float32, mode='r+',
+                         shape=(meta['capacity'], meta['dimensions']))
+
+    def rebuild(self, entries: Iterable[Tuple[str, str, object]]) -> int:
+        """
+        Replace the whole index.
+
+        Args:
+            entries: Iterable of (type, id, embedding) tuples
+
+        Returns:
+            Number of vectors indexed
+        """
+        keys = []
+        vectors = []
+        for obj_type, obj_id, embedding in entries:
+            vector = _as_vector(embedding, self.dimensions)
+            if vector is None:
+                continue
+            key = _make_key(obj_type, obj_id)
+            if len(key.encode()) > KEY_BYTES:
+                logger.warning(f"Vector index key too long, skipped: {key}")
+                continue
+            keys.append(key)
+            vectors.append(vector)
+
+        rows = np.vstack(vectors) if vectors else np.empty((0, self.dimensions), dtype=np.float32)
+        capacity = max(MIN_CAPACITY, len(keys) * 2)
+
+        with self._write_lock():
+            self._write_data(rows, capacity)
+            self._write_keys(np.array([key.encode() for key in keys], dtype=_KEY_DTYPE), capacity)
+            self._write_meta({
+                'dimensions': self.dimensions,
+                'capacity': capacity,
+                'count': len(keys),
+                'quantization': self.quantization,
+            })
+            self._rows = {key: row for row, key in enumerate(keys)}
+
+        logger.info(f"Vector index rebuilt: {self.tenant_id}/{self.user_role} ({len(keys)} rows)")
+        return len(keys)
+
+    def upsert(self, obj_type: str, obj_id, embedding) -> bool:
+        """
+        Insert or replace a single vector.
+
+        Returns:
+            True if the vector was written
+        """
+        vector = _as_vector(embedding, self.dimensions)
+        if vector is None:
+            return self.remove(obj_type, obj_id)
+
+        key = _make_key(obj_type, obj_id)
+        if len(key.encode()) > KEY_BYTES:
+            logger.warning(f"Vector index key too long, skipped: {key}")
+            return False
+
+        with self._write_lock():
+            if not self.exists():
+                return False
+
+            meta = self._read_meta()
+            rows = self._row_map(meta)
+            self._sync_quantization(meta)
+
+            row = rows.get(key)
+
+            if row is None and meta['count'] >= meta['capacity']:
+                # Grow geometrically; readers pick up the new files via the meta stamp
+                matrix = self._open_for_update(meta)
+                vectors = np.array(matrix[:meta['count']])
+                del matrix
+                keys = np.array(self._map_keys(meta, mode='r')[:meta['count']])
+                meta['capacity'] = max(MIN_CAPACITY, meta['capacity'] * 2)
+                self._write_data(vectors, meta['capacity'])
+                self._write_keys(keys, meta['capacity'])
+
+            if row is None:
+                row = meta['count']
+                keys = self._map_keys(meta, mode='r+')
+                keys[row] = key.encode()
+                keys.flush()
+                del keys
+                rows[key] = row
+                meta['count'] += 1
+
+            matrix = self._open_for_update(meta)
+            matrix[row] = vector
+            matrix.flush()
+            del matrix
+
+            codes, scales = self._map_codes(meta, mode='r+')
+            if codes is not None:
+                row_codes, row_scales = quantization.encode(self.quantization, vector)
+                codes[row] = row_codes[0]
+                codes.flush()
+                if scales is not None:
+                    scales[row] = row_scales[0]
+                    scales.flush()
+                del codes, scales
+
+            self._write_meta(meta)
+
+        return True
+
+    def remove(self, obj_type: str, obj_id) -> bool:
+        """
+        Remove a vector, moving the last row into its slot.
+
+        Returns:
+            True if the vector was present
+        """
+        key = _make_key(obj_type, obj_id)
+
+        with self._write_lock():
+            if not self.exists():
+                return False
+
+            meta = self._read_meta()
+            rows = self._row_map(meta)
+
+            row = rows.pop(key, None)
+            if row is None:
+                return False
+
+            self._sync_quantization(meta)
+
+            last = meta['count'] - 1
+            if row != last:
+                matrix = self._open_for_update(meta)
+                matrix[row] = matrix[last]
+                matrix.flush()
+                del matrix
+
+                codes, scales = self._map_codes(meta, mode='r+')
+                if codes is not None:
+                    codes[row] = codes[last]
+                    codes.flush()
+                    if scales is not None:
+                        scales[row] = scales[last]
+                        scales.flush()
+                    del codes, scales
+
+                keys = self._map_keys(meta, mode='r+')
+                keys[row] = keys[last]
+                keys.flush()
+                rows[keys[row].decode()] = row
+                del keys
+
+            meta['count'] = last
+
+            self._write_meta(meta)
+
+        return True
+
+
+def get_vector_index(tenant_id: str, user_role: str) -> VectorIndex:
+    """Get the process-wide index for a (tenant, role) pair."""
+    key = (str(tenant_id), user_role)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = VectorIndex(tenant_id, user_role)
+                _indexes[key] = index
+    return index
+
+
+def _iter_entries(tenant_id: str, user_role: str):
+    """Yield (type, id, embedding) for everything visible to a role."""
+    from apps.documents.models import Document
+    from apps.properties.models import Property
+
+    documents = Document.objects.filter(
+        tenant_id=tenant_id,
+        is_active=True,
+        embedding__isnull=False
+    ).values_list('id', 'embedding', 'user_roles')
+
+    for doc_id, embedding, user_roles in documents.iterator(chunk_size=2000):
+        if user_role in (user_roles or []):
+            yield 'document', str(doc_id), embedding
+
+    properties = Property.objects.filter(
+        tenant_id=tenant_id,
+        is_active=True,
+        embedding__isnull=False
+    ).values_list('id', 'embedding', 'user_roles')
+
+    for prop_id, embedding, user_roles in properties.iterator(chunk_size=2000):
+        if user_role in (user_roles or []):
+            yield 'property', str(prop_id), embedding
+
+
+def build_index(tenant_id: str, user_role: str) -> int:
+    """
+    Build the index for a (tenant, role) pair from the database.
+
+    Returns:
+        Number of vectors indexed
+    """
+    index = get_vector_index(tenant_id, user_role)
+    return index.rebuild(_iter_entries(tenant_id, user_role))
+
+
+def ensure_index(tenant_id: str, user_role: str) -> VectorIndex:
+    """Get the index for a (tenant, role) pair, building it on first use."""
+    index = get_vector_index(tenant_id, user_role)
+    if not index.exists():
+        build_index(tenant_id, user_role)
+    return index
+
+
+def _built_roles(tenant_id: str) -> List[str]:
+    directory = Path(settings.VECTOR_INDEX_DIR) / str(tenant_id)
+    if not directory.exists():
+        return []
+    return [path.name[:-len('.meta.json')] for path in directory.glob('*.meta.json')]
+
+
+def rebuild_built_indexes(tenant_id: str) -> int:
+    """
+    Rebuild every already-built index of a tenant from the database.
+
+    Used after bulk writes that bypass model saves (e.g. embedding backfills).
+
+    Returns:
+        Number of vectors indexed across roles
+    """
+    if not settings.VECTOR_INDEX_ENABLED:
+        return 0
+    return sum(build_index(str(tenant_id), role) for role in _built_roles(tenant_id))
+
+
+def sync_object(obj, obj_type: str):
+    """
+    Apply a saved Property or Document to every built index of its tenant.
+
+    Indexes that have not been built yet are skipped; they read the current
+    row from the database when first used.
+    """
+    if not settings.VECTOR_INDEX_ENABLED:
+        return
+
+    try:
+        visible_roles = set(obj.user_roles or [])
+        is_active = getattr(obj, 'is_active', True)
+
+        for role in _built_roles(obj.tenant_id):
+            index = get_vector_index(obj.tenant_id, role)
+            if is_active and role in visible_roles and obj.embedding is not None:
+                index.upsert(obj_type, obj.id, obj.embedding)
+            else:
+                index.remove(obj_type, obj.id)
+    except Exception as e:
+        logger.error(f"Error syncing {obj_type} {obj.id} to vector index: {e}", exc_info=True)
+
+
+def remove_object(obj, obj_type: str):
+    """Remove a deleted Property or Document from every built index of its tenant."""
+    if not settings.VECTOR_INDEX_ENABLED:
+        return
+
+    try:
+        for role in _built_roles(obj.tenant_id):
+            get_vector_index(obj.tenant_id, role).remove(obj_type, obj.id)
+    except Exception as e:
+        logger.error(f"Error removing {obj_type} {obj.id} from vector index: {e}", exc_info=True)
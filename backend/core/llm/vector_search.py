@@ -0,0 +1,245 @@
+"""
+Vector search backends for RAG retrieval.
+
+RAGPipeline asks `get_vector_backend()` for the backend to use:
+- PgVectorBackend: native pgvector columns with HNSW/IVFFlat indexes (PostgreSQL)
+- VectorIndexBackend: in-process memory-mapped index over the JSON shim (SQLite, or
+  PostgreSQL without the extension)
+- ScanBackend: exact scan of the JSON shim per query, used when the index is
+  disabled (VECTOR_INDEX_ENABLED=False) so no on-disk state can go stale
+"""
+
+import logging
+import uuid
+from typing import List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+
+from apps.documents.models import Document
+from apps.properties.models import Property
+from .query_filters import QueryFilters
+from .vector_index import _as_vector, _top_rows, ensure_index
+
+logger = logging.getLogger(__name__)
+
+_backend = None
+
+
+class VectorSearchBackend:
+    """
+    Base class for vector search backends.
+
+    Subclasses return (object, similarity, type) tuples, where type is
+    'document' or 'property', sorted by similarity. Optional QueryFilters
+    restrict the properties before ranking.
+    """
+
+    name = 'base'
+
+    def search(self, tenant_id: str, user_role: str, query_embedding: List[float],
+               k: int = 10, filters: Optional[QueryFilters] = None,
+               **options) -> List[Tuple[any, float, str]]:
+        raise NotImplementedError
+
+
+class PgVectorBackend(VectorSearchBackend):
+    """
+    Nearest-neighbour search on pgvector columns.
+
+    Queries order by cosine distance so the planner can use the partial HNSW
+    indexes (`WHERE is_active AND embedding IS NOT NULL`) created by the
+    documents/properties migrations. `ef_search`/`probes` are applied with
+    SET LOCAL, so they only affect the current query.
+    """
+
+    name = 'pgvector'
+
+    def _set_search_params(self, ef_search: Optional[int], probes: Optional[int]):
+        ef_search = ef_search or settings.PGVECTOR_HNSW_EF_SEARCH
+        probes = probes or settings.PGVECTOR_IVFFLAT_PROBES
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search)}")
+            cursor.execute(f"SET LOCAL ivfflat.probes = {int(probes)}")
+            if settings.PGVECTOR_ITERATIVE_SCAN:
+                # pgvector >= 0.8: keep scanning the index until the tenant/role filter is satisfied
+                cursor.execute(f"SET LOCAL hnsw.iterative_scan = {settings.PGVECTOR_ITERATIVE_SCAN}")
+
+    def search(self, tenant_id: str, user_role: str, query_embedding: List[float],
+               k: int = 10, filters: Optional[QueryFilters] = None,
+               ef_search: Optional[int] = None,
+               probes: Optional[int] = None) -> List[Tuple[any, float, str]]:
+        from pgvector.django import CosineDistance
+
+        results = []
+
+        with transaction.atomic():
+            self._set_search_params(ef_search, probes)
+
+            documents = Document.objects.filter(
+                tenant_id=tenant_id,
+                is_active=True,
+                embedding__isnull=False,
+                user_roles__contains=[user_role]
+            ).annotate(
+                distance=CosineDistance('embedding', query_embedding)
+            ).order_by('distance')[:k]
+
+            for doc in documents:
+                results.append((doc, 1 - float(doc.distance), 'document'))
+
+            properties = Property.objects.filter(
+                tenant_id=tenant_id,
+                is_active=True,
+                embedding__isnull=False,
+                user_roles__contains=[user_role]
+            )
+            if filters:
+                properties = properties.filter(filters.as_q())
+            properties = properties.annotate(
+                distance=CosineDistance('embedding', query_embedding)
+            ).order_by('distance')[:k]
+
+            for prop in properties:
+                results.append((prop, 1 - float(prop.distance), 'property'))
+
+        results.sort(key=lambda x: x[1], reverse=True)
+        return results[:k]
+
+
+class VectorIndexBackend(VectorSearchBackend):
+    """
+    Search the in-process (tenant, role) index built from the JSON shim.
+
+    One matmul over the memory-mapped matrix, then one in_bulk query per
+    object type to load the hits. With filters, the qualifying property ids
+    come from an indexed SQL query and the matmul only ranks those.
+    """
+
+    name = 'index'
+
+    def search(self, tenant_id: str, user_role: str, query_embedding: List[float],
+               k: int = 10, filters: Optional[QueryFilters] = None,
+               **options) -> List[Tuple[any, float, str]]:
+        index = ensure_index(tenant_id, user_role)
+
+        allowed = None
+        if filters:
+            property_ids = Property.objects.filter(
+                tenant_id=tenant_id, is_active=True
+            ).filter(filters.as_q()).values_list('id', flat=True)
+            allowed = {'property': {str(prop_id) for prop_id in property_ids}}
+
+        hits = index.search(query_embedding, k=k, allowed=allowed)
+        return _load_hits(hits)
+
+
+class ScanBackend(VectorSearchBackend):
+    """
+    Exact cosine scan over the JSON shim, one NumPy matmul per query.
+
+    Reads the tenant's embeddings through the ORM on every search, so it is
+    always current but costs a full read of the embedding columns. Fallback
+    for deployments that disable the on-disk index.
+    """
+
+    name = 'scan'
+
+    def search(self, tenant_id: str, user_role: str, query_embedding: List[float],
+               k: int = 10, filters: Optional[QueryFilters] = None,
+               **options) -> List[Tuple[any, float, str]]:
+        dimensions = settings.EMBEDDING_DIMENSIONS
+        query = _as_vector(query_embedding, dimensions)
+        if query is None or k <= 0:
+            return []
+
+        properties = Property.objects.filter(tenant_id=tenant_id, is_active=True, embedding__isnull=False)
+        if filters:
+            properties = properties.filter(filters.as_q())
+        querysets = (
+            ('document', Document.objects.filter(tenant_id=tenant_id, is_active=True, embedding__isnull=False)),
+            ('property', properties),
+        )
+
+        keys, vectors = [], []
+        for obj_type, queryset in querysets:
+            rows = queryset.values_list('id', 'embedding', 'user_roles')
+            for obj_id, embedding, user_roles in rows.iterator(chunk_size=2000):
+                # Role check in Python: JSON containment isn't available on SQLite
+                if user_role not in (user_roles or []):
+                    continue
+                vector = _as_vector(embedding, dimensions)
+                if vector is not None:
+                    keys.append((obj_type, str(obj_id)))
+                    vectors.append(vector)
+
+        if not vectors:
+            return []
+
+        scores = np.vstack(vectors) @ query
+        top = _top_rows(scores, k)
+        return _load_hits([(*keys[row], float(scores[row])) for row in top])
+
+
+def _load_hits(hits: List[Tuple[str, str, float]]) -> List[Tuple[any, float, str]]:
+    """Load (type, id, similarity) hits as (object, similarity, type), one in_bulk per type."""
+    document_ids = [obj_id for obj_type, obj_id, _ in hits if obj_type == 'document']
+    property_ids = [obj_id for obj_type, obj_id, _ in hits if obj_type == 'property']
+
+    objects = {
+        'document': Document.objects.in_bulk(document_ids) if document_ids else {},
+        'property': Property.objects.in_bulk(property_ids) if property_ids else {},
+    }
+
+    results = []
+    for obj_type, obj_id, score in hits:
+        # Keys come back as UUIDs; the index stores them as strings
+        obj = objects[obj_type].get(uuid.UUID(obj_id))
+        if obj is None:
+            # Row deleted since it was indexed (outside the ORM); the next rebuild drops it
+            continue
+        results.append((obj, score, obj_type))
+
+    return results
+
+
+def pgvector_available() -> bool:
+    """Check if embeddings are stored in native pgvector columns."""
+    if not settings.PGVECTOR_ENABLED or connection.vendor != 'postgresql':
+        return False
+
+    try:
+        from pgvector.django import VectorField
+    except ImportError:
+        return False
+
+    return isinstance(Property._meta.get_field('embedding'), VectorField)
+
+
+def get_vector_backend() -> VectorSearchBackend:
+    """Get the configured vector search backend (cached per process)."""
+    global _backend
+
+    if _backend is None:
+        choice = settings.VECTOR_SEARCH_BACKEND
+        if choice == 'auto':
+            choice = 'pgvector' if pgvector_available() else 'index'
+        if choice == 'index' and not settings.VECTOR_INDEX_ENABLED:
+            # Saves and backfills stop syncing the index when it's disabled; don't serve from it
+            logger.warning("VECTOR_INDEX_ENABLED is off; scanning embeddings instead of the vector index")
+            choice = 'scan'
+
+        if choice == 'pgvector':
+            _backend = PgVectorBackend()
+        elif choice == 'index':
+            _backend = VectorIndexBackend()
+        elif choice == 'scan':
+            _backend = ScanBackend()
+        else:
+            raise ValueError(f"Unknown VECTOR_SEARCH_BACKEND: {choice}")
+
+        logger.info(f"Vector search backend: {_backend.name}")
+
+    return _backend
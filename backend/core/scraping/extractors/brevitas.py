@@ -7,8 +7,9 @@ from bs4 import BeautifulSoup
 from decimal import Decimal
 import re
 import logging
-import openai
 from django.conf import settings
+from core.llm.clients import get_openai_client
+from core.llm.rate_limit import estimate_chat_tokens, rate_limited
 from .base import BaseExtractor
 
 logger = logging.getLogger(__name__)
@@ -102,7 +103,7 @@ class BrevitasExtractor(BaseExtractor):
                 print("⚠️ OpenAI API key not configured, skipping AI enhancement")
                 return {}
             
-            client = openai.OpenAI(api_key=api_key)
+            client = get_openai_client()
             
             # Limit text to reasonable size
             text_to_process = full_text[:10000] if len(full_text) > 10000 else full_text
@@ -176,16 +177,18 @@ OTHER FIELDS:
 - Parking spaces from "Parking Spots" field
 """
             
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a real estate data extraction expert specializing in Costa Rica properties. Extract and normalize ALL property information accurately, including lot sizes and unique features. Always return valid JSON."},
-                    {"role": "user", "content": f"{prompt}\n\n{text_to_process}"}
-                ],
-                temperature=0,
-                max_tokens=2000,
-                response_format={"type": "json_object"}
-            )
+            messages = [
+                {"role": "system", "content": "You are a real estate data extraction expert specializing in Costa Rica properties. Extract and normalize ALL property information accurately, including lot sizes and unique features. Always return valid JSON."},
+                {"role": "user", "content": f"{prompt}\n\n{text_to_process}"}
+            ]
+            with rate_limited("gpt-4o-mini", estimate_chat_tokens(messages, 2000)):
+                response = client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    temperature=0,
+                    max_tokens=2000,
+                    response_format={"type": "json_object"}
+                )
             
             import json
             ai_data = json.loads(response.choices[0].message.content)
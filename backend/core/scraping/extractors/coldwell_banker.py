@@ -5,9 +5,10 @@ from typing import Optional
 from bs4 import BeautifulSoup
 from decimal import Decimal
 import re
-import openai
 import json
 from django.conf import settings
+from core.llm.clients import get_openai_client
+from core.llm.rate_limit import estimate_chat_tokens, rate_limited
 from .base import BaseExtractor
 from ..types import PropertyData
 from ..utils import JSONUtils, NumberUtils
@@ -137,7 +138,7 @@ class ColdwellBankerExtractor(BaseExtractor):
                 print("⚠️ No OpenAI API key configured")
                 return None
             
-            client = openai.OpenAI(api_key=api_key)
+            client = get_openai_client()
             
             prompt = f"""Eres un experto en extracción de datos de bienes raíces de Costa Rica.
 
@@ -210,15 +211,17 @@ Responde ÚNICAMENTE con un objeto JSON válido (sin markdown, sin ```json):
   "brochure_url": "url del brochure/pdf o null"
 }}"""
             
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "Eres un experto en extracción de datos de bienes raíces. Respondes ÚNICAMENTE con JSON válido, sin markdown."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0,
-                max_tokens=1500
-            )
+            messages = [
+                {"role": "system", "content": "Eres un experto en extracción de datos de bienes raíces. Respondes ÚNICAMENTE con JSON válido, sin markdown."},
+                {"role": "user", "content": prompt}
+            ]
+            with rate_limited("gpt-4o-mini", estimate_chat_tokens(messages, 1500)):
+                response = client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    temperature=0,
+                    max_tokens=1500
+                )
             
             # Parse response with robust JSONUtils
             content = response.choices[0].message.content.strip()
@@ -517,20 +520,22 @@ Responde ÚNICAMENTE con un objeto JSON válido (sin markdown, sin ```json):
             if not api_key:
                 return None
             
-            client = openai.OpenAI(api_key=api_key)
+            client = get_openai_client()
             
             instruction = "Extract the location (city, region, country) from this property description. Return ONLY the location in format: 'City, Region' or 'City, Region, Country'. If no clear location is found, return 'Unknown'."
             prompt = f"{instruction}\n\nDescription:\n{description[:1000]}\n\nLocation:"
             
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a real estate data extraction assistant. Extract location information accurately and concisely."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0,
-                max_tokens=100
-            )
+            messages = [
+                {"role": "system", "content": "You are a real estate data extraction assistant. Extract location information accurately and concisely."},
+                {"role": "user", "content": prompt}
+            ]
+            with rate_limited("gpt-4o-mini", estimate_chat_tokens(messages, 100)):
+                response = client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    temperature=0,
+                    max_tokens=100
+                )
             
             location = response.choices[0].message.content.strip()
             
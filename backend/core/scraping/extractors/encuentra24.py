@@ -6,8 +6,9 @@ from bs4 import BeautifulSoup
 from decimal import Decimal
 import re
 import json
-import openai
 from django.conf import settings
+from core.llm.clients import get_openai_client
+from core.llm.rate_limit import estimate_chat_tokens, rate_limited
 from .base import BaseExtractor
 from ..utils import MoneyUtils, JSONUtils, NumberUtils
 from ..types import PropertyData
@@ -145,7 +146,7 @@ class Encuentra24Extractor(BaseExtractor):
                 print("⚠️ OpenAI API key not configured, skipping AI enhancement")
                 return {}
             
-            client = openai.OpenAI(api_key=api_key)
+            client = get_openai_client()
             
             # Detect listing type from URL
             listing_type_hint = None
@@ -197,15 +198,17 @@ CRITICAL:
             except Exception as e:
                 print(f"⚠️ No se pudo guardar archivo: {e}")
             
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a real estate data extraction expert. Extract property information from HTML structure accurately. Return clean JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0,
-                max_tokens=1200
-            )
+            messages = [
+                {"role": "system", "content": "You are a real estate data extraction expert. Extract property information from HTML structure accurately. Return clean JSON."},
+                {"role": "user", "content": prompt}
+            ]
+            with rate_limited("gpt-4o-mini", estimate_chat_tokens(messages, 1200)):
+                response = client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    temperature=0,
+                    max_tokens=1200
+                )
             
             print(f"📊 Tokens usados: {response.usage.total_tokens} (prompt: {response.usage.prompt_tokens}, completion: {response.usage.completion_tokens})")
             
@@ -540,7 +543,7 @@ CRITICAL:
                 print("⚠️ OpenAI API key not configured, skipping AI enhancement")
                 return {}
             
-            client = openai.OpenAI(api_key=api_key)
+            client = get_openai_client()
             
             # Limit text to reasonable size
             text_to_process = full_text[:6000] if len(full_text) > 6000 else full_text
@@ -620,15 +623,17 @@ Return valid JSON only."""
             except Exception as e:
                 print(f"⚠️ No se pudo guardar archivo: {e}")
             
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a real estate data extraction expert. Extract property information accurately and return clean JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0,
-                max_tokens=1500
-            )
+            messages = [
+                {"role": "system", "content": "You are a real estate data extraction expert. Extract property information accurately and return clean JSON."},
+                {"role": "user", "content": prompt}
+            ]
+            with rate_limited("gpt-4o-mini", estimate_chat_tokens(messages, 1500)):
+                response = client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    temperature=0,
+                    max_tokens=1500
+                )
             
             print(f"📊 Tokens usados: {response.usage.total_tokens} (prompt: {response.usage.prompt_tokens}, completion: {response.usage.completion_tokens})")
             
@@ -864,20 +869,22 @@ Return valid JSON only."""
             if not api_key:
                 return None
             
-            client = openai.OpenAI(api_key=api_key)
+            client = get_openai_client()
             
             instruction = "Extract the location (city, region, country) from this property description. Return ONLY the location in format: 'City, Region' or 'City, Region, Country'. If no clear location is found, return 'Unknown'."
             prompt = f"{instruction}\n\nDescription:\n{description[:1000]}\n\nLocation:"
             
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a real estate data extraction assistant. Extract location information accurately and concisely."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0,
-                max_tokens=100
-            )
+            messages = [
+                {"role": "system", "content": "You are a real estate data extraction assistant. Extract location information accurately and concisely."},
+                {"role": "user", "content": prompt}
+            ]
+            with rate_limited("gpt-4o-mini", estimate_chat_tokens(messages, 100)):
+                response = client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    temperature=0,
+                    max_tokens=100
+                )
             
             location = response.choices[0].message.content.strip()
             
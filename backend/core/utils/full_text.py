@@ -0,0 +1,66 @@
+"""
+Full-text search helpers for the stored `search_vector` columns.
+
+On PostgreSQL, Property.search_vector and Document.search_vector are weighted
+tsvectors (Spanish + English, unaccented) maintained by database triggers and
+indexed with GIN; see the properties/documents search_vector migrations.
+Queries are built the same way: unaccented text parsed with both
+configurations and OR-ed together.
+"""
+
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from rest_framework import filters
+
+# Text search configurations used for both the stored vectors and queries
+SEARCH_CONFIGS = ('spanish', 'english')
+
+
+def strip_accents(text: str) -> str:
+    """Remove diacritics, matching what unaccent() does to the stored vectors."""
+    normalized = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in normalized if not unicodedata.combining(c))
+
+
+def full_text_available() -> bool:
+    """Check if the stored tsvector columns can be queried."""
+    return connection.vendor == 'postgresql'
+
+
+def build_search_query(text: str) -> SearchQuery:
+    """
+    Build a websearch-style query matching either language configuration.
+
+    Args:
+        text: Raw user search text
+
+    Returns:
+        SearchQuery usable with `search_vector=...` filters and SearchRank
+    """
+    text = strip_accents(text)
+    query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(text, config=config, search_type='websearch')
+        query = part if query is None else query | part
+    return query
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    DRF search filter backed by the GIN-indexed `search_vector` column.
+
+    Falls back to the regular `search_fields` icontains search when the
+    database is not PostgreSQL.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not full_text_available():
+            return super().filter_queryset(request, queryset, view)
+
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+
+        return queryset.filter(search_vector=build_search_query(text))
@@ -0,0 +1,6 @@
+"""
+Offline performance benchmarks.
+
+Everything here runs against local stand-ins for the OpenAI and Anthropic
+clients (see stubs.py), so results are deterministic and free to produce.
+"""
@@ -0,0 +1,217 @@
+"""
+Offline RAGPipeline latency benchmark.
+
+Seeds a synthetic tenant per inventory size, swaps the OpenAI/Anthropic
+clients for the deterministic stand-ins in stubs.py (with configurable
+latency), runs a query mix through `RAGPipeline.query` (or `aquery`) and
+reports p50/p95/p99 as JSON for every stage the pipeline reports in
+`result['timings']` (see core/llm/timing.py): embedding, vector_search,
+keyword_search (PostgreSQL only), hybrid_search (pgvector only), fusion,
+context_packing, generation, total, ...
+
+Stages a query skipped (e.g. after a semantic-cache hit) get no sample.
+
+Usage (from the repository root, against a migrated database):
+    python testing/benchmarks/rag_latency.py --sizes 1000,10000 --output rag_benchmark.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import numpy as np
+
+# Setup Django
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from benchmarks.stubs import StubChatModel, StubEmbeddings  # noqa: E402
+from benchmarks.synthetic import build_tenant_index, drop_tenant, query_mix, seed_tenant  # noqa: E402
+from core.llm.clients import install_clients, reset_clients  # noqa: E402
+from core.llm.embedding_cache import EmbeddingCache  # noqa: E402
+from core.llm.rag import RAGPipeline  # noqa: E402
+from core.llm.timing import STAGES  # noqa: E402
+from core.llm.vector_search import get_vector_backend  # noqa: E402
+
+# Embedding model name used while benchmarking, so stub vectors never share
+# cache keys (embedding cache, router centroids) with real ones
+STUB_EMBEDDING_MODEL = 'benchmark-stub'
+
+PERCENTILES = (50, 95, 99)
+
+
+class StageSamples:
+    """Collects the per-stage timings of every query result."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def add(self, timings: dict):
+        for stage, elapsed_ms in timings.items():
+            self.samples[stage].append(elapsed_ms)
+
+    def summary(self) -> dict:
+        stats = {}
+        order = STAGES + ('total',)
+        for stage in sorted(self.samples, key=lambda name: order.index(name) if name in order else len(order)):
+            values = np.asarray(self.samples[stage])
+            stats[stage] = {
+                'count': int(values.size),
+                'mean_ms': round(float(values.mean()), 3),
+                **{f'p{p}_ms': round(float(np.percentile(values, p)), 3) for p in PERCENTILES},
+            }
+        return stats
+
+
+def run_queries(pipeline: RAGPipeline, samples: StageSamples, queries, use_async: bool) -> int:
+    """Run the query mix, returning the number of semantic-cache hits."""
+    cached = 0
+
+    async def run_async():
+        nonlocal cached
+        for query in queries:
+            result = await pipeline.aquery(query)
+            samples.add(result['timings'])
+            cached += bool(result.get('cached'))
+
+    if use_async:
+        asyncio.run(run_async())
+        return cached
+
+    for query in queries:
+        result = pipeline.query(query)
+        samples.add(result['timings'])
+        cached += bool(result.get('cached'))
+    return cached
+
+
+def benchmark_size(size: int, args, embeddings: StubEmbeddings) -> dict:
+    """Seed one tenant, run the query mix against it and summarize."""
+    slug = f'benchmark-{size}'
+    documents = int(size * args.documents_ratio)
+
+    start = time.perf_counter()
+    tenant = seed_tenant(slug, size, documents, embeddings, seed=args.seed)
+    seed_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = build_tenant_index(tenant, args.role)
+    index_seconds = time.perf_counter() - start
+
+    try:
+        pipeline = RAGPipeline(str(tenant.id), args.role)
+        # Cold embedding cache per run, so sizes are comparable
+        pipeline.embedding_cache = EmbeddingCache(model=f'{STUB_EMBEDDING_MODEL}:{uuid.uuid4().hex[:8]}')
+
+        queries = query_mix(args.warmup + args.queries, args.repeat_ratio, seed=args.seed)
+        run_queries(pipeline, StageSamples(), queries[:args.warmup], args.use_async)
+
+        samples = StageSamples()
+        cached = run_queries(pipeline, samples, queries[args.warmup:], args.use_async)
+    finally:
+        if not args.keep:
+            drop_tenant(slug)
+
+    return {
+        'size': size,
+        'properties': size,
+        'documents': documents,
+        'indexed_vectors': indexed,
+        'seed_seconds': round(seed_seconds, 2),
+        'index_seconds': round(index_seconds, 2),
+        'queries': args.queries,
+        'semantic_cache_hits': cached,
+        'stages': samples.summary(),
+    }
+
+
+def print_table(run: dict):
+    print(f"\n📊 {run['properties']} properties + {run['documents']} documents "
+          f"({run['semantic_cache_hits']}/{run['queries']} cached)", file=sys.stderr)
+    print(f"  {'stage':<22}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}", file=sys.stderr)
+    for stage, stats in run['stages'].items():
+        print(f"  {stage:<22}{stats['count']:>6}{stats['p50_ms']:>10.2f}"
+              f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}", file=sys.stderr)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='1000,10000',
+                        help='Comma-separated property counts, e.g. 1000,10000,100000')
+    parser.add_argument('--documents-ratio', type=float, default=0.25,
+                        help='Documents seeded per property')
+    parser.add_argument('--queries', type=int, default=200, help='Measured queries per size')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured queries run first')
+    parser.add_argument('--repeat-ratio', type=float, default=0.2,
+                        help='Fraction of queries repeating an earlier one (cache traffic)')
+    parser.add_argument('--role', default='buyer')
+    parser.add_argument('--embedding-latency-ms', type=float, default=25.0)
+    parser.add_argument('--chat-latency-ms', type=float, default=300.0,
+                        help='Chat latency before the first token')
+    parser.add_argument('--token-latency-ms', type=float, default=2.0,
+                        help='Chat latency per generated token')
+    parser.add_argument('--response-tokens', type=int, default=120)
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Benchmark RAGPipeline.aquery instead of query')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='Keep the seeded tenants')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    settings.OPENAI_EMBEDDING_MODEL = STUB_EMBEDDING_MODEL
+    embeddings = StubEmbeddings(settings.EMBEDDING_DIMENSIONS, args.embedding_latency_ms)
+    chat_options = dict(
+        latency_ms=args.chat_latency_ms,
+        token_latency_ms=args.token_latency_ms,
+        response_tokens=args.response_tokens,
+    )
+    install_clients(embeddings=embeddings, chat_models={
+        model: StubChatModel(model, **chat_options)
+        for model in (settings.OPENAI_MODEL_CHAT, settings.ANTHROPIC_MODEL)
+    })
+
+    report = {
+        'config': {
+            **{key: value for key, value in vars(args).items() if key != 'output'},
+            'vector_backend': get_vector_backend().name,
+            'database': settings.DATABASES['default']['ENGINE'],
+            'embedding_dimensions': settings.EMBEDDING_DIMENSIONS,
+        },
+        'runs': [],
+    }
+
+    try:
+        for size in (int(value) for value in args.sizes.split(',') if value.strip()):
+            run = benchmark_size(size, args, embeddings)
+            report['runs'].append(run)
+            print_table(run)
+    finally:
+        reset_clients()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"\n✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Deterministic local stand-ins for the embedding and chat clients.
+
+    StubEmbeddings  hashing-trick bag-of-words vectors: texts sharing words
+                    get similar vectors, so retrieval still ranks sensibly
+    StubChatModel   fixed-length answers built from the prompt
+
+Both sleep for a configurable latency per call (and per token for chat) to
+stand in for the network round trip, and expose the sync/async/streaming
+methods RAGPipeline uses.
+"""
+
+import asyncio
+import re
+import time
+import zlib
+from typing import List
+
+import numpy as np
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class StubEmbeddings:
+    """Embeddings client returning normalized hashed-token vectors."""
+
+    def __init__(self, dimensions: int, latency_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in _WORD_RE.findall(text.lower()):
+            digest = zlib.crc32(word.encode())
+            vector[digest % self.dimensions] += 1.0 if digest & 1 << 31 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm == 0.0:
+            vector[0], norm = 1.0, 1.0
+        return (vector / norm).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency_ms / 1000)
+        return self._vector(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency_ms / 1000)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return [self._vector(text) for text in texts]
+
+
+class StubChatModel:
+    """
+    Chat client answering with `response_tokens` words.
+
+    A call costs `latency_ms` before the first token plus `token_latency_ms`
+    per generated token, like a streaming API.
+    """
+
+    def __init__(self, model: str, latency_ms: float = 0.0,
+                 token_latency_ms: float = 0.0, response_tokens: int = 120):
+        self.model = model
+        self.latency_ms = latency_ms
+        self.token_latency_ms = token_latency_ms
+        self.response_tokens = response_tokens
+
+    def _words(self, messages) -> List[str]:
+        prompt = ' '.join(str(message.content) for message in messages)
+        vocabulary = _WORD_RE.findall(prompt)[-200:] or ['ok']
+        return [vocabulary[i % len(vocabulary)] for i in range(self.response_tokens)]
+
+    def _usage(self, messages) -> dict:
+        input_tokens = sum(len(str(message.content).split()) for message in messages)
+        return {
+            'input_tokens': input_tokens,
+            'output_tokens': self.response_tokens,
+            'total_tokens': input_tokens + self.response_tokens,
+        }
+
+    def invoke(self, messages, **kwargs) -> AIMessage:
+        time.sleep((self.latency_ms + self.token_latency_ms * self.response_tokens) / 1000)
+        return AIMessage(content=' '.join(self._words(messages)), usage_metadata=self._usage(messages))
+
+    async def ainvoke(self, messages, **kwargs) -> AIMessage:
+        await asyncio.sleep((self.latency_ms + self.token_latency_ms * self.response_tokens) / 1000)
+        return AIMessage(content=' '.join(self._words(messages)), usage_metadata=self._usage(messages))
+
+    def stream(self, messages, **kwargs):
+        time.sleep(self.latency_ms / 1000)
+        for word in self._words(messages):
+            time.sleep(self.token_latency_ms / 1000)
+            yield AIMessageChunk(content=word + ' ')
+
+    async def astream(self, messages, **kwargs):
+        await asyncio.sleep(self.latency_ms / 1000)
+        for word in self._words(messages):
+            await asyncio.sleep(self.token_latency_ms / 1000)
+            yield AIMessageChunk(content=word + ' ')
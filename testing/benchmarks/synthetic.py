@@ -0,0 +1,168 @@
+"""
+Synthetic tenants and query mixes for the RAG benchmarks.
+
+Listings and documents are generated from a seeded RNG, rendered with the
+real property card, embedded with the stub client and inserted with
+bulk_create (bypassing the per-row save hooks, like an import would), then
+the vector index is built and the tenant's cached retrievals invalidated.
+"""
+
+import random
+import shutil
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+from django.conf import settings
+
+from apps.documents.models import ContentType, Document
+from apps.properties.models import Property, PropertyStatus, PropertyType
+from apps.tenants.models import Tenant
+from apps.users.models import UserRole
+from core.llm.retrieval_cache import bump_inventory_version
+from core.llm.vector_index import build_index
+from core.llm.vector_search import get_vector_backend
+
+BATCH_SIZE = 1000
+
+LOCATIONS = [
+    'Tamarindo', 'Escazú', 'Santa Ana', 'Nosara', 'Jacó', 'Manuel Antonio',
+    'La Fortuna', 'Puerto Viejo', 'Flamingo', 'Santa Teresa', 'Heredia', 'Atenas',
+]
+AMENITIES = [
+    'pool', 'ocean view', 'gym', 'garden', 'security', 'parking', 'solar panels',
+    'air conditioning', 'furnished', 'rooftop terrace', 'mountain view', 'beach access',
+]
+DESCRIPTIONS = [
+    'Bright {type} close to {location} with {amenity} and open living areas.',
+    'Renovated {type} in a quiet street of {location}, walking distance to shops.',
+    'Investment-ready {type} in {location} with strong rental history and {amenity}.',
+    'Modern {type} surrounded by nature near {location}, featuring {amenity}.',
+]
+DOCUMENT_TEXTS = [
+    'Closing costs in {location} are usually 3-4% of the price, including transfer tax and notary fees.',
+    'Average vacation rental occupancy in {location} reaches 70% in high season.',
+    'Foreigners can own titled property in {location}; concession land near the beach has limits.',
+    'Property tax in Costa Rica is 0.25% of the registered value, paid yearly in {location}.',
+    'The best restaurants in {location} serve fresh seafood and traditional casado.',
+]
+QUERY_TEMPLATES = [
+    '{type} in {location} under ${price}',
+    'Show me {bedrooms} bedroom homes in {location}',
+    '{type} with {amenity} in {location}',
+    'What are the closing costs when buying in {location}?',
+    'casas en {location} con {bedrooms} habitaciones',
+    'Is {location} a good place for a rental investment?',
+    'cheapest {type} near the beach',
+]
+
+
+def _roles() -> List[str]:
+    return [role for role, _ in UserRole.CHOICES]
+
+
+def seed_tenant(slug: str, properties: int, documents: int, embeddings, seed: int = 42) -> Tenant:
+    """
+    Create a tenant with synthetic inventory, replacing any earlier one.
+
+    Args:
+        slug: Tenant slug (an existing tenant with this slug is dropped)
+        properties: Number of properties
+        documents: Number of documents
+        embeddings: Embeddings client used for the stored vectors
+    """
+    drop_tenant(slug)
+    rng = random.Random(seed)
+    tenant = Tenant.objects.create(name=f'Benchmark {slug}', slug=slug, max_properties=properties)
+    roles = _roles()
+    property_types = [value for value, _ in PropertyType.CHOICES]
+    content_types = [value for value, _ in ContentType.CHOICES]
+
+    for start in range(0, properties, BATCH_SIZE):
+        batch = []
+        for i in range(start, min(start + BATCH_SIZE, properties)):
+            property_type = rng.choice(property_types)
+            location = rng.choice(LOCATIONS)
+            amenities = rng.sample(AMENITIES, 3)
+            prop = Property(
+                tenant=tenant,
+                property_name=f'{location} {property_type.title()} #{i}',
+                price_usd=Decimal(rng.randrange(80, 2500) * 1000),
+                bedrooms=rng.randint(1, 6),
+                bathrooms=Decimal(rng.randint(1, 5)),
+                property_type=property_type,
+                status=PropertyStatus.AVAILABLE,
+                location=location,
+                square_meters=Decimal(rng.randrange(50, 600)),
+                amenities=amenities,
+                description=rng.choice(DESCRIPTIONS).format(
+                    type=property_type, location=location, amenity=amenities[0]
+                ),
+                user_roles=roles,
+            )
+            prop.content_for_search = prop.generate_search_content()
+            prop.card_version = Property.CARD_VERSION
+            batch.append(prop)
+
+        vectors = embeddings.embed_documents([prop.content_for_search for prop in batch])
+        for prop, vector in zip(batch, vectors):
+            prop.embedding = vector
+        Property.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+
+    for start in range(0, documents, BATCH_SIZE):
+        batch = [
+            Document(
+                tenant=tenant,
+                content=rng.choice(DOCUMENT_TEXTS).format(location=rng.choice(LOCATIONS)),
+                content_type=rng.choice(content_types),
+                freshness_date=date.today(),
+                user_roles=roles,
+            )
+            for _ in range(start, min(start + BATCH_SIZE, documents))
+        ]
+        vectors = embeddings.embed_documents([doc.content for doc in batch])
+        for doc, vector in zip(batch, vectors):
+            doc.embedding = vector
+        Document.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+
+    bump_inventory_version(tenant.id)
+    return tenant
+
+
+def build_tenant_index(tenant: Tenant, user_role: str) -> int:
+    """Build the in-process vector index when that backend is in use."""
+    if get_vector_backend().name != 'index':
+        return 0
+    return build_index(str(tenant.id), user_role)
+
+
+def drop_tenant(slug: str):
+    """Delete a benchmark tenant, its inventory and its vector indexes."""
+    for tenant in Tenant.objects.filter(slug=slug):
+        Document.objects.filter(tenant=tenant).delete()
+        Property.objects.filter(tenant=tenant).delete()
+        shutil.rmtree(Path(settings.VECTOR_INDEX_DIR) / str(tenant.id), ignore_errors=True)
+        tenant.delete()
+
+
+def query_mix(count: int, repeat_ratio: float = 0.2, seed: int = 7) -> List[str]:
+    """
+    Realistic buyer questions; `repeat_ratio` of them repeat an earlier
+    question verbatim so the caches see some traffic.
+    """
+    rng = random.Random(seed)
+    property_types = [value for value, _ in PropertyType.CHOICES]
+    queries = []
+    for _ in range(count):
+        if queries and rng.random() < repeat_ratio:
+            queries.append(rng.choice(queries))
+            continue
+        queries.append(rng.choice(QUERY_TEMPLATES).format(
+            type=rng.choice(property_types),
+            location=rng.choice(LOCATIONS),
+            price=f'{rng.randrange(100, 1500)},000',
+            bedrooms=rng.randint(1, 5),
+            amenity=rng.choice(AMENITIES),
+        ))
+    return queries
@@ -0,0 +1,57 @@
+"""
+Django settings for the unit tests.
+
+When DJANGO_SETTINGS_MODULE is set (e.g. by pytest-django) it is used as is.
+Otherwise the project's base settings are loaded without the web stack
+(daphne, channels, admin, JWT auth), with an in-memory SQLite database and
+local-memory caches, so the tests run without Postgres or Redis.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / 'backend'
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+TEST_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'rest_framework',
+    'apps.tenants',
+    'apps.users',
+    'apps.properties',
+    'apps.documents',
+    'apps.conversations',
+]
+
+
+def pytest_configure(config):
+    import django
+    from django.conf import settings
+
+    if os.environ.get('DJANGO_SETTINGS_MODULE') or settings.configured:
+        return
+
+    os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+    os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+    from config.settings import base
+
+    values = {name: getattr(base, name) for name in dir(base) if name.isupper()}
+    values.update(
+        INSTALLED_APPS=TEST_APPS,
+        MIDDLEWARE=[],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+            'embeddings': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'embeddings'},
+        },
+        PGVECTOR_ENABLED=False,
+        REST_FRAMEWORK={
+            **base.REST_FRAMEWORK,
+            'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication'],
+        },
+    )
+    settings.configure(**values)
+    django.setup()
@@ -0,0 +1,124 @@
+"""
+Tests for the resumable embedding backfill.
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.core.cache import caches
+
+from core.llm.backfill import BackfillError, EmbeddingBackfill, get_checkpoint
+from core.llm.rate_limit import RateLimitExceeded
+
+
+class Row(SimpleNamespace):
+    """Stand-in for a Document row; `objects` records bulk updates."""
+
+    objects = None
+
+
+def _rows(count=10):
+    return [
+        Row(pk=f"{i:03d}", tenant_id='tenant-1', content=f"text {i}",
+            embedding=None, embedding_hash='', embedding_model='')
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def rows(monkeypatch):
+    rows = _rows()
+    written = []
+    Row.objects = SimpleNamespace(
+        bulk_update=lambda objs, fields, batch_size: written.extend(obj.pk for obj in objs)
+    )
+    caches['default'].clear()
+
+    monkeypatch.setattr('core.llm.backfill.count_tokens', lambda text, model=None: len(text.split()))
+    monkeypatch.setattr(
+        EmbeddingBackfill, '_rows',
+        lambda self, after_pk: iter([row for row in rows if not after_pk or row.pk > after_pk])
+    )
+    monkeypatch.setattr(EmbeddingBackfill, '_sync_indexes', lambda self, stats: None)
+    yield SimpleNamespace(rows=rows, written=written)
+    caches['default'].clear()
+
+
+def _embedder(monkeypatch, fail=None, delay=None):
+    """Fake provider: [1.0] per text; `fail(texts)` returns an exception to raise or None."""
+    def embed(texts, model=None, tokens=None, max_wait=None):
+        if delay:
+            time.sleep(delay(texts))
+        error = fail(texts) if fail else None
+        if error is not None:
+            raise error
+        return [[1.0] for _ in texts]
+
+    monkeypatch.setattr('core.llm.backfill.batch_generate_embeddings', embed)
+
+
+class TestEmbeddingBackfill:
+
+    def test_resumes_after_failed_batch(self, rows, monkeypatch):
+        shed = {'text 4'}
+        _embedder(monkeypatch, fail=lambda texts: (
+            RateLimitExceeded('text-embedding-3-small', 3.0) if shed & set(texts) else None
+        ))
+
+        with pytest.raises(BackfillError) as error:
+            EmbeddingBackfill('document', batch_size=2, concurrency=1).run()
+
+        assert error.value.retry_after == 3.0
+        assert rows.written == ['000', '001', '002', '003']
+        checkpoint = get_checkpoint('document')
+        assert checkpoint['status'] == 'failed'
+        assert checkpoint['last_pk'] == '003'
+
+        shed.clear()
+        stats = EmbeddingBackfill('document', batch_size=2, concurrency=1).run()
+
+        assert stats.resumed_from == '003'
+        assert stats.rows == 6
+        assert rows.written == [f"{i:03d}" for i in range(10)]
+        assert get_checkpoint('document')['status'] == 'complete'
+
+    def test_checkpoint_waits_for_earlier_batches(self, rows, monkeypatch):
+        # Batch 1 finishes last and fails; batches after it were already written
+        _embedder(
+            monkeypatch,
+            fail=lambda texts: RuntimeError('provider down') if 'text 1' in texts else None,
+            delay=lambda texts: 0.2 if 'text 1' in texts else 0.0,
+        )
+
+        with pytest.raises(RuntimeError):
+            EmbeddingBackfill('document', batch_size=1, concurrency=3).run()
+
+        assert '002' in rows.written
+        assert get_checkpoint('document')['last_pk'] == '000'
+
+        _embedder(monkeypatch)
+        EmbeddingBackfill('document', batch_size=1, concurrency=3).run()
+
+        assert set(rows.written) == {f"{i:03d}" for i in range(10)}
+
+    def test_restart_ignores_checkpoint(self, rows, monkeypatch):
+        _embedder(monkeypatch, fail=lambda texts: RuntimeError('down') if 'text 6' in texts else None)
+        with pytest.raises(RuntimeError):
+            EmbeddingBackfill('document', batch_size=2, concurrency=1).run()
+
+        _embedder(monkeypatch)
+        stats = EmbeddingBackfill('document', batch_size=2, concurrency=1, restart=True).run()
+
+        assert stats.resumed_from is None
+        assert stats.rows == 10
+
+    def test_batches_respect_token_budget(self, rows, monkeypatch):
+        batches = []
+        _embedder(monkeypatch, fail=lambda texts: batches.append(list(texts)))
+
+        stats = EmbeddingBackfill('document', batch_tokens=5, batch_size=10, concurrency=1).run()
+
+        # Two tokens per row: at most two rows fit in five tokens
+        assert [len(batch) for batch in batches] == [2, 2, 2, 2, 2]
+        assert stats.tokens == 20
@@ -0,0 +1,77 @@
+"""
+Tests for the chat SSE streams.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from apps.chat.views import ChatView
+
+RATE_LIMITED = {'type': 'error', 'error': 'Rate limit reached for gpt-4o-mini', 'retry_after': 2.5}
+
+
+def _events(chunks):
+    """Decode SSE 'data:' lines into event dicts."""
+    events = []
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = chunk.decode()
+        events.extend(json.loads(line[len('data: '):]) for line in chunk.split('\n') if line.startswith('data: '))
+    return events
+
+
+@pytest.fixture
+def view():
+    view = ChatView()
+    tenant = SimpleNamespace(id='tenant-1')
+    view._get_user_context = MagicMock(return_value=(tenant, None, 'buyer'))
+    view._get_or_create_conversation = MagicMock(return_value=SimpleNamespace(id='conv-1'))
+    return view
+
+
+@pytest.fixture
+def message_model():
+    with patch('apps.chat.views.Message') as message:
+        message.objects.acreate = AsyncMock()
+        yield message
+
+
+class TestStreamErrors:
+
+    def test_sync_stream_forwards_rate_limit_error(self, view, message_model):
+        def query_stream(*args, **kwargs):
+            yield {'type': 'sources', 'sources': []}
+            yield RATE_LIMITED
+
+        with patch('apps.chat.views.RAGPipeline') as pipeline:
+            pipeline.return_value.query_stream = query_stream
+            response = view._stream_response(None, 'hola', None)
+            events = _events(response.streaming_content)
+
+        assert [event['type'] for event in events] == ['conversation_id', 'sources', 'error']
+        assert events[-1]['retry_after'] == 2.5
+        # Only the user's message is saved
+        assert message_model.objects.create.call_count == 1
+        assert message_model.objects.create.call_args.kwargs['role'] == message_model.Role.USER
+
+    def test_async_stream_forwards_rate_limit_error(self, view, message_model):
+        async def aquery_stream(*args, **kwargs):
+            yield RATE_LIMITED
+
+        async def collect(response):
+            return [chunk async for chunk in response.streaming_content]
+
+        with patch('apps.chat.views.RAGPipeline') as pipeline, \
+                patch('apps.chat.views.schedule_summary') as schedule_summary:
+            pipeline.return_value.aquery_stream = aquery_stream
+            response = view._astream_response(None, 'hola', None)
+            events = _events(asyncio.run(collect(response)))
+
+        assert [event['type'] for event in events] == ['conversation_id', 'error']
+        assert events[-1]['retry_after'] == 2.5
+        assert message_model.objects.acreate.await_count == 1
+        schedule_summary.assert_not_called()
@@ -0,0 +1,168 @@
+"""
+Tests for passage chunking of long documents.
+"""
+
+import datetime
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+
+from apps.documents.models import Document
+from apps.tenants.models import Tenant
+from core.llm import chunking
+from core.llm.embedding_queue import embedding_queue
+from core.llm.embeddings import embedding_fingerprint, embedding_model_tag
+
+
+class WordEncoding:
+    """One token per word, so token budgets are easy to read in the tests."""
+
+    def encode(self, text, **kwargs):
+        return text.split()
+
+    def decode(self, tokens):
+        return ' '.join(tokens)
+
+
+def _count_words(text, model=None):
+    return len(text.split())
+
+
+def _sentences(count, start=0):
+    # Five words each
+    return [f"Sentence number {i} about villas." for i in range(start, start + count)]
+
+
+@pytest.fixture(autouse=True)
+def words(monkeypatch):
+    monkeypatch.setattr(chunking, 'get_encoding', lambda model=None: WordEncoding())
+    monkeypatch.setattr(chunking, 'count_tokens', _count_words)
+
+
+class TestSplitPassages:
+
+    def test_short_text_is_one_passage(self):
+        assert chunking.split_passages('One sentence. Two.', max_tokens=20, overlap_tokens=5) == [
+            'One sentence. Two.'
+        ]
+        assert chunking.split_passages('', max_tokens=20, overlap_tokens=5) == []
+
+    def test_passages_stay_within_max_tokens(self):
+        passages = chunking.split_passages(' '.join(_sentences(30)), max_tokens=22, overlap_tokens=5)
+
+        assert len(passages) > 1
+        assert all(_count_words(passage) <= 22 for passage in passages)
+
+    def test_trailing_sentences_overlap(self):
+        passages = chunking.split_passages(' '.join(_sentences(12)), max_tokens=20, overlap_tokens=5)
+
+        # Four sentences fit in 20 tokens; the last one is repeated in the next passage
+        assert passages[0] == ' '.join(_sentences(4))
+        assert passages[1] == ' '.join(_sentences(4, start=3))
+        for previous, passage in zip(passages, passages[1:]):
+            last_sentence = previous.rsplit('. ', 1)[-1]
+            assert passage.startswith(last_sentence)
+
+    def test_no_overlap_covers_each_sentence_once(self):
+        sentences = _sentences(12)
+        passages = chunking.split_passages(' '.join(sentences), max_tokens=20, overlap_tokens=0)
+
+        assert ' '.join(passages) == ' '.join(sentences)
+
+    def test_overlap_never_overflows_the_next_passage(self):
+        passages = chunking.split_passages(' '.join(_sentences(12)), max_tokens=10, overlap_tokens=10)
+
+        assert all(_count_words(passage) <= 10 for passage in passages)
+
+    def test_long_sentence_is_cut_by_tokens(self):
+        words = [f"w{i}" for i in range(50)]
+        passages = chunking.split_passages(' '.join(words), max_tokens=20, overlap_tokens=0)
+
+        assert [_count_words(passage) for passage in passages] == [20, 20, 10]
+        assert ' '.join(passages).split() == words
+
+
+@pytest.fixture
+def tenant(tmp_path):
+    with connection.schema_editor() as editor:
+        editor.create_model(Tenant)
+        editor.create_model(Document)
+    try:
+        with override_settings(DOCUMENT_CHUNKING_ENABLED=True, DOCUMENT_PASSAGE_TOKENS=20,
+                               DOCUMENT_PASSAGE_OVERLAP_TOKENS=5, VECTOR_INDEX_DIR=str(tmp_path)):
+            yield Tenant.objects.create(name='Tenant', slug='tenant')
+    finally:
+        with connection.schema_editor() as editor:
+            editor.delete_model(Document)
+            editor.delete_model(Tenant)
+
+
+@pytest.fixture
+def queued():
+    with patch.object(embedding_queue, 'add') as add:
+        yield add
+
+
+def _queued_ids(queued):
+    return {str(call.args[1]) for call in queued.call_args_list}
+
+
+def _mark_embedded(passages):
+    for passage in passages:
+        Document.objects.filter(pk=passage.pk).update(
+            embedding=[1.0, 0.0],
+            embedding_hash=embedding_fingerprint(passage.content),
+            embedding_model=embedding_model_tag(),
+        )
+
+
+class TestSyncPassages:
+
+    def _create(self, tenant, content):
+        return Document.objects.create(
+            tenant=tenant, content=content, user_roles=['buyer'],
+            content_type='faq', freshness_date=datetime.date.today(),
+        )
+
+    def test_long_document_is_stored_as_passages(self, tenant, queued):
+        content = ' '.join(_sentences(12))
+        document = self._create(tenant, content)
+
+        passages = list(document.passages.order_by('passage_index'))
+        assert document.passage_count == len(passages) == 4
+        assert [p.content for p in passages] == chunking.split_passages(content)
+        assert all(p.user_roles == ['buyer'] and p.tenant_id == tenant.id for p in passages)
+        assert not document.needs_embedding()
+        assert _queued_ids(queued) == {str(p.id) for p in passages}
+
+    def test_resync_only_requeues_changed_passages(self, tenant, queued):
+        sentences = _sentences(12)
+        document = self._create(tenant, ' '.join(sentences))
+        passages = list(document.passages.order_by('passage_index'))
+        _mark_embedded(passages)
+        queued.reset_mock()
+
+        sentences[-1] = 'The last sentence changed here.'
+        document.content = ' '.join(sentences)
+        document.user_roles = ['buyer', 'staff']
+        document.save()
+
+        resynced = list(document.passages.order_by('passage_index'))
+        assert [p.id for p in resynced] == [p.id for p in passages]
+        assert all(p.user_roles == ['buyer', 'staff'] for p in resynced)
+        # Only the passage holding the edited sentence lost its fingerprint
+        assert _queued_ids(queued) == {str(passages[-1].id)}
+        assert resynced[0].embedding == [1.0, 0.0]
+
+    def test_shortened_document_is_embedded_whole(self, tenant, queued):
+        document = self._create(tenant, ' '.join(_sentences(12)))
+        queued.reset_mock()
+
+        document.content = 'Now a single short sentence.'
+        document.save()
+
+        assert document.passage_count == 0
+        assert not Document.objects.filter(parent=document).exists()
+        assert _queued_ids(queued) == {str(document.id)}
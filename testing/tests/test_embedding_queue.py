@@ -0,0 +1,112 @@
+"""
+Tests for the debounced post-save embedding queue.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.test import override_settings
+
+from core.llm.embedding_queue import EmbeddingQueue
+
+
+class Recorder:
+    """Replaces EmbeddingQueue._dispatch; records groups and signals each one."""
+
+    def __init__(self):
+        self.groups = []
+        self.dispatched = threading.Event()
+
+    def __call__(self, kind, ids):
+        self.groups.append((kind, list(ids)))
+        self.dispatched.set()
+
+
+def _queue(window_ms, max_items):
+    queue = EmbeddingQueue(window_ms=window_ms, max_items=max_items)
+    queue._dispatch = Recorder()
+    return queue
+
+
+class TestEmbeddingQueue:
+
+    def test_flush_dedupes_and_groups(self):
+        queue = _queue(window_ms=60_000, max_items=3)
+        with patch.object(queue, '_ensure_flusher'):
+            for obj_id in ['a', 'b', 'a', 'c', 'd']:
+                queue.add('property', obj_id)
+            queue.add('document', 'x')
+
+            assert queue.flush() == 5
+
+        assert queue._dispatch.groups == [
+            ('property', ['a', 'b', 'c']),
+            ('property', ['d']),
+            ('document', ['x']),
+        ]
+        assert queue.flush() == 0
+
+    def test_saves_within_window_share_one_dispatch(self):
+        queue = _queue(window_ms=150, max_items=50)
+        start = time.monotonic()
+        for obj_id in range(5):
+            queue.add('property', obj_id)
+
+        assert queue._dispatch.groups == []
+        assert queue._dispatch.dispatched.wait(2)
+        assert time.monotonic() - start >= 0.14
+        assert queue._dispatch.groups == [('property', ['0', '1', '2', '3', '4'])]
+
+    def test_full_batch_skips_the_window(self):
+        queue = _queue(window_ms=60_000, max_items=4)
+        for obj_id in range(4):
+            queue.add('property', obj_id)
+
+        assert queue._dispatch.dispatched.wait(2)
+        assert queue._dispatch.groups == [('property', ['0', '1', '2', '3'])]
+
+    def test_later_saves_start_a_new_window(self):
+        queue = _queue(window_ms=50, max_items=50)
+        queue.add('property', 'a')
+        assert queue._dispatch.dispatched.wait(2)
+
+        queue._dispatch.dispatched.clear()
+        queue.add('property', 'b')
+        assert queue._dispatch.dispatched.wait(2)
+
+        assert queue._dispatch.groups == [('property', ['a']), ('property', ['b'])]
+
+
+class TestDispatch:
+
+    @pytest.fixture
+    def backfill(self):
+        with patch('core.llm.backfill.backfill_embeddings') as backfill:
+            yield backfill
+
+    def test_inline_when_async_disabled(self, backfill):
+        with override_settings(ENABLE_ASYNC_EMBEDDINGS=False):
+            EmbeddingQueue(window_ms=10, max_items=10)._dispatch('property', ['a', 'b'])
+
+        backfill.assert_called_once_with('property', ids=['a', 'b'], force=True)
+
+    def test_celery_task_when_async_enabled(self, backfill):
+        task = MagicMock()
+        with override_settings(ENABLE_ASYNC_EMBEDDINGS=True), \
+                patch.dict('sys.modules', {'apps.ingestion.tasks': SimpleNamespace(embed_objects_task=task)}):
+            EmbeddingQueue(window_ms=10, max_items=10)._dispatch('document', ['x'])
+
+        task.delay.assert_called_once_with('document', ['x'])
+        backfill.assert_not_called()
+
+    def test_falls_back_inline_when_broker_is_down(self, backfill):
+        task = MagicMock()
+        task.delay.side_effect = ConnectionError('broker unreachable')
+        with override_settings(ENABLE_ASYNC_EMBEDDINGS=True), \
+                patch.dict('sys.modules', {'apps.ingestion.tasks': SimpleNamespace(embed_objects_task=task)}):
+            EmbeddingQueue(window_ms=10, max_items=10)._dispatch('document', ['x'])
+
+        backfill.assert_called_once_with('document', ids=['x'], force=True)
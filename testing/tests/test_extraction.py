@@ -4,8 +4,9 @@ Tests for PropertyExtractor.
 
 import pytest
 from unittest.mock import patch, MagicMock
-from decimal import Decimal
+from django.test import override_settings
 from core.llm.extraction import PropertyExtractor, ExtractionError
+from core.llm.schemas import PropertyData
 
 
 @pytest.fixture
@@ -30,106 +31,93 @@ def sample_html():
 
 @pytest.fixture
 def sample_extraction_response():
-    return {
-        "property_name": "Beautiful Villa in Tamarindo",
-        "price_usd": 450000,
-        "bedrooms": 3,
-        "bathrooms": 2.5,
-        "property_type": "villa",
-        "location": "Tamarindo",
-        "description": "Stunning beachfront villa with ocean views",
-        "square_meters": 250,
-        "extraction_confidence": 0.85,
-        "field_confidence": {
-            "property_name": 0.95,
-            "price_usd": 0.90,
-            "bedrooms": 0.85,
-            "bathrooms": 0.85
-        }
-    }
+    return PropertyData(
+        property_name="Beautiful Villa in Tamarindo",
+        property_name_evidence="Beautiful Villa in Tamarindo",
+        price_usd=450000,
+        price_evidence="$450,000",
+        bedrooms=3,
+        bathrooms=2.5,
+        property_type="villa",
+        location="Tamarindo",
+        description="Stunning beachfront villa with ocean views",
+        square_meters=250,
+        extraction_confidence=0.85,
+        confidence_reasoning="Price, rooms and area are stated explicitly",
+    )
+
+
+def _completion(parsed):
+    """Structured Outputs response as returned by beta.chat.completions.parse."""
+    return MagicMock(
+        choices=[MagicMock(message=MagicMock(parsed=parsed))],
+        usage=MagicMock(total_tokens=1200),
+    )
+
+
+@pytest.fixture
+def mock_client():
+    mock_client = MagicMock()
+    with patch('core.llm.extraction.get_openai_client', return_value=mock_client), \
+            patch('core.llm.context.count_tokens', return_value=100), \
+            override_settings(LLM_RATE_LIMIT_ENABLED=False):
+        yield mock_client
 
 
-@pytest.mark.django_db
 class TestPropertyExtractor:
     
-    def test_extract_from_html_success(self, sample_html, sample_extraction_response):
+    def test_extract_from_html_success(self, sample_html, sample_extraction_response, mock_client):
         """Test successful extraction from HTML."""
         
-        with patch('core.llm.extraction.OpenAI') as mock_openai:
-            # Mock OpenAI response
-            mock_client = MagicMock()
-            mock_response = MagicMock()
-            mock_response.choices = [
-                MagicMock(message=MagicMock(content=str(sample_extraction_response)))
-            ]
-            mock_client.chat.completions.create.return_value = mock_response
-            mock_openai.return_value = mock_client
-            
-            extractor = PropertyExtractor()
-            result = extractor.extract_from_html(sample_html)
-            
-            assert result['property_name'] == "Beautiful Villa in Tamarindo"
-            assert result['price_usd'] == Decimal('450000')
-            assert result['bedrooms'] == 3
-            assert result['bathrooms'] == Decimal('2.5')
-            assert result['extraction_confidence'] >= 0.6
+        mock_client.beta.chat.completions.parse.return_value = _completion(sample_extraction_response)
+        
+        extractor = PropertyExtractor()
+        result = extractor.extract_from_html(sample_html)
+        
+        assert result['property_name'] == "Beautiful Villa in Tamarindo"
+        assert result['price_usd'] == 450000
+        assert result['bedrooms'] == 3
+        assert result['bathrooms'] == 2.5
+        assert result['extraction_confidence'] >= 0.6
+        assert mock_client.beta.chat.completions.parse.call_args.kwargs['response_format'] is PropertyData
     
-    def test_extract_from_html_missing_required_fields(self, sample_html):
-        """Test extraction with missing required fields."""
+    def test_extract_from_html_missing_required_fields(self, sample_html, mock_client):
+        """Test extraction when the model returns no parsed data."""
         
-        with patch('core.llm.extraction.OpenAI') as mock_openai:
-            # Mock incomplete response
-            mock_client = MagicMock()
-            mock_response = MagicMock()
-            mock_response.choices = [
-                MagicMock(message=MagicMock(content='{"property_name": "Test"}'))
-            ]
-            mock_client.chat.completions.create.return_value = mock_response
-            mock_openai.return_value = mock_client
-            
-            extractor = PropertyExtractor()
-            
-            with pytest.raises(ExtractionError):
-                extractor.extract_from_html(sample_html)
+        mock_client.beta.chat.completions.parse.return_value = _completion(None)
+        
+        extractor = PropertyExtractor()
+        
+        with pytest.raises(ExtractionError):
+            extractor.extract_from_html(sample_html)
     
-    def test_extract_with_retry(self, sample_html, sample_extraction_response):
+    def test_extract_with_retry(self, sample_html, sample_extraction_response, mock_client):
         """Test retry logic on failure."""
         
-        with patch('core.llm.extraction.OpenAI') as mock_openai:
-            mock_client = MagicMock()
-            
-            # First call fails, second succeeds
-            mock_response = MagicMock()
-            mock_response.choices = [
-                MagicMock(message=MagicMock(content=str(sample_extraction_response)))
-            ]
-            
-            mock_client.chat.completions.create.side_effect = [
-                Exception("API Error"),
-                mock_response
-            ]
-            mock_openai.return_value = mock_client
-            
-            extractor = PropertyExtractor()
+        # First call fails, second succeeds
+        mock_client.beta.chat.completions.parse.side_effect = [
+            Exception("API Error"),
+            _completion(sample_extraction_response)
+        ]
+        
+        extractor = PropertyExtractor()
+        with patch('time.sleep'):
             result = extractor.extract_with_retry(sample_html, max_retries=2)
-            
-            assert result['property_name'] == "Beautiful Villa in Tamarindo"
-            assert mock_client.chat.completions.create.call_count == 2
+        
+        assert result['property_name'] == "Beautiful Villa in Tamarindo"
+        assert mock_client.beta.chat.completions.parse.call_count == 2
     
-    def test_decimal_conversion(self):
-        """Test decimal field conversion."""
+    def test_evidence_and_metadata(self, sample_html, sample_extraction_response, mock_client):
+        """Test evidence collection and source metadata."""
+        
+        mock_client.beta.chat.completions.parse.return_value = _completion(sample_extraction_response)
         
         extractor = PropertyExtractor()
+        result = extractor.extract_from_html(sample_html, url='https://example.com/villa')
         
-        test_data = {
-            'price_usd': 450000,
-            'bathrooms': 2.5,
-            'square_meters': 250
+        assert result['field_confidence'] == {
+            'property_name': "Beautiful Villa in Tamarindo",
+            'price': "$450,000",
         }
-        
-        validated = extractor._validate_extraction(test_data)
-        
-        assert isinstance(validated['price_usd'], Decimal)
-        assert isinstance(validated['bathrooms'], Decimal)
-        assert isinstance(validated['square_meters'], Decimal)
-        assert validated['price_usd'] == Decimal('450000')
+        assert result['source_url'] == 'https://example.com/villa'
+        assert result['tokens_used'] == 1200
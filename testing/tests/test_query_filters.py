@@ -0,0 +1,92 @@
+"""
+Tests for query filter parsing.
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from core.llm.query_filters import _parse_number, parse_query_filters
+
+
+def _bedrooms(query):
+    filters = parse_query_filters(query)
+    return filters.min_bedrooms, filters.max_bedrooms
+
+
+class TestBedrooms:
+
+    @pytest.mark.parametrize('query, expected', [
+        ('3 bedrooms', (3, 3)),
+        ('tres habitaciones', (3, 3)),
+        ('una habitacion', (1, 1)),
+        ('at least two beds', (2, None)),
+        ('3+ br', (3, None)),
+        ('3 or more bedrooms', (3, None)),
+        ('2 o mas habitaciones', (2, None)),
+        ('mas de 2 dormitorios', (3, None)),
+        ('casa desde 2 habitaciones', (2, None)),
+        ('a partir de 3 dormitorios', (3, None)),
+        ('hasta 4 cuartos', (None, 4)),
+    ])
+    def test_single_count(self, query, expected):
+        assert _bedrooms(query) == expected
+
+    @pytest.mark.parametrize('query', [
+        'homes from 2 to 3 bedrooms',
+        'between two and three beds',
+        'casas de 2 a 3 habitaciones',
+        'entre dos y tres dormitorios',
+        '2 o 3 cuartos',
+        'desde 2 a 3 habitaciones',
+        '2-3 br condo',
+        '3 to 2 bedrooms',
+    ])
+    def test_range(self, query):
+        assert _bedrooms(query) == (2, 3)
+
+    def test_range_is_not_read_as_price(self):
+        filters = parse_query_filters('from $200k to $300k, 2 to 3 bedrooms')
+
+        assert (filters.min_price, filters.max_price) == (Decimal(200000), Decimal(300000))
+        assert (filters.min_bedrooms, filters.max_bedrooms) == (2, 3)
+
+    def test_implausible_count_is_ignored(self):
+        assert _bedrooms('50 bedrooms') == (None, None)
+
+
+class TestPrice:
+
+    @pytest.mark.parametrize('query, expected', [
+        ('house under $450k', (None, Decimal(450000))),
+        ('between 200 and 300 thousand dollars', (Decimal(200000), Decimal(300000))),
+        ('entre 200 y 300 mil dolares', (Decimal(200000), Decimal(300000))),
+        ('hasta 1,5 millones', (None, Decimal(1500000))),
+        ('presupuesto de 250 mil', (None, Decimal(250000))),
+        ('a partir de 200 mil dolares', (Decimal(200000), None)),
+        ('casa a 300 m de la playa', (None, None)),
+        ('under 2000 m2 of land', (None, None)),
+        ('houses within 5km of the beach', (None, None)),
+        ('condo within 2km from town', (None, None)),
+        ('within 3 miles of town', (None, None)),
+        ('under 1.2mm', (None, Decimal(1200000))),
+    ])
+    def test_price_bounds(self, query, expected):
+        filters = parse_query_filters(query)
+        assert (filters.min_price, filters.max_price) == expected
+
+
+class TestParseNumber:
+
+    @pytest.mark.parametrize('text, expected', [
+        ('1,500,000', Decimal(1500000)),
+        ('1.500.000', Decimal(1500000)),
+        ('1.5', Decimal('1.5')),
+        ('1,5', Decimal('1.5')),
+        ('450', Decimal(450)),
+        ('1,250.50', Decimal('1250.50')),
+        ('dos', Decimal(2)),
+        ('three', Decimal(3)),
+    ])
+    def test_formats(self, text, expected):
+        assert _parse_number(text) == expected
@@ -0,0 +1,155 @@
+"""
+Tests for the per-model LLM rate limiter (process-local buckets).
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from django.test import override_settings
+
+from core.llm import rate_limit
+from core.llm.rate_limit import RateLimiter, RateLimitExceeded, _LocalBuckets, rate_limited
+
+MODEL = 'gpt-4o-mini'
+
+
+class Clock:
+    """Stands in for the `time` module inside rate_limit: manual monotonic time, recorded sleeps."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def limiter(clock):
+    with override_settings(LLM_RATE_LIMIT_ENABLED=True, LLM_RATE_LIMIT_MAX_WAIT=2.0):
+        yield RateLimiter(limits={MODEL: {'rpm': 60, 'tpm': 6000}}, buckets=_LocalBuckets())
+
+
+class TestRateLimiter:
+
+    def test_burst_up_to_rpm_then_queues(self, limiter, clock):
+        assert all(limiter.acquire(MODEL) == 0 for _ in range(60))
+
+        # One request per second refills; the next caller waits its turn
+        assert limiter.acquire(MODEL) == pytest.approx(1.0)
+        assert clock.sleeps == [pytest.approx(1.0)]
+
+    def test_sheds_with_retry_after_beyond_max_wait(self, limiter):
+        for _ in range(60):
+            limiter.reserve(MODEL)
+        assert limiter.reserve(MODEL) == pytest.approx(1.0)   # granted, bucket now at -1
+
+        with pytest.raises(RateLimitExceeded) as error:
+            limiter.reserve(MODEL, max_wait=1.5)
+
+        assert error.value.model == MODEL
+        assert error.value.retry_after == pytest.approx(2.0)
+        # A shed request takes nothing: the same wait is quoted again
+        with pytest.raises(RateLimitExceeded) as error:
+            limiter.reserve(MODEL, max_wait=1.5)
+        assert error.value.retry_after == pytest.approx(2.0)
+
+    def test_buckets_refill_over_time(self, limiter, clock):
+        for _ in range(60):
+            limiter.reserve(MODEL)
+
+        clock.advance(30)
+
+        assert limiter.headroom()[MODEL]['requests_available'] == pytest.approx(30)
+        assert all(limiter.reserve(MODEL) == 0 for _ in range(30))
+        assert limiter.reserve(MODEL) > 0
+
+    def test_token_budget(self, limiter):
+        assert limiter.reserve(MODEL, tokens=5000) == 0
+
+        # 1000 tokens left, 100 tokens per second refill
+        assert limiter.reserve(MODEL, tokens=1200) == pytest.approx(2.0)
+
+    def test_request_over_a_minute_of_tokens_waits_for_full_bucket(self, limiter, clock):
+        assert limiter.reserve(MODEL, tokens=50_000, max_wait=0) == 0
+        with pytest.raises(RateLimitExceeded) as error:
+            limiter.reserve(MODEL, tokens=50_000, max_wait=0)
+        assert error.value.retry_after == pytest.approx(60.0)
+
+    def test_backoff_pauses_every_caller(self, limiter):
+        limiter.backoff(MODEL, 5)
+
+        with pytest.raises(RateLimitExceeded) as error:
+            limiter.reserve(MODEL)
+        assert error.value.retry_after >= 5
+
+    def test_unlimited_models_and_disabled_limiter(self, limiter):
+        assert limiter.reserve('some-other-model', tokens=10**9) == 0
+        with override_settings(LLM_RATE_LIMIT_ENABLED=False):
+            for _ in range(100):
+                assert limiter.reserve(MODEL) == 0
+
+    def test_store_errors_fall_back_to_local_buckets(self, clock):
+        def broken(*args, **kwargs):
+            raise ConnectionError('redis down')
+
+        with override_settings(LLM_RATE_LIMIT_ENABLED=True):
+            limiter = RateLimiter(limits={MODEL: {'rpm': 2}}, buckets=SimpleNamespace(reserve=broken))
+            assert limiter.reserve(MODEL) == 0
+            assert limiter.reserve(MODEL) == 0
+            with pytest.raises(RateLimitExceeded):
+                limiter.reserve(MODEL, max_wait=0)
+
+
+class Http429(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__('Too Many Requests')
+        headers = {'retry-after': retry_after} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+
+class TestRateLimited:
+
+    @pytest.fixture(autouse=True)
+    def shared(self, limiter, monkeypatch):
+        monkeypatch.setattr(rate_limit, 'rate_limiter', limiter)
+
+    def test_provider_429_becomes_rate_limit_exceeded(self, limiter):
+        with pytest.raises(RateLimitExceeded) as error:
+            with rate_limited(MODEL, tokens=10):
+                raise Http429(retry_after='7')
+
+        assert error.value.retry_after == 7.0
+        # The whole cluster backs off, not just this caller
+        with pytest.raises(RateLimitExceeded):
+            limiter.reserve(MODEL)
+
+    def test_429_without_header_uses_default(self):
+        with pytest.raises(RateLimitExceeded) as error:
+            with rate_limited(MODEL):
+                raise Http429()
+
+        assert error.value.retry_after == rate_limit.DEFAULT_RETRY_AFTER
+
+    def test_other_errors_pass_through(self, limiter):
+        with pytest.raises(ValueError):
+            with rate_limited(MODEL):
+                raise ValueError('bad request')
+
+        assert limiter.reserve(MODEL) == 0
@@ -0,0 +1,89 @@
+"""
+Tests for the semantic answer cache.
+"""
+
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+
+from core.llm.semantic_cache import SemanticCache, invalidate_sources
+
+
+def _vector(i, dimensions=8):
+    vector = np.zeros(dimensions)
+    vector[i % dimensions] = 1.0
+    vector[(i + 1) % dimensions] = 0.1 * (i // dimensions)
+    return vector.tolist()
+
+
+@pytest.fixture
+def cache():
+    cache = caches['default']
+    cache.clear()
+    with override_settings(ENABLE_SEMANTIC_CACHE=True, SEMANTIC_CACHE_THRESHOLD=0.99,
+                           SEMANTIC_CACHE_MAX_ENTRIES=50):
+        yield SemanticCache('tenant-1', 'buyer', cache=cache)
+    cache.clear()
+
+
+class TestSemanticCache:
+
+    def test_similar_query_hits(self, cache):
+        cache.store('villa con piscina', _vector(0), 'Villa Mar', [{'type': 'property', 'id': 'p1'}])
+
+        hit = cache.lookup(_vector(0))
+
+        assert hit['response'] == 'Villa Mar'
+        assert hit['similarity'] == pytest.approx(1.0)
+        assert cache.lookup(_vector(3)) is None
+
+    def test_hit_does_not_rewrite_index(self, cache):
+        cache.store('villa con piscina', _vector(0), 'Villa Mar', [])
+
+        with patch.object(cache, '_save_index') as save_index:
+            assert cache.lookup(_vector(0)) is not None
+        save_index.assert_not_called()
+
+    def test_source_change_invalidates_answer(self, cache):
+        cache.store('villa con piscina', _vector(0), 'Villa Mar', [{'type': 'property', 'id': 'p1'}])
+        cache.store('casa en la playa', _vector(1), 'Casa Sol', [{'type': 'property', 'id': 'p2'}])
+
+        invalidate_sources('property', 'p1')
+
+        assert cache.lookup(_vector(0)) is None
+        assert cache.lookup(_vector(1))['response'] == 'Casa Sol'
+        # The stale row was pruned from the index
+        assert len(cache._load_index()['ids']) == 1
+
+    def test_concurrent_stores_keep_every_row(self, cache):
+        def store(i):
+            cache.store(f"query {i}", _vector(i), f"answer {i}", [{'type': 'property', 'id': f"p{i}"}])
+
+        threads = [threading.Thread(target=store, args=(i,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(cache._load_index()['ids']) == 16
+        assert cache.cache.get(cache.lock_key) is None
+
+    def test_evicts_least_recently_used(self, cache):
+        cache.max_entries = 2
+        cache.store('q0', _vector(0), 'a0', [])
+        cache.store('q1', _vector(1), 'a1', [])
+        # A hit long after the store refreshes q0's "used" time
+        index = cache._load_index()
+        index['last_used'] = [0.0, 0.0]
+        cache._save_index(index)
+        assert cache.lookup(_vector(0)) is not None
+
+        cache.store('q2', _vector(2), 'a2', [])
+
+        assert cache.lookup(_vector(0)) is not None
+        assert cache.lookup(_vector(1)) is None
+        assert cache.lookup(_vector(2)) is not None
@@ -0,0 +1,122 @@
+"""
+Tests for the memory-mapped VectorIndex.
+"""
+
+import numpy as np
+import pytest
+from django.test import override_settings
+
+from core.llm import vector_search
+from core.llm.vector_index import VectorIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = VectorIndex('tenant-1', 'buyer', base_dir=str(tmp_path), dimensions=4)
+    index.rebuild([
+        ('property', 'a', [1.0, 0.0, 0.0, 0.0]),
+        ('property', 'b', [0.0, 1.0, 0.0, 0.0]),
+        ('document', 'c', [0.7, 0.7, 0.0, 0.0]),
+    ])
+    return index
+
+
+class TestVectorIndex:
+
+    def test_search_orders_by_cosine_similarity(self, index):
+        hits = index.search([2.0, 0.1, 0.0, 0.0], k=2)
+
+        assert [(obj_type, obj_id) for obj_type, obj_id, _ in hits] == [
+            ('property', 'a'),
+            ('document', 'c'),
+        ]
+        assert hits[0][2] == pytest.approx(0.9988, abs=1e-3)
+
+    def test_upsert_replaces_and_appends(self, index):
+        index.upsert('property', 'a', [0.0, 0.0, 1.0, 0.0])
+        index.upsert('property', 'd', [0.0, 0.0, 0.0, 1.0])
+
+        assert len(index) == 4
+        assert index.search([0.0, 0.0, 1.0, 0.0], k=1)[0][1] == 'a'
+        assert index.search([0.0, 0.0, 0.0, 1.0], k=1)[0][1] == 'd'
+
+    def test_remove_keeps_matrix_contiguous(self, index):
+        assert index.remove('property', 'a')
+        assert not index.remove('property', 'a')
+
+        hits = index.search([1.0, 0.0, 0.0, 0.0], k=10)
+        assert {obj_id for _, obj_id, _ in hits} == {'b', 'c'}
+
+    def test_other_process_sees_updates(self, index, tmp_path):
+        reader = VectorIndex('tenant-1', 'buyer', base_dir=str(tmp_path), dimensions=4)
+        assert len(reader) == 3
+
+        index.upsert('property', 'd', np.array([0.0, 0.0, 0.0, 1.0]))
+        assert reader.search([0.0, 0.0, 0.0, 1.0], k=1)[0][1] == 'd'
+
+    def test_writers_see_each_others_rows(self, index, tmp_path):
+        other = VectorIndex('tenant-1', 'buyer', base_dir=str(tmp_path), dimensions=4)
+        other.upsert('property', 'd', [0.0, 0.0, 0.0, 1.0])
+
+        # The first writer's key -> row map must pick up 'd' before moving rows
+        assert index.remove('property', 'a')
+        assert index.upsert('property', 'd', [0.0, 0.0, 1.0, 0.0])
+
+        assert len(index) == 3
+        assert index.search([0.0, 0.0, 1.0, 0.0], k=1)[0][1] == 'd'
+        assert {obj_id for _, obj_id, _ in other.search([1.0, 1.0, 1.0, 1.0], k=10)} == {'b', 'c', 'd'}
+
+    def test_grows_past_capacity(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('core.llm.vector_index.MIN_CAPACITY', 4)
+        index = VectorIndex('tenant-1', 'buyer', base_dir=str(tmp_path), dimensions=4)
+        index.rebuild([])
+
+        vectors = np.eye(4).tolist() + [[1.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 1.0]]
+        for i, vector in enumerate(vectors):
+            index.upsert('property', str(i), vector)
+
+        assert len(index) == 6
+        for i, vector in enumerate(vectors):
+            assert index.search(vector, k=1)[0][1] == str(i)
+        # Keys live in their own file, not in the metadata rewritten on every write
+        assert 'keys' not in index._read_meta()
+
+    def test_wrong_dimensions_are_skipped(self, tmp_path):
+        index = VectorIndex('tenant-1', 'staff', base_dir=str(tmp_path), dimensions=4)
+        assert index.rebuild([('property', 'a', [1.0, 0.0])]) == 0
+        assert index.search([1.0, 0.0, 0.0, 0.0], k=5) == []
+
+    @pytest.mark.parametrize('mode', ['int8', 'binary'])
+    def test_quantized_search_reranks_exactly(self, tmp_path, mode):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((500, 16))
+        index = VectorIndex('tenant-1', 'buyer', base_dir=str(tmp_path), dimensions=16,
+                            quantization_mode=mode, rerank_factor=5)
+        index.rebuild(('property', str(i), vector) for i, vector in enumerate(vectors))
+
+        hits = index.search(vectors[7], k=3)
+        assert hits[0][1] == '7'
+        assert hits[0][2] == pytest.approx(1.0, abs=1e-5)
+
+        index.remove('property', '7')
+        index.upsert('property', 'new', vectors[7])
+        assert index.search(vectors[7], k=1)[0][1] == 'new'
+
+
+class TestBackendChoice:
+
+    @pytest.fixture(autouse=True)
+    def reset_backend(self):
+        vector_search._backend = None
+        yield
+        vector_search._backend = None
+
+    @pytest.mark.parametrize('choice', ['auto', 'index'])
+    def test_disabled_index_falls_back_to_scan(self, choice):
+        # Saves stop syncing the index when it is disabled, so it must not be served
+        with override_settings(VECTOR_SEARCH_BACKEND=choice, VECTOR_INDEX_ENABLED=False):
+            assert vector_search.get_vector_backend().name == 'scan'
+
+    def test_enabled_index_is_used(self):
+        with override_settings(VECTOR_SEARCH_BACKEND='auto', VECTOR_INDEX_ENABLED=True):
+            assert vector_search.get_vector_backend().name == 'index'
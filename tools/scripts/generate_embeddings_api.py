@@ -7,13 +7,35 @@ Sends a POST request to the /ingest/generate-embeddings/ endpoint.
 import requests
 import json
 import sys
+import time
 
 # Production URL
 PROD_URL = "https://goldfish-app-3hc23.ondigitalocean.app"
 
+def print_coverage(data):
+    print(f"   Total Properties: {data.get('total')}")
+    print(f"   With Embeddings: {data.get('with_embeddings')}")
+    print(f"   Coverage: {data.get('coverage_percent')}%")
+
+
+def wait_for_backfill(url, force, task_id):
+    """Poll the endpoint until the queued backfill finishes."""
+    params = {"kind": "property", "force": str(force).lower()}
+    while True:
+        time.sleep(5)
+        data = requests.get(url, params=params, timeout=30).json()
+        backfill = data.get('backfill') or {}
+        if backfill.get('run_id') != task_id:
+            backfill = {}  # Worker hasn't picked the task up yet
+        print(f"   ⏳ {backfill.get('status', 'queued')}: {backfill.get('rows', 0)} rows "
+              f"({backfill.get('rows_per_second', 0)} rows/s, {backfill.get('tokens_per_second', 0)} tokens/s)")
+        if backfill.get('status') in ('complete', 'failed'):
+            return data
+
+
 def generate_embeddings(force=False):
     """
-    Call the generate embeddings endpoint.
+    Call the generate embeddings endpoint and follow the backfill.
     
     Args:
         force: If True, regenerate embeddings even if they exist
@@ -29,30 +51,28 @@ def generate_embeddings(force=False):
     }
     
     try:
-        response = requests.post(url, json=payload, timeout=300)  # 5 minute timeout
+        response = requests.post(url, json=payload, timeout=30)
         
         if response.status_code == 200:
-            data = response.json()
+            print("✅ Nothing to do!")
+            print_coverage(response.json())
+        
+        elif response.status_code == 202:
+            task_id = response.json().get('task_id')
+            print(f"📬 Backfill queued (task {task_id})")
+            data = wait_for_backfill(url, force, task_id)
+            backfill = data['backfill']
             
-            print("✅ SUCCESS!")
             print()
-            print("📊 Results:")
-            print(f"   Total Properties: {data.get('total_properties')}")
-            print(f"   With Embeddings: {data.get('with_embeddings')}")
-            print(f"   Coverage: {data.get('coverage_percent')}%")
+            print("✅ SUCCESS!" if backfill['status'] == 'complete' else f"❌ FAILED: {backfill.get('error')}")
             print()
-            print(f"   Processed: {data.get('processed')}")
-            print(f"   Success: {data.get('success')}")
-            print(f"   Errors: {data.get('errors')}")
-            
-            if data.get('error_details'):
-                print()
-                print("❌ Error Details:")
-                for error in data['error_details']:
-                    print(f"   - {error}")
-            
+            print("📊 Results:")
+            print_coverage(data)
             print()
-            print(f"💬 Message: {data.get('message')}")
+            print(f"   Embedded: {backfill.get('rows')}")
+            print(f"   Failed: {backfill.get('failed')}")
+            print(f"   Skipped (no content): {backfill.get('skipped')}")
+            print(f"   Time: {backfill.get('elapsed_seconds')}s")
             
         else:
             print(f"❌ ERROR: {response.status_code}")
@@ -60,7 +80,7 @@ def generate_embeddings(force=False):
             sys.exit(1)
             
     except requests.exceptions.Timeout:
-        print("❌ Request timed out (exceeded 5 minutes)")
+        print("❌ Request timed out")
         sys.exit(1)
     except Exception as e:
         print(f"❌ Error: {e}")